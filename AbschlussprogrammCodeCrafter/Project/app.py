@@ -1,50 +1,46 @@
-from flask import Flask, render_template, request, redirect, url_for, session, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, send_file, Response
 import io
-from xhtml2pdf import pisa
 import sqlite3
-from playwright.async_api import async_playwright
 from datetime import datetime
-import asyncio
-
-# Importing various compliance checkers
-from cookie_banner_visibility import CookieBannerVis
-from cookie_banner_without_consent import WithoutConsentChecker
-from cookie_options import CookieSelectionChecker
-from cookie_banner_text import CookieBannerText
-from cookie_banner_link_checker import CookieBannerLinkValidator
-from cookie_banner_scrollbar import ScrollbarChecker
-from cookie_banner_conform_design import ConformDesignChecker
-from cookie_more_information import CookieInfoChecker
-from cookie_preference_center_vis import CookiePreferenceVis
-from cookie_preference_clickable_links import CookiePreferenceLinkValidator
-from check_clear_cta import ClearCTA
-from check_age_limitation import AgeLimitation
-from check_newsletter_wording import NewsletterWording
-from check_newsletter_functionality import NewsletterFunctionality
-from check_newsletter_more_details import MoreDetails
-from imprint_checker import ImprintChecker
-from imprint_visibility_checker import AsyncImprintVisibilityChecker
-from pagefooter import FooterLinkChecker
-from pagefooter_essentials import AsyncFooterValidator
+import json
+import os
+from check_registry import registry
+from check_scheduler import CheckScheduler
+from scan_jobs import ScanJobManager
+from har_archive import ScanArchive
+from result_cache import ResultCache
+from create_db import init_db, migrate_db
+from startup import start_warm_up
+from default_templates import DEFAULT_TEMPLATES
+
+# Registers all compliance checks with the check registry
+import compliance_checks
 
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = 'your_secret_key' 
 
+# Set once the database was initialized by the first request
+database_ready = False
 
-
-# Default templates for compliance checks
-DEFAULT_TEMPLATES = {
-    'imprint': "No Default needed",
-    'newsletterdetail': "Die Einwilligung umfasst, dass Ihre oben angegebene E-Mailadresse sowie ggf. weitere von Ihnen angegebene Kontaktdaten von der L’Oréal Deutschland GmbH, Johannstraße 1, 40476 Düsseldorf (im Folgenden L'Oréal), gespeichert und genutzt werden, um Sie per E-Mail, Telefon, Telefax, SMS, Briefpost persönlich und relevant über interessante Leistungen, Produkte und Aktionen von [Marke] sowie aus dem Angebot von L'Oréal und deren weiteren Marken zu informieren. Um Ihnen individuell auf Ihre Interessen zugeschnittene Informationen zukommen zu lassen, speichert L’Oréal auch die Daten zu Ihren Reaktionen auf die empfangenen Informationen und die weiteren Daten aus Ihrer Nutzung der Webservices von [Marke] und L'Oréal (insbesondere Daten zu Einkäufen und Gesamtumsatz, angesehenen und gekauften Warengruppen/Produkten, Produkten im Warenkorb und eingelöste Gutscheine sowie zu Ihren sonstigen Interaktionen im Rahmen der Webservices und Ihren Reaktionen auf unsere Kontaktaufnahmen und Angebote, inklusive besonderer Vorteils-Aktionen) und führt diese Daten mit Ihren Kontaktdaten innerhalb eines Interessenprofils zusammen. Diese Daten werden ausschließlich genutzt, um Ihnen Ihren Interessen entsprechende Angebote machen zu können. Um Ihnen auf den Plattformen unserer Werbepartner interessengerechte Informationen / Werbung anzeigen zu können, nutzen wir bestimmte Tools unserer Werbepartner (z.B. Facebook Custom Audiences und Google Customer Match) und übermitteln die von Ihnen bei der Anmeldung angegebene E-Mail-Adresse oder Telefonnummer in verschlüsselter (pseudonymisierter) Form an diese. Hierdurch wird es möglich, Sie beim Besuch der Plattformen unserer Werbepartner als Nutzer der Webservices von L'Oréal zu erkennen, um Ihnen maßgeschneiderte Informationen / Werbung anzuzeigen.",
-    'cookie_policy': 'Auf unserer Webseite verwenden wir Cookies und ähnliche Technologien, um Informationen auf Ihrem Gerät (z.B. IP-Adresse, Nutzer-ID, Browser-Informationen) zu speichern und/oder abzurufen. Einige von ihnen sind für den Betrieb der Webseite unbedingt erforderlich. Andere verwenden wir nur mit Ihrer Einwilligung, z.B. um unser Angebot zu verbessern, ihre Nutzung zu analysieren, Inhalte auf Ihre Interessen zuzuschneiden oder Ihren Browser/Ihr Gerät zu identifizieren, um ein Profil Ihrer Interessen zu erstellen und Ihnen relevante Werbung auf anderen Onlineangeboten zu zeigen. Sie können nicht erforderliche Cookies akzeptieren ("Alle akzeptieren"), ablehnen ("Ohne Einwilligung fortfahren") oder die Einstellungen individuell anpassen und Ihre Auswahl speichern ("Auswahl speichern"). Zudem können Sie Ihre Einstellungen (unter dem Link "Cookie-Einstellungen") jederzeit aufrufen und nachträglich anpassen. Weitere Informationen enthalten unsere Datenschutzinformationen.',
-    'newsletter' : 'Ja, hiermit willige ich in die Verarbeitung meiner o.g. Kontaktdaten zu Marketingzwecken im Wege der direkten Kontaktaufnahme durch [Marke] sowie die weiteren Marken der L’Oréal Deutschland GmbH ein. Um individuell auf meine Interessen zugeschnittene Informationen zu erhalten, willige ich außerdem ein, dass diese meine Reaktionen im Rahmen der Marketingaktionen sowie meine Interaktionen bei der Nutzung der Webservices der L’Oréal Deutschland GmbH  und ihrer Marken erhebt und in einem Interessenprofil speichert, nutzt sowie meine E-Mail-Adresse oder meine Telefonnummer (soweit angegeben) in verschlüsselter Form an unsere Werbepartner übermittelt, sodass mir auch bei der Nutzung der Webservices unserer Werbepartner entsprechende Informationen angezeigt werden.'
-}
+@app.before_request
+def prepare_database():
+    """
+    Makes sure the database exists and has the current schema (e.g. the job_id column) before the
+    first request is handled. Not done at import, so tools and benchmarks can import the app without
+    touching the database.
+    """
+    global database_ready
+    if not database_ready:
+        init_db()
+        database_ready = True
 
 # Define compliance criteria and their descriptions
 # IMPORTANT !
-# In order to check a criteria, you should add the name and the function of the criteria into this dictionary.
-# The function, that checks the criteria has to return False or True. Otherwise the dictionary won't get initialized correctly.
+# In order to check a criteria, you should add the name and the description of the criteria into this dictionary
+# and register the function that checks the criteria in compliance_checks.py.
+# The function, that checks the criteria has to return False or True together with a feedback text.
+# The names have to be the ones the checks report (registry.criteria()), the progress page lists those.
 CRITERIA = {
     "Cookie Banner Visibility": "Check if the cookie banner is visible.",
     "Continue Without Consent Link": "Check for the presence of 'Ohne Einwilligung' link.",
@@ -59,16 +55,15 @@ CRITERIA = {
     "Clear CTA": "CTA must be recognizable and has to have a clear wording" ,
     "Age Limitation": "Check if the age limit is 18",
     "Newsletter Wording": "Check if the wording of the newsletter is correct",
-    "Imprint": "Check for the presence of imprint.",
-    "Imprint Horizontal": "Check if theres a Horizontal Scrollbar",
-    "Imprint Length": "Check if how long the Imprint is",
-    "Footer cookie": "Check if the cookies are in the page footer",
-    "Footer imprint": "Check if the imprint is in the page footer",
-    "Footer privacy policy": "Check if the privacy policy is in the page footer",
-    "Footer links": "Check if the links in the page footer work properly",
     "Newsletter Functionality" : "Check if the functionality of the 4 Links in the Newsletter is correct",
-    "Newsletter More Details": "Check if the More Details Button is avaiable and if yes, check the wording of the additional text."
-    
+    "Newsletter More Details": "Check if the More Details Button is avaiable and if yes, check the wording of the additional text.",
+    "Imprint URL": "Check for the presence of imprint.",
+    "Imprint Visibility": "Check if theres a Horizontal Scrollbar",
+    "Footer Links": "Check if the links in the page footer work properly",
+    "Footer Imprint": "Check if the imprint is in the page footer",
+    "Footer privacy policy": "Check if the privacy policy is in the page footer",
+    "Footer cookie settings": "Check if the cookies are in the page footer",
+    "Imprint Term: <term>": "Check if every additional imprint term of the templates is in the imprint (one criterion per term)",
 }
 
 # Retrieve stored templates or use default values
@@ -85,6 +80,7 @@ def index():
     if request.method == 'POST':
         url = request.form['url']
         session['url'] = url  # Store the URL in session
+        session['force_rescan'] = bool(request.form.get('force_rescan'))  # Ignore cached results of earlier scans
         return redirect(url_for('templates'))  # Redirect to templates page
     return render_template('index.html')
 
@@ -110,293 +106,95 @@ def templates():
 
 
 @app.route('/check_compliance') 
-async def check_compliance():
-    """Asynchronously checks the website's compliance based on selected criteria."""
+def check_compliance():
+    """Submits a compliance check of the website as a background job and shows its progress."""
     url = session.get('url')
     if not url:
         return redirect(url_for('index'))
 
-    start_time = datetime.now()  # Record start time for performance measurement
-
-
-
-    # Instantiate compliance checkers
-    checker = CookieBannerVis()
-    checker2 = WithoutConsentChecker()
-    checker3 = CookieSelectionChecker()
-    checker4 = CookieBannerText()
-    checker5 = CookieBannerLinkValidator()
-    checker_scrollbar = ScrollbarChecker()
-    checker_conform_design = ConformDesignChecker()
-    checker_cookie_more_info = CookieInfoChecker()
-    preference_center_vis = CookiePreferenceVis()
-    preference_center_link_validator = CookiePreferenceLinkValidator()
-    checkern1 = ClearCTA(url)
-    checkern2 = AgeLimitation(url)
-    checkern3 = NewsletterWording(url)
-    checkern5 = NewsletterFunctionality(url)
-    checkerm1 = ImprintChecker()
-    checkerm2 = AsyncImprintVisibilityChecker()
-    checkerm3 = FooterLinkChecker()
-    checkerm4 = AsyncFooterValidator()
-
-    # Initialize criteria results and feedback results
-    criteria_results = {}
-    feedback_results = {}
+    # The session is only available in the request context, so the templates are read here
+    job = scan_jobs.submit(url, get_templates(), force=session.pop('force_rescan', False))
+    return redirect(url_for('job_progress', job_id=job.id))
 
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            
-            # Run various compliance checks asynchronously
-            tasks = [
-                checker.check_visibility(url),
-                checker2.check_ohne_einwilligung_link(url),
-                checker3.check_cookie_selection(url),
-                checker5.check_banner_and_links(url),
-                checker_scrollbar.check_cookie_banner_with_scrollbar(url),
-                preference_center_vis.check_visibility_and_preference_center(url),
-                preference_center_link_validator.check_preference_links(url),
-                checker_cookie_more_info.find_more_info_buttons(browser, url),  # Pass the browser here
-                checkern1.check_clear_cta(),  
-                checkern2.check_age_limitation(),
-                checkerm2.check_scrollable(url), 
-                checkern5.check_newsletter_functionality(),
-                checkerm3.check_footer_links_on_all_pages(url),
-                checkerm4.check_footer_links(url)
-            ]
-    
-            footer_failed_links = await checkerm3.check_footer_links_on_all_pages(url)
-    
-            # Sync check for ImprintChecker (not asynchronous)
-            templates = get_templates()
-            additional_imprint = templates.get('additional_imprint', [])
-            
-            print("Debug (check_compliance): Loaded additional_imprint:", additional_imprint)  # Debugging
-    
-            # Check whether terms are available
-            if not additional_imprint:
-                print("No additional Imprint terms found.")
-            imprint_url, term_results, _, _ = checkerm1.check_terms(url, additional_imprint)
-            print("Debug (check_compliance): Term Results from checkerM1:", term_results)
-    
-            # Feedback for the Imprint
-            imprint_feedback = f"Imprint found at {imprint_url}." if imprint_url else "No valid Imprint link found."
-    
-            # Populate criteria results
-            criteria_results["Imprint URL"] = True if imprint_url else False
-            feedback_results["Imprint URL"] = imprint_feedback or "No feedback available"
-    
-    
-            # Debug: Output of the imprint results
-            print(f"Imprint URL: {imprint_url}")
-            print(f"Imprint Terms Results: {term_results}")
-    
-            # Checking the footer links
-            if footer_failed_links:
-                criteria_results["Footer Links"] = False
-
-                feedback_results["Footer Links"] = f"The following footer links do not work: {', '.join(footer_failed_links)}"
-            else:
-                criteria_results["Footer Links"] = True
-                feedback_results["Footer Links"] = "All footer links work properly."
-    
-    
-            # Wait for all asynchronous tasks to complete
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Debug print
-            for idx, result in enumerate(results):
-                print(f"Task {idx} result: {result} (Type: {type(result)})")
-    
-            # Process asynchronous results
-            banner_result, banner_feedback = results[0] if not isinstance(results[0], Exception) else (False, str(results[0]))
-            ohne_einwilligung_result, ohne_feedback = results[1] if not isinstance(results[1], Exception) else (False, str(results[1]))
-            selection_result, selection_feedback = results[2] if not isinstance(results[2], Exception) else (False, str(results[2]))
-            imprint_privacy_result, imprint_privacy_feedback = results[3] if not isinstance(results[3], Exception) else (False, str(results[3]))
-            cookie_banner_scrollbar_result, cookie_banner_scrollbar_feedback = results[4] if not isinstance(results[4], Exception) else (False, str(results[4]))
-            preference_center_vis_result, preference_center_vis_feedback = results[5] if not isinstance(results[5], Exception) else (False, str(results[5]))
-            preference_center_links_result, preference_center_links_feedback = results[6] if not isinstance(results[6], Exception) else (False, str(results[6]))
-            cookie_banner_more_info_result, cookie_banner_more_info_feedback = results[7] if not isinstance(results[7], Exception) else (False, str(results[7]))
-            cta_result, cta_feedback = results[8] if not isinstance(results[8], Exception) else (False, str(results[8]))
-            age_limitation_result, age_limitation_feedback = results[9] if not isinstance(results[9], Exception) else (False, str(results[9]))
-            imprint_visibility_result, imprint_visibility_feedback = results[10] if not isinstance(results[10], Exception) else (False, str(results[10]))
-            newsletter_functionality_result, newsletter_functionality_feedback = results[11] if not isinstance(results[11], Exception) else ({}, "Error during newsletter functionality check.")
-            footer_results = results[-1] if not isinstance(results[-1], Exception) else {"imprint": False, "privacy policy": False, "cookie": False}
-
-            # Perform text comparison
-            try:
-                website_text = await checker4.extract_cookie_banner_text(url)
-                cookie_policy_template = templates['cookie_policy']  # Access the 'cookie_policy' template
-                text_comparison_result, similarity, text_comparison_feedback = checker4.compare_cookie_banner_text(
-                    website_text, cookie_policy_template
-                )
-            except Exception as e:
-                text_comparison_result = False
-                text_comparison_feedback = f"Error during text comparison: {e}"
-            
-            # Newsletter comparison
-            try:
-             checkern3 = NewsletterWording(url)
-             templates = get_templates()
-             newsletter_template = templates['newsletter']
-
-             # Execute the verification
-             conformity, similarity, feedback = await checkern3.check_newsletter_wording(url, newsletter_template)
-    
-             
-             newsletter_wording_result = conformity
-             newsletter_wording_feedback = feedback  
-             
-             criteria_results["Newsletter Wording"] = conformity
-             feedback_results["Newsletter Wording"] = feedback
-             
-            except Exception as e:
-             
-             newsletter_wording_result = False
-             newsletter_wording_feedback = f"<strong>Error during newsletter text check:</strong> {e}"
-    
-             feedback_results["Newsletter Wording"] = newsletter_wording_feedback
-    
-    
-            # More Details Check
-            try:
-             checkern4 = MoreDetails(url)
-             templates = get_templates()
-             newsletter_more_details_template = templates['newsletterdetail']
-    
-            # Execute the verification
-             conformity, similarity, feedback = await checkern4.check_newsletter_more_details(expected_text=newsletter_more_details_template)
-            
-             newsletter_details_result = conformity
-             newsletter_details_feedback = feedback  
-    
-             feedback_results["Newsletter More Details"] = feedback
-    
-            except Exception as e:
-             
-             newsletter_details_result = False
-             newsletter_details_feedback = f"<strong>Error during More Details check:</strong> {e}"
-    
-             feedback_results["Newsletter More Details"] = newsletter_details_feedback
-            
-            # Conform Design Check    
-            try:
-                async with async_playwright() as p:
-                    browser = await p.chromium.launch(headless=True)
-                    # Perform the "Conform Design" check using the `checker_conform_design` instance
-                    # This checks if the cookie banner follows a predefined layout and styling rules
-                    conform_design_result, conform_design_feedback = await checker_conform_design.check_all_conformity(browser, url)
-                # Ensure the browser is properly closed after the check is completed
-                await browser.close()
-            except Exception as e:
-                print(f"Error during checks: {e}")
-                # Store the failure in the results dictionary
-                criteria_results["Conform Design"] = False  # Indicate that the check failed
-                # Provide error feedback to be included in the final report
-                feedback_results["Conform Design"] = f"Error: {e}"
-    
-    
-            # Populate criteria results
-            criteria_results = {
-                "Cookie Banner Visibility": banner_result,
-                "Continue Without Consent Link": ohne_einwilligung_result,
-                "Cookie Selection": selection_result,
-                "Cookie Banner Text Comparison": text_comparison_result,
-                "Cookie Banner Links to Imprint and Privacy Policy": imprint_privacy_result,
-                "Cookie Banner Scrollbar": cookie_banner_scrollbar_result,
-                "Conform Design":conform_design_result,
-                "Cookie Preference Accessibility": preference_center_vis_result,
-                "Cookie Preference Center Links to Imprint and Privacy Policy": preference_center_links_result,
-                "Cookie Prefence Center More Info": cookie_banner_more_info_result,
-                "Clear CTA": cta_result,
-                "Age Limitation": age_limitation_result,
-                "Newsletter Wording": newsletter_wording_result,
-                "Newsletter Functionality": all(newsletter_functionality_result.values()) if isinstance(newsletter_functionality_result, dict) else False,
-                "Newsletter More Details" : newsletter_details_result,
-                "Imprint URL": imprint_url or "Not found",       
-                "Imprint Visibility": imprint_visibility_result,
-                "Footer Links": not bool(footer_failed_links),
-                "Footer Imprint": footer_results.get("imprint", False),
-                "Footer privacy policy": footer_results.get("privacy policy", False),
-                "Footer cookie settings": footer_results.get("cookie", False)
-
-            }
-            
-    
-            # Add detailed imprint terms check
-            for term, found in term_results.items():
-                criteria_results[f"Imprint Term: {term}"] = found
-    
-            # Populate feedback results
-            feedback_results = {
-                "Cookie Banner Visibility": banner_feedback,
-                "Continue Without Consent Link": ohne_feedback,
-                "Cookie Selection": selection_feedback,
-                "Cookie Banner Text Comparison": text_comparison_feedback,
-                "Cookie Banner Links to Imprint and Privacy Policy": imprint_privacy_feedback,
-                "Cookie Banner Scrollbar": cookie_banner_scrollbar_feedback,
-                "Conform Design":conform_design_feedback,
-                "Cookie Preference Accessibility": preference_center_vis_feedback,
-                "Cookie Preference Center Links to Imprint and Privacy Policy": preference_center_links_feedback,
-                "Cookie Prefence Center More Info": cookie_banner_more_info_feedback,
-                "Clear CTA": cta_feedback,
-                "Age Limitation": age_limitation_feedback,
-                "Newsletter Wording": newsletter_wording_feedback,
-                "Newsletter Functionality": newsletter_functionality_feedback,
-                "Newsletter More Details": newsletter_details_feedback,
-                "Imprint Check": imprint_feedback,         
-                "Imprint Visibility" : imprint_visibility_feedback,
-                "Footer Links": f"The following footer links do not work: {', '.join(footer_failed_links)}" 
-                        if footer_failed_links else "All footer links work properly.",
-                "Footer Imprint": "Imprint-Link found." if footer_results.get("imprint") else "Imprint link missing!",
-                "Footer privacy policy": "Privacy policy link found." if footer_results.get("privacy policy") else "privacy policy link is missing!",
-                "Footer cookie settings": "Cookie settings link found." if footer_results.get("cookie") else "Cookie settings link missing!"
-
-            }
-    
-            # Add feedback for imprint terms
-            for term, found in term_results.items():
-              feedback_results[f"Imprint Term: {term}"] = (
-              f"Term '{term}' was found." if found else f"Term '{term}' was not found."
-            )
-    
-            # Debug: Output of criteria and feedback results
-            print(f"Criteria Results: {criteria_results}")
-            print(f"Feedback Results: {feedback_results}")
-
-    except Exception as e:
-        # Handle errors gracefully and populate default feedback
-        print(f"Error during compliance check: {e}")
-        criteria_results = {key: False for key in CRITERIA}
-        feedback_results = {key: f"Error: {e}" for key in CRITERIA}
+def store_scan_result(job, duration):
+    """
+    Generates the PDF report of a finished scan job and saves it to the database.
+    Runs in a worker thread of the job manager.
 
+    Returns:
+    - int: Row id of the stored report.
+    """
     # Determine conformity based on all criteria results
-    conformity = "Yes" if all(criteria_results.values()) else "No"
-
-    # Capture end time and calculate duration
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
+    job.conformity = "Yes" if all(job.criteria_results.values()) else "No"
 
     # Generate PDF
     date_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     pdf_content = generate_pdf(
-        url,
-        conformity,
-        criteria_results,
-        feedback_results,
+        job.url,
+        job.conformity,
+        job.criteria_results,
+        job.feedback_results,
         date_time,
-        duration
+        duration,
+        job.templates
     )
 
     # Save to database
-    await asyncio.to_thread(save_result, url, conformity, pdf_content)  # Save to database in a thread
+    return save_result(job.url, job.conformity, pdf_content, job.id)
+
+# Seconds the result of a check is reused for a rescan of the same website (0 disables the cache)
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 6 * 60 * 60))
+
+# Runs the registered checks as a dependency graph, browser and HTTP heavy checks are limited separately.
+# A scan is stopped after 5 minutes, checks that are still running are reported as timed out.
+# Results are cached per website, template and check version, a rescan only runs the checks whose key changed.
+scheduler = CheckScheduler(registry, resource_limits={"browser": 6, "http": 4}, deadline=300,
+                           cache=ResultCache('compliance.db', ttl=RESULT_CACHE_TTL))
 
-    return redirect(url_for('results'))
+async def run_compliance_checks(url, templates, on_result=None, only=None, force=False):
+    """
+    Runs all compliance checks for the given URL on the browser pool loop.
+
+    Parameters:
+    - on_result (callable): Optional callback on_result(criterion, result, feedback) for every finished criterion.
+    - only (list): Optional names of the checks to run (default: all).
+    - force (bool): Ignore cached results and run every check.
 
-def save_result(url, conformity, pdf_content):
+    Returns:
+    - tuple: (criteria_results, feedback_results) dictionaries.
+    """
+    try:
+        criteria_results, feedback_results = await scheduler.run(url, templates, on_result=on_result, only=only, force=force)
+
+        # Debug: Output of criteria and feedback results
+        print(f"Criteria Results: {criteria_results}")
+        print(f"Feedback Results: {feedback_results}")
+
+    except Exception as e:
+        # Handle errors gracefully and populate default feedback
+        print(f"Error during compliance check: {e}")
+        criteria_results = {key: False for key in registry.criteria(templates, only)}
+        feedback_results = {key: f"Error: {e}" for key in registry.criteria(templates, only)}
+
+    return criteria_results, feedback_results
+
+# Recording the network traffic of every scan (HAR archive), so it can be re-scored with changed templates
+# offline. Off by default, recordings need disk space: RECORD_SCANS=1 enables it, the most recent
+# KEEP_RECORDINGS recordings of at most RECORDING_MAX_AGE_DAYS days are kept.
+RECORD_SCANS = os.environ.get('RECORD_SCANS', '0') == '1'
+KEEP_RECORDINGS = int(os.environ.get('KEEP_RECORDINGS', 200))
+RECORDING_MAX_AGE_DAYS = int(os.environ.get('RECORDING_MAX_AGE_DAYS', 14))
+
+# Scans run as background jobs, at most three at the same time and one per registrable domain.
+scan_jobs = ScanJobManager(run_compliance_checks, store_scan_result, workers=3, per_domain=1, record=RECORD_SCANS,
+                           keep_recordings=KEEP_RECORDINGS, recording_max_age=RECORDING_MAX_AGE_DAYS * 24 * 60 * 60)
+
+def save_result(url, conformity, pdf_content, job_id=None):
+    """
+    Saves a compliance report to the database and returns its row id (None on failure).
+    """
+    conn = sqlite3.connect('compliance.db')
     try:
-        conn = sqlite3.connect('compliance.db')
         cursor = conn.cursor()
 
         # Create the table if it doesn't exist
@@ -406,23 +204,27 @@ def save_result(url, conformity, pdf_content):
                 date DATETIME DEFAULT (datetime('now', 'localtime')),
                 url TEXT NOT NULL,
                 conformity TEXT NOT NULL,
-                conformity_details BLOB NOT NULL
+                conformity_details BLOB NOT NULL,
+                job_id TEXT
             )
         ''')
+        migrate_db(cursor)
         
         # Insert new results
         cursor.execute('''
-            INSERT INTO compliance (url, conformity, conformity_details)
-            VALUES (?, ?, ?)
-        ''', (url, conformity, pdf_content))
+            INSERT INTO compliance (url, conformity, conformity_details, job_id)
+            VALUES (?, ?, ?, ?)
+        ''', (url, conformity, pdf_content, job_id))
 
         conn.commit()  # Save changes
+        return cursor.lastrowid
     except sqlite3.Error as e:
         print(f"An error occurred while saving to database: {e}")
+        return None
     finally:
         conn.close()
 
-def generate_pdf(url, conformity, criteria_results, feedback_results, date_time, duration):
+def generate_pdf(url, conformity, criteria_results, feedback_results, date_time, duration, templates=None):
     """
     Generates a compliance report as a PDF document.
 
@@ -433,12 +235,13 @@ def generate_pdf(url, conformity, criteria_results, feedback_results, date_time,
     - feedback_results (dict): Dictionary storing detailed feedback for each criterion.
     - date_time (str): Timestamp when the report was generated.
     - duration (float): Time taken to generate the report.
+    - templates (dict): Templates the scan was run with.
 
     Returns:
     - bytes: PDF file content in memory (if successful), otherwise None.
     """
     html_content = ""  # Ensure variable initialization to avoid errors
-    templates = session.get('templates', {})
+    templates = templates or {}
     additional_imprint = templates.get('additional_imprint', [])
 
     # Construct the HTML structure for the PDF report
@@ -458,7 +261,7 @@ def generate_pdf(url, conformity, criteria_results, feedback_results, date_time,
     '''
     # Check if Imprint URL is part of the results and add it separately
     if "Imprint URL" in criteria_results:
-        imprint_feedback = feedback_results.get("Imprint Check", "No feedback available.")
+        imprint_feedback = feedback_results.get("Imprint URL", "No feedback available.")
         
         # If no additional terms were defined for the Imprint check, notify the user
         if not additional_imprint:
@@ -495,6 +298,7 @@ def generate_pdf(url, conformity, criteria_results, feedback_results, date_time,
 
     # Generate the PDF from the HTML content
     pdf_buffer = io.BytesIO()
+    from xhtml2pdf import pisa  # Takes more than a second to import, loaded on first use (or by the warm-up)
     pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
     
     # Check if PDF generation was successful
@@ -533,6 +337,81 @@ def results():
 
     return render_template('results.html', result=result)
 
+@app.route('/results/<job_id>')
+def job_results(job_id):
+    """
+    Renders the results page of the compliance check that was run as the given job.
+    """
+    rows = execute_query('SELECT id, date, url, conformity FROM compliance WHERE job_id = ?', (job_id,))
+    if not rows:
+        job = scan_jobs.get(job_id)
+        if job is not None and not job.done:
+            return redirect(url_for('job_progress', job_id=job_id))  # Still running
+        return "No result found for this job.", 404
+
+    row = rows[0]
+    result = {
+        'id': row[0],
+        'date': row[1],
+        'url': row[2],
+        'conformity': row[3],
+        'job_id': job_id,
+        'recorded': ScanArchive(job_id).exists(),
+    }
+    return render_template('results.html', result=result)
+
+@app.route('/results/<job_id>/rescore', methods=['POST'])
+def rescore(job_id):
+    """
+    Re-evaluates a recorded scan with the current templates. All checks run against the HAR archive
+    of the scan (the result cache describes the live website, not the recording), so no website is
+    contacted. Checks with their own HTTP requests (footer) are skipped.
+    """
+    rows = execute_query('SELECT url FROM compliance WHERE job_id = ?', (job_id,))
+    if not rows:
+        return "No result found for this job.", 404
+    only = request.form.getlist('check') or [
+        name for name, check in registry.checks.items() if check.resource != "http"
+    ]
+    try:
+        job = scan_jobs.submit_replay(job_id, rows[0][0], get_templates(), only=only)
+    except FileNotFoundError:
+        return "This scan was not recorded and can not be re-scored.", 404
+    return redirect(url_for('job_progress', job_id=job.id))
+
+@app.route('/jobs/<job_id>')
+def job_progress(job_id):
+    """Shows the progress of a scan job, the results of the criteria appear as soon as they are available."""
+    job = scan_jobs.get(job_id)
+    if job is None:
+        # Jobs are only kept in memory, finished ones can still be found in the database
+        return redirect(url_for('job_results', job_id=job_id))
+    return render_template('progress.html', job=job, criteria=registry.criteria(job.templates, job.only))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Streams the progress of a scan job as Server-Sent Events.
+    A reconnecting browser sends the id of the last received event and continues from there.
+    """
+    job = scan_jobs.get(job_id)
+    if job is None:
+        return "Unknown job.", 404
+    position = request.headers.get('Last-Event-ID', 0, type=int)
+
+    def stream(position):
+        while True:
+            events, finished = job.wait_for_events(position)
+            if not events and not finished:
+                yield ": keep-alive\n\n"  # Comment line, keeps proxies from closing the connection
+            for event, data in events:
+                position += 1
+                yield f"id: {position}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+            if finished:
+                return
+
+    return Response(stream(position), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/download/<int:id>')
 def download(id):
     """
@@ -592,6 +471,53 @@ def reset_templates():
 
 
 
+def parse_url_list(text):
+    """
+    Extracts the URLs of a list with one URL per line (or a CSV file with the URL in the first column).
+    Empty lines, comments, headers and duplicates are skipped, URLs without scheme get https://.
+    """
+    urls = []
+    for line in text.splitlines():
+        candidate = line.split(',')[0].split(';')[0].strip().strip('"')
+        if not candidate or candidate.startswith('#') or candidate.lower() == 'url':
+            continue
+        if '://' not in candidate:
+            candidate = 'https://' + candidate
+        if candidate not in urls:
+            urls.append(candidate)
+    return urls
+
+@app.route('/batch', methods=['GET', 'POST'])
+def batch():
+    """
+    Batch mode: scans a list of URLs (uploaded file or text field) or rescans all customers of the database.
+    """
+    if request.method == 'POST':
+        if request.form.get('rescan_all'):
+            # Every customer that was checked before
+            urls = [row[0] for row in execute_query("SELECT DISTINCT url FROM compliance")]
+        else:
+            text = request.form.get('urls', '')
+            uploaded = request.files.get('url_file')
+            if uploaded and uploaded.filename:
+                text += '\n' + uploaded.read().decode('utf-8-sig', errors='replace')
+            urls = parse_url_list(text)
+
+        if not urls:
+            return render_template('batch.html', error="No URLs found.")
+
+        scan_batch = scan_jobs.submit_batch(urls, get_templates(), force=bool(request.form.get('force_rescan')))
+        return redirect(url_for('batch_status', batch_id=scan_batch.id))
+    return render_template('batch.html')
+
+@app.route('/batch/<batch_id>')
+def batch_status(batch_id):
+    """Shows the progress of a batch and its aggregated throughput."""
+    scan_batch = scan_jobs.get_batch(batch_id)
+    if scan_batch is None:
+        return "Unknown batch.", 404
+    return render_template('batch_status.html', batch=scan_batch, stats=scan_batch.throughput())
+
 @app.route('/database', methods=['GET'])
 def database():
     page = request.args.get('page', 1, type=int)  # Query the current page
@@ -645,4 +571,9 @@ def database():
 
 
 if __name__ == '__main__':
+    # Warm the shared browsers, the checker modules and the dictionaries in the background while
+    # the server already accepts requests. With the debug reloader only the child process
+    # that actually serves requests needs them.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warm_up()
     app.run(debug=True)
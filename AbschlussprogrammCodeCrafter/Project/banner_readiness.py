@@ -0,0 +1,135 @@
+from banner_selectors import BANNER_SELECTORS
+from cmp_detection import CMP_STRATEGIES
+
+# Parts of selectors that only match consent banners. Generic entries of the catalogue
+# (div.sticky, [role="dialog"], div[style*="fixed"]) also match sticky headers or other dialogs,
+# which would count as "settled" before a late injected banner exists.
+_CONSENT_MARKERS = ("cookie", "consent", "cmp", "ccm", "onetrust", "usercentrics", "uc-", "borlabs", "gdpr", "cc-banner")
+
+
+def is_consent_selector(selector):
+    """True if a selector can only match a consent banner (and not e.g. a sticky header)."""
+    return any(marker in selector.lower() for marker in _CONSENT_MARKERS)
+
+
+# Roots of the CMPs first (their banners are reliable), then the consent specific part of the catalogue.
+# XPath and ":has-text()" selectors are left out, document.querySelector can not evaluate them.
+READINESS_SELECTORS = [
+    selector
+    for strategy in CMP_STRATEGIES.values() for selector in strategy.selectors("banner")
+] + ['#usercentrics-root', '#usercentrics-cmp-ui'] + [
+    selector for selector in BANNER_SELECTORS
+    if not selector.startswith('//') and ':has-text(' not in selector and is_consent_selector(selector)
+]
+
+# Resolves as soon as the target element (the first selector that matches) was neither
+# mutated nor moved or resized for `quiet` ms. Without a target the page counts as settled
+# once no nodes were added or removed for `idle` ms, or for `quiet` ms after a CMP reported
+# that it is ready (it may have decided not to show a banner). `timeout` is the hard cap.
+_WAIT_UNTIL_SETTLED = """
+([selectors, quiet, idle, timeout]) => new Promise(resolve => {
+    const start = performance.now();
+    let lastChange = start;
+    let target = null;
+    let lastRect = '';
+    let cmpReady = false;
+
+    const markReady = () => { cmpReady = true; };
+    const readyEvents = ['CookiebotOnDialogDisplay', 'CybotCookiebotDialogDisplay', 'CookiebotOnLoad',
+                         'UC_UI_INITIALIZED', 'UC_UI_VIEW_CHANGED', 'OneTrustGroupsUpdated'];
+    readyEvents.forEach(name => window.addEventListener(name, markReady));
+    const cmpIsReady = () => cmpReady
+        || !!(window.OneTrust && typeof window.OneTrust.IsAlertBoxClosed === 'function')
+        || !!(window.Cookiebot && window.Cookiebot.dialog)
+        || !!(window.UC_UI && typeof window.UC_UI.isInitialized === 'function' && window.UC_UI.isInitialized());
+
+    const findTarget = () => {
+        // CMPs attach their shadow hosts to <body>, so only those shadow roots are searched
+        const roots = [document];
+        for (const child of (document.body ? document.body.children : [])) {
+            if (child.shadowRoot) {
+                roots.push(child.shadowRoot);
+            }
+        }
+        for (const selector of selectors) {
+            for (const root of roots) {
+                try {
+                    const element = root.querySelector(selector);
+                    if (element) {
+                        return element;
+                    }
+                } catch (e) {
+                    break;  // Invalid selector
+                }
+            }
+        }
+        return null;
+    };
+
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+
+    const finish = reason => {
+        observer.disconnect();
+        clearInterval(poll);
+        readyEvents.forEach(name => window.removeEventListener(name, markReady));
+        resolve({reason: reason, elapsed: Math.round(performance.now() - start), cmpReady: cmpIsReady()});
+    };
+
+    const poll = setInterval(() => {
+        const now = performance.now();
+        if (now - start >= timeout) {
+            return finish('timeout');
+        }
+        if (!target || !target.isConnected) {
+            const found = findTarget();
+            if (found) {
+                target = found;
+                lastChange = now;
+                observer.disconnect();
+                observer.observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+            }
+        }
+        if (target) {
+            // CSS transitions (fade or slide in) do not mutate the DOM, so the box is compared as well
+            const rect = target.getBoundingClientRect();
+            const key = [rect.x, rect.y, rect.width, rect.height].join(',');
+            if (key !== lastRect) {
+                lastRect = key;
+                lastChange = now;
+            }
+            if (now - lastChange >= quiet) {
+                finish('settled');
+            }
+        } else if (document.readyState === 'complete' && now - lastChange >= (cmpIsReady() ? quiet : idle)) {
+            finish('no target');
+        }
+    }, 100);
+})
+"""
+
+
+async def wait_until_settled(page_or_frame, selectors=None, quiet=500, idle=1500, timeout=10000):
+    """
+    Waits until the cookie banner (or another element that appears after a click, such as the
+    preference center) is stable, instead of waiting for network idle or a fixed time.
+
+    :param page_or_frame: Playwright page or frame
+    :param selectors: Selectors of the element to wait for, the first one that matches is observed (default: READINESS_SELECTORS)
+    :param quiet: Milliseconds the element has to stay unchanged
+    :param idle: Milliseconds without new nodes after which a page without the element counts as settled
+    :param timeout: Hard cap in milliseconds
+    :return: Dictionary with "reason" ("settled", "no target" or "timeout") and "elapsed" ms, None if the page could not be evaluated
+    """
+    selectors = [
+        selector for selector in (selectors or READINESS_SELECTORS)
+        if not selector.startswith('//') and ':has-text(' not in selector
+    ]
+    try:
+        result = await page_or_frame.evaluate(_WAIT_UNTIL_SETTLED, [selectors, quiet, idle, timeout])
+    except Exception as e:
+        # E.g. a navigation destroyed the execution context, the caller continues as before
+        print(f"Readiness check failed: {e}")
+        return None
+    print(f"Page settled after {result['elapsed']} ms ({result['reason']}).")
+    return result
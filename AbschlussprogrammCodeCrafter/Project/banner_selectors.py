@@ -0,0 +1,235 @@
+import asyncio
+
+# Version of the selector catalogue, increase it whenever selectors are added, removed or reordered
+CATALOGUE_VERSION = 2
+
+# Selectors used to detect cookie banners across various websites.
+# Specific selectors come first, the generic ones (role, class and style fragments) last.
+BANNER_SELECTORS = [
+    'div.sticky',  # The main sticky container of the cookie banner
+    'div.hp__sc-yx4ahb-7',  # Urlaubspiraten main container
+    'p.hp__sc-iv4use-0',  # Urlaubspiraten specific paragraph
+    '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
+    'p.hp__sc-hk8z4-0',  # Paragraphs containing cookie consent text
+    'button.hp__sc-9mw778-1',  # Buttons for actions
+    '#cookieboxBackgroundModal > div',  # Spezifischer Selector für den Cookie-Banner von santander
+    '[data-testid="uc-default-banner"]',  # Usercentrics (Zalando, hochland, coa)
+    '#uc-main-dialog',  # Usercentrics (Dr. Oetker)
+    'div.cmp-container',  # verivox
+    'div.ccm-modal-inner',
+    'div.ccm-modal--header',
+    'div.ccm-modal--body',
+    'div.ccm-widget--buttons',
+    'button.ccm--decline-cookies',
+    'button.ccm--save-settings',
+    'button[data-ccm-modal="ccm-control-panel"]',
+    'div.ccm-powered-by',
+    'div.ccm-link-container',
+    'div.ccm-modal',
+    'div[class*="ccm-settings-summoner"]',
+    'div[class*="ccm-control-panel"]',
+    'div[class*="ccm-modal--footer"]',
+    'button.ccm--button-primary',
+    '#onetrust-consent-sdk',
+    '#onetrust-banner-sdk > div > div.ot-sdk-container > div',  # kao
+    '#onetrust-banner-sdk',  # original wagner
+    '#cookiescript_injected',  # radbag
+    '#cookiescript_injected > div.cookiescript_pre_header',  # radbag
+    '#cmpboxcontent',  # Beiersdorf, tesa, Huber Burda Media
+    '#CybotCookiebotDialog',  # Franken Brunnen, brandt-zwieback, weber, tetesept, ivoclar vivadent, Landesanstalt für Medien nrw
+    '#page-id-46 > div.l-module.p-privacy-settings.t-ui-light.is-visible > div > div > div',  # Griesson
+    '#popin_tc_privacy',  # danone
+    'body > div.cookie-layer-advanced.state-visible',  # Hansgrohe
+    '#uc-center-container',  # blanco
+    '#cookie-law-info-bar',  # Vendis capital
+    '#ccm-widget > div',  # Merz, ding
+    'div.brlbs-cmpnt-container',  # Ehiner-Energie
+    'body > div > div > div.om-cookie-panel.active',  # CAU
+    'div[data-testid="uc-default-wall"]',
+    'div[role="dialog"]',  # Schwarzkopf, hochland, Hassia Gruppe
+    'div.cc-banner',
+    'section.consentDrawer',  # BMW Group
+    'div[class*="cookie"]',  # hansgrohe
+    'div[class*="consent"]',
+    'div[id*="banner"]',
+    'div[class*="cookie-banner"]',
+    '//*[@id="page-id-46"]/div[3]/div/div/div',  # Griesson
+    'div[class*="cookie-notice"]',
+    '[role="dialog"]',  # tesa
+    '[aria-label*="cookie"]',
+    '[data-cookie-banner]',
+    'div[style*="bottom"]',  # weleda, BMW Group
+    'div[style*="fixed"]',
+    'div[data-borlabs-cookie-consent-required]',  # Selector for Borlabs Cookie
+    'div#BorlabsCookieBox',  # Specific ID for Borlabs Cookie Box
+    'div#BorlabsCookieWidget',  # Specific ID for Borlabs Cookie Widget
+    '#BorlabsCookieEntranceA11YDescription',
+    'div.elementText',  # Selector for the custom cookie banner text container
+    'h3:has-text("Datenschutzhinweis")',  # Check for the header text
+]
+
+# Scrollable parts of cookie banners, for checks that look at the scroll container and not the whole banner
+SCROLL_CONTAINER_SELECTORS = [
+    'div.ot-cat-lst',  # Scrollable list inside the OneTrust banner (Loreal)
+    'div.ot-scrollbar',  # Scrollable areas in OneTrust
+    '#onetrust-banner-sdk > div > div.ot-sdk-container.ot-scrollbar',
+    '#privacydialog\\:desc',  # Hassia scrollbar
+]
+
+# Buttons and links of banners, for banners that only show up as buttons (used to wait for a banner,
+# they are never a banner candidate themselves)
+BANNER_BUTTON_SELECTORS = [
+    "button:has-text('Ohne Einwilligung')",
+    "a:has-text('Ohne Einwilligung')",
+    "div[class*='cookie'] button",
+    "div[class*='consent'] button",
+    "div[class*='cookie-banner'] button",
+    "div[class*='cookie'] a",
+    "div[class*='cookie-banner'] a",
+    "button#onetrust-reject-all-handler",
+    "button[data-cookiebanner='reject']",
+    "div[style*='position: absolute'][style*='right'] button:has-text('Ohne Einwilligung')",
+    "div[style*='position: absolute'][style*='right'] a:has-text('Ohne Einwilligung')",
+]
+
+# Words of which at least one has to appear in the text of a cookie banner
+BANNER_KEYWORDS = ["cookie", "consent", "gdpr", "privacy", "tracking", "preferences"]
+
+# Collects all visible elements matching the selectors in one call.
+# Supports CSS, XPath ("//...") and Playwright's ":has-text()" and searches open shadow roots
+# like Playwright selectors do. `index` is the position within the matches of the selector.
+_COLLECT_CANDIDATES = """
+([selectors, maxText]) => {
+    const roots = [document];
+    for (let i = 0; i < roots.length; i++) {
+        for (const element of roots[i].querySelectorAll('*')) {
+            if (element.shadowRoot) {
+                roots.push(element.shadowRoot);
+            }
+        }
+    }
+    const hasText = /^(.*):has-text\\((["'])(.*)\\2\\)$/;
+    const query = selector => {
+        if (selector.startsWith('//')) {
+            const result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            return Array.from({length: result.snapshotLength}, (_, i) => result.snapshotItem(i));
+        }
+        const match = selector.match(hasText);
+        let elements = [];
+        for (const root of roots) {
+            elements.push(...root.querySelectorAll(match ? (match[1] || '*') : selector));
+        }
+        if (match) {
+            const text = match[3].toLowerCase();
+            elements = elements.filter(element => (element.innerText || element.textContent || '').toLowerCase().includes(text));
+        }
+        return elements;
+    };
+    const candidates = [];
+    for (const selector of selectors) {
+        let elements;
+        try {
+            elements = query(selector);
+        } catch (e) {
+            continue;  // Invalid selector
+        }
+        elements.forEach((element, index) => {
+            const rect = element.getBoundingClientRect();
+            const style = window.getComputedStyle(element);
+            if (rect.width === 0 || rect.height === 0 || style.visibility === 'hidden') {
+                return;
+            }
+            // Banners are usually fixed or sticky themselves or inside a fixed container
+            let fixed = false;
+            for (let node = element; node && node.nodeType === 1; node = node.parentElement) {
+                const position = window.getComputedStyle(node).position;
+                if (position === 'fixed' || position === 'sticky') {
+                    fixed = true;
+                    break;
+                }
+            }
+            candidates.push({
+                selector: selector,
+                index: index,
+                text: (element.textContent || '').trim().slice(0, maxText),
+                box: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+                zIndex: parseInt(style.zIndex, 10) || 0,
+                fixed: fixed,
+            });
+        });
+    }
+    return candidates;
+}
+"""
+
+
+def selector_list(selectors):
+    """Joins selectors to one selector list for wait_for_selector (XPath selectors can not be joined)."""
+    return ', '.join(selector for selector in selectors if not selector.startswith('//'))
+
+
+async def collect_banner_candidates(page_or_frame, selectors=None, frames=True, max_text=10000):
+    """
+    Returns every visible element matching the selector catalogue with its box, text, z-index and
+    fixed/sticky status. The page and all of its iframes are evaluated in parallel, one call each.
+
+    :param page_or_frame: Playwright page or frame
+    :param selectors: Selectors to evaluate (default: BANNER_SELECTORS)
+    :param frames: Evaluate the iframes of a page as well
+    :param max_text: Maximum length of the returned text of a candidate
+    :return: List of candidate dictionaries, main document first, in catalogue order
+    """
+    selectors = list(selectors or BANNER_SELECTORS)
+    if hasattr(page_or_frame, "main_frame"):
+        targets = page_or_frame.frames if frames else [page_or_frame.main_frame]
+    else:
+        targets = [page_or_frame]
+
+    results = await asyncio.gather(
+        *(target.evaluate(_COLLECT_CANDIDATES, [selectors, max_text]) for target in targets),
+        return_exceptions=True,
+    )
+    candidates = []
+    for target, result in zip(targets, results):
+        if isinstance(result, Exception):
+            print(f"Could not evaluate the banner selectors in frame {target.url}: {result}")
+            continue
+        for candidate in result:
+            candidate["frame"] = target
+            candidates.append(candidate)
+    print(f"{len(candidates)} visible banner candidates in {len(targets)} frame(s) (selector catalogue v{CATALOGUE_VERSION}).")
+    return candidates
+
+
+def large_candidates(candidates, min_width=300, min_height=50):
+    """Returns the candidates that are big enough to be a cookie banner."""
+    return [
+        candidate for candidate in candidates
+        if candidate["box"]["width"] > min_width and candidate["box"]["height"] > min_height
+    ]
+
+
+def find_cookie_banner(candidates, keywords=None):
+    """
+    Returns the first large candidate whose text contains a cookie keyword (None if there is none).
+    """
+    keywords = keywords or BANNER_KEYWORDS
+    found_banners = large_candidates(candidates)
+
+    # Debugging output for detected banners
+    for banner in found_banners:
+        print(f"Found banner with selector: '{banner['selector']}' (z-index {banner['zIndex']}, fixed: {banner['fixed']})")
+        print(f"Element bounding box: {banner['box']}")
+
+    for banner in found_banners:
+        if any(keyword in banner["text"].lower() for keyword in keywords):
+            return banner
+    return None
+
+
+async def candidate_element(candidate):
+    """Returns the element handle of a candidate (None if the element is gone)."""
+    elements = await candidate["frame"].query_selector_all(candidate["selector"])
+    if candidate["index"] < len(elements):
+        return elements[candidate["index"]]
+    return None
@@ -0,0 +1,234 @@
+import asyncio
+import atexit
+import threading
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from har_archive import new_context
+
+
+class _PooledBrowser:
+    """
+    Bookkeeping for one warm Chromium process inside the BrowserPool.
+    Tracks how often the browser was lent out and whether it is still healthy.
+    """
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0  # Number of leases handed out over the lifetime of this browser
+        self.active = 0  # Number of leases currently in use
+        self.retiring = False  # Set once the browser reached max_uses
+        self.crashed = False  # Set when Chromium disconnects unexpectedly
+        browser.on("disconnected", self._on_disconnected)
+
+    def _on_disconnected(self, *_):
+        self.crashed = True
+
+    @property
+    def available(self):
+        """A browser can take new leases as long as it is neither retiring nor crashed."""
+        return not self.retiring and not self.crashed and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm headless Chromium browsers shared by all compliance checkers.
+
+    Instead of starting their own Playwright driver and Chromium process, checkers lease an
+    isolated browser context (or a whole browser for checkers that manage several contexts)
+    from the pool. A browser is recycled after `max_uses` leases or as soon as it crashes.
+
+    Playwright objects are bound to the event loop they were created on. Flask runs every
+    async view on a fresh event loop, so the pool owns a background event loop thread and all
+    browser work has to be executed there via `run()` / `submit()`.
+    """
+    def __init__(self, size=2, max_uses=25, max_contexts_per_browser=6, launch_options=None):
+        """
+        :param size: Number of warm browsers kept ready
+        :param max_uses: Number of leases after which a browser is replaced by a fresh one
+        :param max_contexts_per_browser: Upper bound for concurrently open contexts per browser (limits peak RAM)
+        :param launch_options: Keyword arguments passed to chromium.launch()
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.launch_options = launch_options or {"headless": True}
+        self._playwright = None
+        self._browsers = []
+        self._loop = None
+        self._thread = None
+        self._lock = None  # asyncio.Lock, created on the pool loop
+        self._slots = None  # asyncio.Semaphore limiting the number of open contexts
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the pool on its own event loop thread and launches the warm browsers.
+        Calling start() more than once has no effect.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        try:
+            asyncio.run_coroutine_threadsafe(self._warm_up(), self._loop).result()
+            print(f"Browser pool started with {self.size} warm browsers.")
+        except Exception as e:
+            # The loop keeps running, browsers are launched again on demand by the checks
+            print(f"Browser pool started, but the browsers could not be warmed up: {e}")
+
+    def submit(self, coro):
+        """
+        Schedules a coroutine on the pool loop and returns a concurrent.futures.Future.
+        """
+        if self._thread is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def run(self, coro):
+        """
+        Runs a coroutine on the pool loop and awaits its result from any other event loop.
+        """
+        if self._thread is not None and asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    async def _ensure_started(self):
+        """
+        Makes sure browsers are available on the current loop.
+        Standalone scripts (e.g. the main() functions of the checkers) start the pool lazily
+        on their own loop, the web app uses the background loop started by start().
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and loop is not self._loop:
+            raise RuntimeError("BrowserPool is bound to another event loop, use browser_pool.run() to execute checks.")
+        if self._playwright is None:
+            await self._warm_up()
+
+    async def _warm_up(self):
+        """
+        Starts Playwright if necessary and tops the pool up to `size` healthy browsers.
+        """
+        if self._playwright is None:
+            self._loop = asyncio.get_running_loop()
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size * self.max_contexts_per_browser)
+            self._playwright = await async_playwright().start()
+        async with self._lock:
+            while len([pooled for pooled in self._browsers if pooled.available]) < self.size:
+                self._browsers.append(await self._launch())
+
+    async def _launch(self):
+        """Launches a new Chromium process."""
+        browser = await self._playwright.chromium.launch(**self.launch_options)
+        return _PooledBrowser(browser)
+
+    async def _acquire(self):
+        """
+        Leases the least busy healthy browser. A replacement is launched on demand
+        when every browser is currently retiring or crashed.
+        """
+        await self._ensure_started()
+        await self._slots.acquire()
+        try:
+            async with self._lock:
+                candidates = [pooled for pooled in self._browsers if pooled.available]
+                if not candidates:
+                    pooled = await self._launch()
+                    self._browsers.append(pooled)
+                    candidates = [pooled]
+                pooled = min(candidates, key=lambda candidate: candidate.active)
+                pooled.active += 1
+                pooled.uses += 1
+                if pooled.uses >= self.max_uses:
+                    pooled.retiring = True  # Finish the running leases, then replace the browser
+                return pooled
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def _release(self, pooled):
+        """
+        Returns a lease. Retiring or crashed browsers are closed once their last lease is returned
+        and the pool is topped up again.
+        """
+        pooled.active -= 1
+        self._slots.release()
+        if (pooled.retiring or pooled.crashed) and pooled.active == 0:
+            async with self._lock:
+                if pooled in self._browsers:
+                    self._browsers.remove(pooled)
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass  # A crashed browser can not be closed cleanly
+            await self._warm_up()
+
+    @asynccontextmanager
+    async def browser(self):
+        """
+        Lends a whole browser, for checkers that open several contexts themselves
+        (e.g. ConformDesignChecker emulating different devices).
+        The checker must close the contexts it creates, but never the browser.
+        """
+        pooled = await self._acquire()
+        try:
+            yield pooled.browser
+        finally:
+            await self._release(pooled)
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """
+        Lends an isolated browser context (own cookies, storage and cache) on a warm browser.
+        The context is closed automatically when the block is left.
+        """
+        pooled = await self._acquire()
+        try:
+            # Records into (or replays from) the HAR archive of the scan, if there is one
+            context = await new_context(pooled.browser, **context_options)
+        except Exception:
+            # The browser died between two leases, retire it and try a fresh one
+            pooled.crashed = True
+            await self._release(pooled)
+            pooled = await self._acquire()
+            try:
+                context = await new_context(pooled.browser, **context_options)
+            except Exception:
+                await self._release(pooled)
+                raise
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass  # Context is already gone if the browser crashed
+            await self._release(pooled)
+
+    async def close(self):
+        """Closes all browsers and stops Playwright."""
+        for pooled in self._browsers:
+            try:
+                await pooled.browser.close()
+            except Exception:
+                pass
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stop(self):
+        """Closes the pool and stops its background loop (registered with atexit)."""
+        if self._thread is None or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop).result(timeout=30)
+        except Exception as e:
+            print(f"Error while closing the browser pool: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+# Shared pool used by all checkers of this process
+browser_pool = BrowserPool()
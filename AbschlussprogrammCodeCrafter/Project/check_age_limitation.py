@@ -1,6 +1,9 @@
 import asyncio
 from urllib.parse import urljoin
-from playwright.async_api import async_playwright
+from page_session import landing_page
+from newsletter_locator import newsletter_page, FORM_SELECTORS
+from banner_readiness import wait_until_settled
+from navigation_policy import navigation_policy
 
 class AgeLimitation:
     def __init__(self, url):
@@ -30,204 +33,34 @@ class AgeLimitation:
             "Beschränkt auf Benutzer ab 18 Jahren", "Geburtsdatum", "Geburtstag",
         ]   
 
-    async def check_age_limitation(self):
-     """
-        Main method to check if the provided URL or any related pages contain age limitations.
-        Handles special cases for certain websites and searches for age verification phrases.
+    async def check_age_limitation(self, session=None, landing=None):
+        """
+        Main method to check if the newsletter page or the homepage contain age limitations.
+        The newsletter page (special cases for specific domains, relevant links) is resolved by the NewsletterLocator.
 
+        :param session: Optional PageSession of the newsletter page, resolved once per scan
+        :param landing: Optional PageSession of the already loaded homepage
         :return: A tuple with a boolean indicating whether age limitation was found and feedback message
         """
-     async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True) # Start a headless browser session
-        page = await browser.new_page()  # Open a new browser page
-
-        # Handle special cases for specific websites
-        # These are sites that may have a custom URL for their newsletter page
-        # Therefore, some customer newsletters can be found dynamically, while others are accessed through hardcoding.
         try:
-            
-            # Special handling for loreal-paris.de
-            if "https://www.loreal-paris.de" in self.url:
-                newsletter_url = "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url) # Navigate to the newsletter page
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
-                return result, feedback
-            
-            # Special handling for hansgrohe.de
-            if "https://www.hansgrohe.de" in self.url:
-                newsletter_url = "https://www.hansgrohe.de/#interest-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
-                return result, feedback
-            
-            # Special handling for climeworks.com
-            if "https://climeworks.com" in self.url:
-                newsletter_url = "https://info.climeworks.com/newsletter-subscription-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
-                return result, feedback
-            
-            # Special handling for tesa
-            if "https://www.tesa.com" in self.url:
-                newsletter_url = "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url) # Navigate to the newsletter page
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
-                return result, feedback
-            
-
-            # Special handling for royal canin
-            if "https://www.royalcanin.com/de" in self.url:
-                 newsletter_url = "https://www.royalcanin.com/de/about-us/newsletter"
-                 print(f"Special case detected, redirecting to: {newsletter_url}")
-                 await page.goto(newsletter_url) # Navigate to the newsletter page
-                 await page.wait_for_load_state('networkidle')
-    
-                 # Assuming there's a button to click that will take us to the actual form
-                 try:
-                    # Wait for and click the button that leads to the newsletter form
-                    newsletter_button = await page.query_selector('a:has-text("Zum Newsletter anmelden")')  # Update the selector to match the button
-                    if newsletter_button:
-                        await newsletter_button.click()
-                        await page.wait_for_load_state('networkidle') # Wait for page to load
-            
-                        # After the redirection, check for the Age Limitation again
-                        criteria_met, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                        await browser.close()
-                        return criteria_met, feedback
-                 except Exception as e:
-                    feedback = f"Error clicking the button for newsletter: {str(e)}"
-                    await browser.close()
-                    return False, feedback
-                 
-            if "https://www.schwarzkopf.de" in self.url:
-                print(f"Detected 'schwarzkopf.de', clicking 'ANMELDEN' for newsletter.")
-    
-                # Navigate to the homepage
-                await page.goto(self.url)
-                await page.wait_for_load_state('networkidle')
-
-                # Wait for the "ANMELDEN" button and ensure it is visible
-                sign_up_button = await page.query_selector('button.calltoaction__link.cta:has-text("ANMELDEN")')
-                if sign_up_button:
-                    print("Clicking 'ANMELDEN' button to trigger the modal.")
-                    await sign_up_button.click()
-
-                    # Wait for the modal container to become visible
-                    try:
-                        print("Waiting for modal to appear...")
-
-                        # Wait for the modal to appear (using the wrapper or a more general modal container)
-                        await page.wait_for_selector('div.calltoaction__wrapper.cta', state='visible', timeout=20000)
-
-                        # Optionally, add a small delay to allow any dynamic content to fully load
-                        await asyncio.sleep(2)
-
-                        # Now perform age verification on the modal page
-                        result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                        await browser.close()
-                        return result, feedback
-                    except Exception as e:
-                        print(f"Error or timeout waiting for modal: {str(e)}")
-                        result = False
-                        feedback = "Error: Modal did not appear or was not visible."
-            else:
-                print("Sign-up button not found.")
-
-            # Handle gardenca special case
-            if "https://www.gardena.com/de" in self.url:
-                newsletter_url = "https://www.gardena.com/de/c/gardena-newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url) # Navigate to the newsletter page
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
-                return result, feedback
-                        
-
-            # direct rendering for vileda because the homepage blocks the webcrawler
-            if "https://www.vileda.de" in self.url:
-                newsletter_url = "https://www.vileda.de/newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url) # Navigate to the newsletter page
-                await page.wait_for_load_state('networkidle') # Wait for page to load
-
-                
-                result, feedback = await self.perform_age_limitation_check(page) # Check for age restriction
-                await browser.close()
+            # Check the newsletter page for age restrictions
+            async with newsletter_page(self.url, session) as page:
+                result, feedback = await self.perform_age_limitation_check(page)
+            if result:
                 return result, feedback
 
-            # General case: Load the given URL and check for Age Limitations
-            await page.goto(self.url, timeout=90000)
-            await page.wait_for_load_state('networkidle') # Wait for page to load
-            await asyncio.sleep(3)
-            current_url =page.url
-            if current_url != self.url:
-               print(f"Redirected to: {current_url}")
-               self.url = current_url
-
-            # Check the main page for age restrictions
-            result, feedback = await self.perform_age_limitation_check(page)
+            # Age gates are often shown on the homepage itself
+            async with landing_page(self.url, landing) as page:
+                result, feedback = await self.perform_age_limitation_check(page)
             if result:
-                await browser.close()
                 return result, feedback
 
-            # Search for relevant links like Newsroom or Newsletter
-            await page.wait_for_selector('a', timeout=15000)
-            links = await page.query_selector_all('a')
-            for link in links:
-                href = await link.get_attribute('href')
-                if href:
-                    full_url = urljoin(self.url, href)
-
-                    # Ignore legal, privacy, and terms links
-                    ignore_keywords = ["impressum", "datenschutz", "agb", "privacy", "legal"]
-                    if any(ignored in full_url.lower() for ignored in ignore_keywords):
-                         print(f" Ignoring irrelevant link: {full_url}")
-                         continue  # Skip irrelevant links
-                    
-                    if any(keyword in full_url.lower() for keyword in ["newsletter", "subscribe", "email", "signup", "newsletter-registrierung"]):
-                        print(f"Found a relevant link: {full_url}")
-                        await page.goto(full_url)
-                        await page.wait_for_load_state('networkidle')
-
-                         # Check the linked page for age restrictions
-                        result, feedback = await self.perform_age_limitation_check(page)
-                        if result:
-                            await browser.close()
-                            return result, feedback
-
             # Standard feedback if nothing is found
-            feedback = "No Age Limitation or relevant Newsletter link found."
-            result = False
+            return False, "No Age Limitation or relevant Newsletter link found."
 
         except Exception as e:
-            result = False
-            feedback = f"Error: No Age Limitation or relevant Newsletter link found."
-
-        await browser.close() # Ensure browser is closed after the check
-        return result, feedback # Return the result and feedback
+            print(f"Error during age limitation check: {e}")
+            return False, "Error: No Age Limitation or relevant Newsletter link found."
 
 
     async def perform_age_limitation_check(self, page):
@@ -276,8 +109,8 @@ class AgeLimitation:
                     if href:
                         sign_up_url = urljoin(page.url, href)
                         print(f"Found Sign-Up link: {sign_up_url}")
-                        await page.goto(sign_up_url)
-                        await page.wait_for_load_state('networkidle')
+                        await navigation_policy.goto(page, sign_up_url)
+                        await wait_until_settled(page, FORM_SELECTORS)
                         # Perform Age Limitation check on the redirected page
                         return await self.perform_age_limitation_check(page)
             except Exception:
@@ -1,6 +1,5 @@
 import asyncio
-from urllib.parse import urljoin
-from playwright.async_api import async_playwright
+from newsletter_locator import newsletter_page
 
 class ClearCTA:
     def __init__(self, url, newsletter_phrases=None):
@@ -31,136 +30,19 @@ class ClearCTA:
             "newsletter", "Melden"
         ]
 
-    async def check_clear_cta(self):
+    async def check_clear_cta(self, session=None):
         """
         Main method to check if the provided URL contains a clear call-to-action (CTA) for a newsletter.
-        This method handles special cases for specific domains and also tries to identify relevant links and CTAs.
+        The newsletter page (special cases for specific domains, relevant links) is resolved by the NewsletterLocator.
         
+        :param session: Optional PageSession of the newsletter page, resolved once per scan
         :return: A tuple with a boolean indicating whether a clear CTA was found and a feedback message
         """
-         
-        criteria_met = False
-        feedback = "CTA not found or not recognizable as a clear call-to-action." # Default feedback
-        
-        # Launch the browser with Playwright to start interaction with the page
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True) # Start a headless browser session
-            page = await browser.new_page() # Open a new page in the browser
-
-            try:
-                # Handle special cases for specific websites
-                # These are sites that may have a custom URL for their newsletter page
-                # Therefore, some customer newsletters can be found dynamically, while others are accessed through hardcoding.
-
-                # Special handling for loreal-paris.de
-                if "https://www.loreal-paris.de" in self.url:
-                    newsletter_url = "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait until the page is fully loaded
-
-                    
-                    criteria_met, feedback = await self.perform_cta_check(page) # Check for CTA
-                    await browser.close() # Close the browser session
-                    return criteria_met, feedback
-                   
-                # Special handling for tesa website
-                if "https://www.tesa.com" in self.url:
-                    newsletter_url = "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait until the page is fully loaded
-
-                    
-                    criteria_met, feedback = await self.perform_cta_check(page) # Check for CTA
-                    await browser.close() # Close the browser session
-                    return criteria_met, feedback
-                
-                # Special handling for krombacher website
-                if "https://www.krombacher.de" in self.url:
-                    newsletter_url = "https://www.krombacher.de/die-brauerei/newsletter-anmeldung"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait until the page is fully loaded 
-
-                    
-                    criteria_met, feedback = await self.perform_cta_check(page) # Check for CTA
-                    await browser.close() # Close the browser session
-                    return criteria_met, feedback
-                
-                # Special handling for hansgrohe website
-                if "https://www.hansgrohe.de" in self.url:
-                    newsletter_url = "https://www.hansgrohe.de/#interest-form"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait until the page is fully loaded
-
-                    
-                    criteria_met, feedback = await self.perform_cta_check(page) # Check for CTA
-                    await browser.close() # Close the browser session
-                    return criteria_met, feedback
-                
-                # Special handling for climeworks website
-                if "https://climeworks.com" in self.url:
-                    newsletter_url = "https://info.climeworks.com/newsletter-subscription-form"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait until the page is fully loaded
-
-                    
-                    criteria_met, feedback = await self.perform_cta_check(page) # Check for CTA
-                    await browser.close() # Close the browser session
-                    return criteria_met, feedback
-
-                # General case: Load the given URL
-                try:
-                    await page.goto(self.url, timeout=60000) # Load the page with a timeout of 60 seconds
-                    await page.wait_for_load_state('networkidle') # Wait for the page to load
-                except Exception as e:
-                    feedback = f"Error loading the URL: {self.url}, Details: {str(e)}"
-                    await browser.close() # Close the browser if an error occurs
-                    return False, feedback
-
-                # If the URL itself suggests it is a newsletter page, perform a CTA check
-                if any(phrase.lower() in self.url.lower() for phrase in ["newsletter", "subscribe", "email", "signup", "newsletter-registrierung"]):
-                    criteria_met, feedback = await self.perform_cta_check(page)
-                    await browser.close()
-                    return criteria_met, feedback
-
-                # Look for relevant links leading to a newsletter or subscription page
-                links = await page.query_selector_all('a') # Get all anchor tags
-
-                for link in links:
-                    try:
-                        href = await link.get_attribute('href') # Get the link's href attribute
-                        if href:
-                            full_url = urljoin(self.url, href) # Resolve relative URLs to absolute ones
-
-                             # Skip links that are related to legal, privacy, or terms pages
-                            ignore_keywords = ["impressum", "datenschutz", "agb", "privacy", "legal"]
-                            if any(ignored in full_url.lower() for ignored in ignore_keywords):
-                               print(f" Ignoring irrelevant link: {full_url}")
-                               continue  # Skip this link if it's irrelevant
-                        
-                               # If the link contains keywords related to newsletters, visit that link
-                            if any(keyword in full_url.lower() for keyword in ["enews", "subscribe", "email", "newsletter", "newsletter-registrierung"]):
-                                await page.goto(full_url)
-                                await page.wait_for_load_state('networkidle') # Wait for the page to load
-                                criteria_met, feedback = await self.perform_cta_check(page)
-                                await browser.close() # Close the browser session
-
-                                return criteria_met, feedback
-                    except Exception:
-                        continue # If an error occurs while processing the link, continue with the next link
-
-                # If no suitable link is found, check the homepage directlyy
-                criteria_met, feedback = await self.perform_cta_check(page)
-
-            except Exception as e:
-                feedback = f"Error navigating to URL {self.url}: {str(e)}"
-
-            await browser.close() # Ensure browser is closed after checking
-        return criteria_met, feedback # Return the result and feedback
+        try:
+            async with newsletter_page(self.url, session) as page:
+                return await self.perform_cta_check(page) # Check for CTA
+        except Exception as e:
+            return False, f"Error navigating to URL {self.url}: {str(e)}"
     
     async def perform_cta_check(self, page):
         """
@@ -1,12 +1,13 @@
 import asyncio
 from urllib.parse import urljoin
-from playwright.async_api import async_playwright
-import httpx
+from newsletter_locator import newsletter_page
+from link_status import link_status as shared_link_status
 
 
 class NewsletterFunctionality:
-    def __init__(self, url=None):
+    def __init__(self, url=None, link_status=None):
         self.url = url # URL of the page to be checked for newsletter links
+        self.link_status = link_status or shared_link_status  # Status of links, shared across checkers and scans
          # Dictionary of expected links with their corresponding English and German terms
         self.expected_links = {
             "Right of Withdrawal": ["Widerrufsrecht", "Right of Revocation"],
@@ -15,95 +16,23 @@ class NewsletterFunctionality:
             "Advertising Partners": ["Werbepartner", "Advertising Partners"]
         }
 
-    async def check_newsletter_functionality(self):
+    async def check_newsletter_functionality(self, session=None):
         """
         This method checks the newsletter functionality on a given URL by verifying 
         the existence of expected links and their validity (HTTP status).
+        The newsletter page is resolved by the NewsletterLocator, `session` is the page resolved for the scan.
         """
         result = {} # Stores the result of the link check (True or False)
         feedback = {} # Stores detailed feedback about the status of each link
         detailed_feedback = []  # List to store results for detailed feedback (used for PDF generation)
         try:
-         async with async_playwright() as p: 
-            browser = await p.chromium.launch(headless=True) 
-            page = await browser.new_page()
-
-            # Special case handling for "loreal-paris.de"
-            if "https://www.loreal-paris.de" in self.url:
-                newsletter_url = "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                self.url = newsletter_url
-            
-            # Special case handling for "hansgrohe"
-            if "https://www.hansgrohe.de" in self.url:
-                newsletter_url = "https://www.hansgrohe.de/#interest-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                self.url = newsletter_url
-
-            # Special case handling for "tesa.com"
-            if "https://www.tesa.com" in self.url:
-                newsletter_url = "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                self.url = newsletter_url
-
-            # direct rendering for vileda because the homepage blocks the webcrawler
-            if "https://www.krombacher.de" in self.url:
-                newsletter_url = "https://www.krombacher.de/die-brauerei/newsletter-anmeldung"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                self.url = newsletter_url
-
-            # Special case handling for "climeworks.com"
-            if "https://www.climeworks.com" in self.url:
-                newsletter_url = "https://info.climeworks.com/newsletter-subscription-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                self.url = newsletter_url
-
-            try: 
-                print(f"Navigating to: {self.url}") # Navigate to the final URL after all redirection
-                await page.goto(self.url, timeout=60000)  # Visit the URL and wait for the page to load
-                await page.wait_for_load_state('networkidle')  # Ensure the page has finished loading
-
-                # If the URL is already a newsletter page, check the links on it
-                if any(phrase.lower() in self.url.lower() for phrase in ["newsletter", "subscribe", "email", "signup"]):
-                    print("Detected as a newsletter page. Proceeding with the functionality check.")
-                    result, feedback, detailed_feedback = await self.perform_functionality_check(page)
-
-                else: # If the URL is not a newsletter page, search for dynamic links related to newsletters
-                    print("Searching for relevant links to dynamic pages...")
-                    links = await page.query_selector_all('a') # Get all <a> tags (links) on the page
-                    for link in links:
-                        try:
-                            href = await link.get_attribute('href') # Get the href attribute of the link
-                            if href:
-                                full_url = urljoin(self.url, href) # Join the base URL with the href to get the full URL
-
-                                #  Ignore imprint, privacy policy, and terms & conditions links.
-                                ignore_keywords = ["impressum", "datenschutz", "agb", "privacy", "legal"]
-                                if any(ignored in full_url.lower() for ignored in ignore_keywords):
-                                     print(f" Ignoring irrelevant link: {full_url}")
-                                     continue   # Skip this link and move on to the next one
-                                
-                                # If the link contains keywords related to newsletters, subscribe, or email, proceed with the check
-                                if any(keyword in full_url.lower() for keyword in ["newsletter", "subscribe", "email", "signup", "newsletter-registrierung"]):
-                                    print(f"Redirecting to dynamic newsletter-related page: {full_url}")
-                                    await page.goto(full_url) # Navigate to the found newsletter-related page
-                                    await page.wait_for_load_state('networkidle') # Wait for it to fully load
-                                    result, feedback, detailed_feedback = await self.perform_functionality_check(page) # Check the links on this page
-                                    break # Stop further searching for links since we've found a valid one
-                        except Exception as e:
-                            print(f"Error processing dynamic link: {e}") # If an error occurs, skip this link and continue
-                            continue
-
-                    # If no suitable links were found, process the main page
-                    if not result:
-                        print("No dynamic links found. Checking the main page.")
-                        result, feedback, detailed_feedback = await self.perform_functionality_check(page)
-
-            except Exception as e:
-                feedback["error"] = f"Error loading the URL {self.url}: {str(e)}" # If there's an error while loading the page, store the error
+            async with newsletter_page(self.url, session) as page:
+                self.url = page.url  # Links are resolved relative to the newsletter page
+                print(f"Checking the links of the newsletter page: {self.url}")
+                result, feedback, detailed_feedback = await self.perform_functionality_check(page)
 
         except Exception as e:
-         feedback["error"] = f"Error while checking newsletter functionality: {str(e)}" # If an error occurs during the overall process, store the error
+            feedback["error"] = f"Error while checking newsletter functionality: {str(e)}" # If an error occurs during the overall process, store the error
 
         # Format feedback for PDF
         formatted_feedback = self.format_feedback_for_pdf(detailed_feedback) # Format feedback for inclusion in a PDF
@@ -150,23 +79,18 @@ class NewsletterFunctionality:
                for link_info in term_found:
                    href = link_info.get("href")
                    if href:
-                       async with httpx.AsyncClient() as client:
-                           try:
-                               response = await client.get(href, timeout=10) # Make an HTTP GET request
-                               status_code = response.status_code # Get the status code of the response
-                               link_status.append({
-                                   "term": link_info.get("term"),
-                                   "link_text": link_info.get("link_text"),
-                                   "href": href,
-                                   "status": "Valid" if status_code == 200 else f"Invalid (HTTP {status_code})"
-                               })
-                           except Exception as e:
-                               link_status.append({
-                                   "term": link_info.get("term"),
-                                   "link_text": link_info.get("link_text"),
-                                   "href": href,
-                                   "status": f"Error: {str(e)}"
-                               })
+                       # Status of the link (HEAD first, known links are not requested again), a redirect counts as invalid
+                       status = await self.link_status.check(href, follow_redirects=False)
+                       if status.status is not None:
+                           status_text = "Valid" if status.status == 200 else f"Invalid (HTTP {status.status})"
+                       else:
+                           status_text = f"Error: {status.error}"
+                       link_status.append({
+                           "term": link_info.get("term"),
+                           "link_text": link_info.get("link_text"),
+                           "href": href,
+                           "status": status_text
+                       })
 
                # Store the results of the check for this link
                if link_status:
@@ -1,7 +1,7 @@
 import asyncio
-from urllib.parse import urljoin
-from playwright.async_api import async_playwright
-from difflib import SequenceMatcher, ndiff
+from newsletter_locator import newsletter_page
+from banner_readiness import wait_until_settled
+from text_similarity import prepare_template
 
 
 class MoreDetails:
@@ -10,7 +10,7 @@ class MoreDetails:
 
     def calculate_similarity(self, expected_text, actual_text):
         """Calculates the similarity between two texts."""
-        similarity = SequenceMatcher(None, expected_text, actual_text).ratio() * 100
+        similarity = prepare_template(expected_text).similarity(actual_text)
         return similarity
 
     def show_differences(self, expected_text, actual_text):
@@ -18,109 +18,18 @@ class MoreDetails:
         Shows the differences between the expected and the actual text.
         Can be activated if needed.
         """
-        diff = ndiff(expected_text.split(), actual_text.split())
-        differences = [line for line in diff if line.startswith("- ") or line.startswith("+ ")]
-        return differences
+        return prepare_template(expected_text).differences(actual_text)
 
-    async def check_newsletter_more_details(self, expected_text=None):
+    async def check_newsletter_more_details(self, expected_text=None, session=None):
         """
         This method checks the newsletter functionality by verifying the presence of relevant elements 
         (e.g., a "More Details" button) and extracting the text from the page for comparison with 
         an expected template text.
+        The check clicks the button, so it works on a forked newsletter page when `session` is given.
         """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True) # Launch the browser in headless mode
-                page = await browser.new_page() # Open a new page in the browser
-
-                # Special case handling for "loreal-paris.de"
-                if "loreal-paris.de" in self.url:
-                    newsletter_url = "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    self.url = newsletter_url
-
-
-                print(f"Navigating to: {self.url}")
-                await page.goto(self.url, timeout=60000)
-                await page.wait_for_load_state('networkidle') # Wait for the page to load
-
-                # Special case handling for "hansgrohe.de"
-                if "hansgrohe.de" in self.url:
-                    newsletter_url = "https://www.hansgrohe.de/#interest-form"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    self.url = newsletter_url
-
-                print(f"Navigating to: {self.url}")
-                await page.goto(self.url, timeout=60000) # Navigate to the URL
-                await page.wait_for_load_state('networkidle') # Wait for the page to load
-
-                # Special case handling for "climeworks.com"
-                if "climeworks.com" in self.url:
-                    newsletter_url = "https://info.climeworks.com/newsletter-subscription-form"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    self.url = newsletter_url
-
-
-                print(f"Navigating to: {self.url}")
-                await page.goto(self.url, timeout=60000) # Navigate to the URL
-                await page.wait_for_load_state('networkidle') # Wait for the page to load
-
-
-                 # Special case handling for "tesa.com"
-                if "tesa.com" in self.url:
-                    newsletter_url = "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    self.url = newsletter_url
-
-
-                print(f"Navigating to: {self.url}")
-                await page.goto(self.url, timeout=60000) # Navigate to the URL
-                await page.wait_for_load_state('networkidle') # Wait for the page to load
-                
-                # Special handling for krombacher
-                if "https://www.krombacher.de" in self.url:
-                    newsletter_url = "https://www.krombacher.de/die-brauerei/newsletter-anmeldung"
-                    print(f"Special case detected, redirecting to: {newsletter_url}")
-                    await page.goto(newsletter_url)
-                    await page.wait_for_load_state('networkidle') # Wait for the page to load
-
-                
-                    conformity, similarity, feedback = await self.perform_more_details_check(page, expected_text) # Perform a "More Details" check for the Krombacher page
-                    await browser.close()
-                    return conformity, similarity, feedback
-
-                # Check whether the URL is already a newsletter page
-                if any(keyword in self.url.lower() for keyword in ["newsletter", "signup", "email"]):
-                    print("Direct newsletter page recognized. A check is being carried out.")
-                    return await self.perform_more_details_check(page, expected_text)
-
-                # If not a direct newsletter page, search for relevant links like "newsletter"
-                links = await page.query_selector_all('a') # Get all the links on the page
-                for link in links:
-                    try:
-                        href = await link.get_attribute('href') # Get the href attribute (URL) of the link
-                        if href:
-                            full_url = urljoin(self.url, href) # Create a full URL from the relative href
-                            # Ignore imprint, data protection and general terms and conditions links
-                            ignore_keywords = ["impressum", "datenschutz", "agb", "privacy", "legal"]
-                            if any(ignored in full_url.lower() for ignored in ignore_keywords):
-                              print(f" Ignoring irrelevant link: {full_url}")
-                              continue  
-                        
-                              # If a relevant link like "newsletter", "subscribe", "email", etc. is found, go to it
-                            if any(keyword in full_url.lower() for keyword in ["newsletter", "subscribe", "email", "signup", "newsletter-registrierung"]):
-                                print(f"Relevant link found: {full_url}")
-                                await page.goto(full_url)
-                                await page.wait_for_load_state('networkidle')
-
-                                # Search for a “More details” button on the page 
-                                return await self.perform_more_details_check(page, expected_text)
-                    except Exception as e:
-                        print(f"Error while processing a link: {e}")
-                        continue # If an error occurs, continue processing the next link
-
-                # If no relevant links are found, check the main page directly
-                print(" No relevant links found, checking the main page directly.")
+            async with newsletter_page(self.url, session, mutating=True) as page:
+                # Search for a "More details" button on the newsletter page
                 return await self.perform_more_details_check(page, expected_text)
 
         except Exception as e:
@@ -147,7 +56,7 @@ class MoreDetails:
 
                 # Wait for the content to become visible.
                 print(f"Waiting for {content_selector} being visible...")
-                await page.wait_for_timeout(2000)   # Wait for 2 seconds to ensure content is visible
+                await wait_until_settled(page, [content_selector], timeout=5000)
 
                 # Fallback: Manually make the content visible if needed
                 await page.evaluate("""(contentSelector) => {
@@ -1,29 +1,19 @@
 import asyncio
-from urllib.parse import urljoin
-from playwright.async_api import async_playwright
-from difflib import SequenceMatcher, ndiff
-from spellchecker import SpellChecker
+from browser_pool import browser_pool
+from newsletter_locator import newsletter_page
+from navigation_policy import navigation_policy
+from text_similarity import prepare_template
 import re
 
 class NewsletterWording:
     def __init__(self, url=None):
         """
-        Initializes the NewsletterWording class with a given URL and a spell checker.
-        The spell checker is configured for the German language and includes custom words.
+        Initializes the NewsletterWording class with a given URL.
+        Spell checking, if needed, uses the shared spell_service.
         
         :param url: The URL to check for newsletter wording
         """
         self.url = url
-        self.spell_checker = SpellChecker(language='de')
-
-        # Custom words for spell checking
-        self.spell_checker.word_frequency.load_words([
-            "Drittunternehmen", "Einwilligungsbedürftige", "Datenschutzerklärung", "Rechtsgrundlagen",
-            "Einwilligung", "Zweck", "ID", "Datenschutzinformationen", "zuzuschneiden", "Onlineangeboten",
-            "Marketingbemühungen", "Auswertungsmöglichkeiten", "Schaltfläche", "Überwachungszwecken",
-            "Rechtsbehelfsmöglichkeiten"
-        ])
-
         self.checkbox_selector = 'input[type="checkbox"]'  # standard selector for checkboxes
 
     async def extract_text_after_checkbox(self, url, template_text):
@@ -36,19 +26,33 @@ class NewsletterWording:
         :return: The best match for the template and its similarity percentage
         """
      try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        async with browser_pool.context() as context:
+            page = await context.new_page()
 
             print(f"Navigating to URL: {url}")
-            await page.goto(url, timeout=60000)
+            await navigation_policy.goto(page, url)
 
             # Ensure we're on the newsletter page
             if 'newsletter' not in page.url.lower():
                 print("Error: Not on the newsletter page. The URL is incorrect.")
-                await browser.close()
                 return "Error: No newsletter page found.", 0
 
+            return await self.extract_text_from_page(page, template_text)
+
+     except Exception as e:
+        print(f"Error extracting text after checkbox: {e}")
+        return f"Error extracting text after checkbox: {str(e)}", 0
+
+    async def extract_text_from_page(self, page, template_text):
+        """
+        Extracts the text associated with the checkboxes of an already loaded newsletter page
+        and compares it with the template text.
+
+        :param page: The newsletter page
+        :param template_text: The template text for comparison
+        :return: The best match for the template and its similarity percentage
+        """
+        try:
             # List to store all found texts
             potential_texts = []
 
@@ -120,8 +124,8 @@ class NewsletterWording:
                 return "No relevant consent text found.", 0
 
             # Step 1: Find the best match among the filtered texts based on similarity
-            best_match = max(filtered_texts, key=lambda x: SequenceMatcher(None, template_text, x).ratio())
-            best_similarity = SequenceMatcher(None, template_text, best_match).ratio() * 100
+            # Only the candidates closest by n-grams are compared exactly
+            best_match, best_similarity = prepare_template(template_text).best_match(filtered_texts)
             
 
             print(f"Best match based on similarity: {best_match} (Similarity: {best_similarity:.2f}%)")
@@ -143,375 +147,77 @@ class NewsletterWording:
             print("No prioritized text found, returning best match anyway.")
             return best_match.strip(), best_similarity
 
-     except Exception as e:
-        print(f"Error extracting text after checkbox: {e}")
-        return f"Error extracting text after checkbox: {str(e)}", 0
+        except Exception as e:
+            print(f"Error extracting text after checkbox: {e}")
+            return f"Error extracting text after checkbox: {str(e)}", 0
 
 
     def show_diff(self, template_text, website_text):
         """Can be activated in case the user wants the differences word for word in the pdf."""
-        diff = ndiff(template_text.split(), website_text.split())
         differences = []
-        for change in diff:
+        for change in prepare_template(template_text).differences(website_text):
             if change.startswith('- '):
                 differences.append(f"Missing in website: {change[2:]}")
             elif change.startswith('+ '):
                 differences.append(f"Extra in website: {change[2:]}")
         return differences
 
-    async def check_newsletter_wording(self, url, template_text):
-     """
-        Checks if the wording on the provided newsletter URL matches the given template.
-        It navigates to the appropriate pages and extracts the consent/checkbox text.
+    async def check_newsletter_wording(self, url, template_text, session=None):
+        """
+        Checks if the wording on the newsletter page of the provided URL matches the given template.
+        The newsletter page (special cases for specific domains, relevant links) is resolved by the NewsletterLocator.
         
         :param url: The URL to check
         :param template_text: The template text for comparison
+        :param session: Optional PageSession of the newsletter page, resolved once per scan
         :return: Conformity, similarity, and detailed feedback about the comparison
-     """
-     
-     try:
-        # Handle special cases for specific websites
-        # These are sites that may have a custom URL for their newsletter page
-        # Therefore, some customer newsletters can be found dynamically, while others are accessed through hardcoding.
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True) #Launch Chromium in headless mode (without an UI)
-            page = await browser.new_page()
-        
-            # Special handling for loreal-paris.de
-            if "https://www.loreal-paris.de" in url:
-                newsletter_url = "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-                
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                
-                await browser.close()
-                return conformity, similarity, feedback
-            
-
-            # Special handling for aldi-sued.de
-            if "https://www.aldi-sued.de" in url:
-                newsletter_url = "https://www.aldi-sued.de/de/newsletter.html"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-                
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                await browser.close()
-                return conformity, similarity, feedback
-            
-            if "https://www.verivox.de" in self.url:
-                print(f"Detected 'verivox.de', checking footer for newsletter form.")
-    
-                # Navigate to the homepage (Verivox homepage is already provided)
-                await page.goto(self.url)
-                await page.wait_for_load_state('networkidle')
-
-                try:
-                    # Check if the newsletter form exists in the footer
-                    newsletter_form = await page.query_selector('.newsletter')
-                    if newsletter_form:
-                        print("Newsletter form found in footer.")
-
-                        # Extract the relevant consent checkbox and associated text
-                        checkbox_text = await newsletter_form.evaluate(
-                            '''(node) => {
-                                let consentText = node.querySelector('.consent-label p');
-                             return consentText ? consentText.innerText.trim() : '';
-                            }'''
-                        )
-
-                        if checkbox_text:
-                            # Compare extracted checkbox text with the template
-                            similarity = SequenceMatcher(None, template_text, checkbox_text).ratio() * 100
-                            print(f"Extracted checkbox text: {checkbox_text}")
-                            print(f"Similarity with template: {similarity:.2f}%")
-
-                            # Prepare feedback based on the extracted content
-                            conformity = True if similarity == 100 else False
-                            feedback = f"""
-                            <strong>Template Text:</strong> {template_text}<br>
-                            <strong>Extracted Text:</strong> {checkbox_text}<br>
-                            <strong>Similarity:</strong> {similarity:.2f}%<br>
-                            """
-                            return conformity, similarity, feedback
-                        else:
-                            feedback = "No relevant consent text found in the footer newsletter form."
-                            return False, 0, feedback
-                    else:
-                        feedback = "No newsletter form found in the footer."
-                        return False, 0, feedback
-                except Exception as e:
-                    feedback = f"Error checking Verivox newsletter form: {str(e)}"
-                    return False, 0, feedback
-
-            
-            if "https://www.schwarzkopf.de" in self.url:
-                print(f"Detected 'schwarzkopf.de', clicking 'ANMELDEN' for newsletter.")
-    
-                # Navigate to the homepage
-                await page.goto(self.url)
-                await page.wait_for_load_state('networkidle')
-
-                # Wait for the "ANMELDEN" button and ensure it is visible
-                sign_up_button = await page.query_selector('button.calltoaction__link.cta:has-text("ANMELDEN")')
-                if sign_up_button:
-                    print("Clicking 'ANMELDEN' button to trigger the modal.")
-                    await sign_up_button.click()
-
-                    # Wait for the modal container to become visible
-                    try:
-                        print("Waiting for modal to appear...")
-
-                        # Wait for the modal to appear (using the wrapper or a more general modal container)
-                        await page.wait_for_selector('div.calltoaction__wrapper.cta', state='visible', timeout=30000)
-
-                        # Optionally, add a small delay to allow any dynamic content to fully load
-                        await asyncio.sleep(3)
-
-                        checkbox_text, similarity = await self.extract_text_after_checkbox(url, template_text)
-
-                        if not checkbox_text or "No relevant text found" in checkbox_text:
-                            feedback = "No relevant text found in the modal."
-                            await browser.close()
-                            return False, 0, feedback
-
-                        conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                        feedback = f"""
-                        <strong>Template Text:</strong> {template_text}<br>
-                        <strong>Extracted Text:</strong> {checkbox_text}<br>
-                        <strong>Similarity:</strong> {similarity:.2f}%<br>
-                        """
-                        await browser.close()
-                        return conformity, similarity, feedback
-                    except Exception as e:
-                        print(f"Error or timeout waiting for modal: {str(e)}")
-                        result = False
-                        feedback = "Error: Modal did not appear or was not visible."
-                        await browser.close()
-                        return result, 0, feedback
+        """
+        try:
+            async with newsletter_page(url, session) as page:
+                # Newsletter forms in the footer (e.g. verivox.de) have their consent text in a label
+                checkbox_text = await self.extract_footer_consent_text(page)
+                if checkbox_text:
+                    similarity = prepare_template(template_text).similarity(checkbox_text)
+                    print(f"Extracted checkbox text: {checkbox_text}")
+                    print(f"Similarity with template: {similarity:.2f}%")
                 else:
-                    print("Could not open pop-up modal.")
-                    feedback = "Could not open pop-up modal."
-                    await browser.close()
-                    return False, 0, feedback
-                    
-            # redirecting for krombacher
-            if "https://www.krombacher.de" in self.url:
-                newsletter_url = "https://www.krombacher.de/die-brauerei/newsletter-anmeldung"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                await browser.close()
-                return conformity, similarity, feedback
-            
-            # Special handling for tesa.com
-            if "https://www.tesa.com" in url:
-                newsletter_url = "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                await browser.close()
-                return conformity, similarity, feedback
-            
-        
-            
-            # Special handling for hansgrohe
-            if "https://www.hansgrohe.de" in url:
-                newsletter_url = "https://www.hansgrohe.de/#interest-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                await browser.close()
-                return conformity, similarity, feedback
-            
-            # Special handling for climeworks
-            if "https://www.climeworks.com" in url:
-                newsletter_url = "https://info.climeworks.com/newsletter-subscription-form"
-                print(f"Special case detected, redirecting to: {newsletter_url}")
-                await page.goto(newsletter_url)
-                await page.wait_for_load_state('networkidle')
-
-                # Extract the checkbox text and compare it with the template
-                checkbox_text, similarity = await self.extract_text_after_checkbox(newsletter_url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-                
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                
-                await browser.close()
-                return conformity, similarity, feedback
-
-            # General case: Load the given URL
-            try:
-                await page.goto(url, timeout=60000) # Visit the provided URL
-                await page.wait_for_load_state('networkidle') # Wait for the page to load
-            except Exception as e:
-                feedback = f"Error loading the URL: {url}, Details: {str(e)}"
-                await browser.close()
-                return False, 0, feedback
-        
-            # Check whether the URL is already a newsletter page
-            if any(phrase.lower() in url.lower() for phrase in ["newsletter", "subscribe", "email", "signup"]):
-                checkbox_text, similarity = await self.extract_text_after_checkbox(url, template_text)
-                if not checkbox_text or "No relevant text found" in checkbox_text:
-                    feedback = "No relevant text found on the newsletter page."
-                    await browser.close()
-                    return False, 0, feedback
-
-                # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                feedback = f"""
-                <strong>Template Text:</strong> {template_text}<br>
-                <strong>Extracted Text:</strong> {checkbox_text}<br>
-                <strong>Similarity:</strong> {similarity:.2f}%<br>
-                """
-                await browser.close()
-                return conformity, similarity, feedback
-
-            # Search links on the page to get to the newsletter page
-            links = await page.query_selector_all('a')
-            for link in links:
-                try:
-                    href = await link.get_attribute('href')
-                    if href:
-                        full_url = urljoin(url, href)
-
-
-                        # Ignore imprint, data protection and general terms and conditions links
-                        ignore_keywords = ["impressum", "datenschutz", "agb", "privacy", "legal"]
-                        if any(ignored in full_url.lower() for ignored in ignore_keywords):
-                             print(f" Ignoring irrelevant link: {full_url}")
-                             continue  # Skip irrelevant links
-
-                        if any(keyword in full_url.lower() for keyword in ["newsletter", "subscribe", "email", "signup", "newsletter-registrierung"]):
-                            print(f"Found a relevant link: {full_url}")
-                            await page.goto(full_url)
-                            await page.wait_for_load_state('networkidle')
-
-                            # Check on the linked page
-                            checkbox_text, similarity = await self.extract_text_after_checkbox(full_url, template_text)
-                            if not checkbox_text or "No relevant text found" in checkbox_text:
-                                continue
-
-                            # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
-                            conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
-                            feedback = f"""
-                            <strong>Template Text:</strong> {template_text}<br>
-                            <strong>Extracted Text:</strong> {checkbox_text}<br>
-                            <strong>Similarity:</strong> {similarity:.2f}%<br>
-                            """
-                            await browser.close()
-                            return conformity, similarity, feedback
-                except Exception:
-                    continue
-
-                
-            # Final Fallback: If no newsletter link is found, check the given URL directly
-            print("No relevant newsletter link found, checking the given URL.")
-            checkbox_text, similarity = await self.extract_text_after_checkbox(url, template_text)
+                    checkbox_text, similarity = await self.extract_text_from_page(page, template_text)
+
             if not checkbox_text or "No relevant text found" in checkbox_text:
-                feedback = "No relevant text found on the given URL."
-                await browser.close()
+                feedback = "No relevant text found on the newsletter page."
                 return False, 0, feedback
 
+            # differences = self.show_diff(template_text, checkbox_text)  # the comment can be edited in case it is necessary for the user to know the differences
             conformity = True if similarity == 100 else False # Determine if the extracted text matches the template perfectly
             feedback = f"""
             <strong>Template Text:</strong> {template_text}<br>
             <strong>Extracted Text:</strong> {checkbox_text}<br>
             <strong>Similarity:</strong> {similarity:.2f}%<br>
             """
-            await browser.close()
             return conformity, similarity, feedback
-            
 
-     except Exception as e: # Handle any errors that occur during the process
-        print(f"Error during newsletter wording check: {e}")
-        return False, 0, f"Error: {str(e)}"
+        except Exception as e: # Handle any errors that occur during the process
+            print(f"Error during newsletter wording check: {e}")
+            return False, 0, f"Error: {str(e)}"
+
+    async def extract_footer_consent_text(self, page):
+        """
+        Returns the consent text of a newsletter form in the footer ('' if there is none).
+        """
+        try:
+            newsletter_form = await page.query_selector('.newsletter')
+            if not newsletter_form:
+                return ''
+            print("Newsletter form found in footer.")
+            return await newsletter_form.evaluate(
+                '''(node) => {
+                    let consentText = node.querySelector('.consent-label p');
+                    return consentText ? consentText.innerText.trim() : '';
+                }'''
+            )
+        except Exception as e:
+            print(f"Error checking footer newsletter form: {e}")
+            return ''
 
 
 
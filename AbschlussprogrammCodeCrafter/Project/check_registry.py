@@ -0,0 +1,151 @@
+import importlib
+import time
+
+
+class LazyChecker:
+    """
+    Stands in for a checker class and imports its module on first use, i.e. when a check
+    using it runs for the first time. Calling it creates an instance of the checker class.
+    """
+    def __init__(self, module, attribute):
+        self.module = module
+        self.attribute = attribute
+        self._class = None
+
+    def load(self):
+        """Imports the module (once) and returns the checker class."""
+        if self._class is None:
+            self._class = getattr(importlib.import_module(self.module), self.attribute)
+        return self._class
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+class Prerequisite:
+    """
+    Something several checks need, e.g. the loaded landing page or the imprint URL.
+    It is computed at most once per scan, the first time a check asks for it.
+    """
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func  # async func(scan, needs) -> value
+        self.requires = tuple(requires)
+
+
+class Check:
+    """
+    A registered compliance check.
+
+    The check function is called as `await func(scan, needs)` where `needs` maps every
+    declared requirement to its value. It returns a (result, feedback) tuple for the
+    criterion `name`, or a dict {criterion: (result, feedback)} if it evaluates several criteria.
+    Checks with several criteria declare their names in `criteria`, as a list or as a function
+    of the templates if the criteria depend on them (e.g. one criterion per imprint term).
+    """
+    def __init__(self, name, func, requires=(), resource=None, templates=(), version=1, fingerprint=None, criteria=None):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.resource = resource  # Concurrency pool of the scheduler (e.g. "browser", "http")
+        self.templates = tuple(templates)  # Template keys the result depends on (part of the cache key)
+        self.version = version  # Increase it when the check changes, cached results are recomputed then
+        self.fingerprint = fingerprint  # Prerequisite with a cheap fingerprint of the input of the check
+        self.criteria = criteria  # Names of the criteria the check evaluates (default: its name)
+
+    def criterion_names(self, templates=None):
+        """Names of the criteria the check reports for the given templates."""
+        if self.criteria is None:
+            return [self.name]
+        if callable(self.criteria):
+            return list(self.criteria(templates or {}))
+        return list(self.criteria)
+
+
+class CheckRegistry:
+    """
+    Registry of all compliance checks and the prerequisites they depend on.
+    Adding a criterion only needs a registration, the scheduler works out the order.
+    """
+    def __init__(self):
+        self.checks = {}  # name -> Check, in registration order (= order in the report)
+        self.prerequisites = {}  # name -> Prerequisite
+        self.checkers = []  # LazyChecker of every checker module
+
+    def check(self, name, requires=(), resource=None, templates=(), version=1, fingerprint=None, criteria=None):
+        """Decorator registering a compliance check."""
+        def decorator(func):
+            if name in self.checks:
+                raise ValueError(f"Check '{name}' is already registered.")
+            self.checks[name] = Check(name, func, requires, resource, templates, version, fingerprint, criteria)
+            return func
+        return decorator
+
+    def criteria(self, templates=None, only=None):
+        """
+        Names of all criteria a scan reports, in the order of the report.
+
+        :param only: Optional names of the checks that run (default: all)
+        """
+        return [
+            criterion
+            for check in self.checks.values() if only is None or check.name in only
+            for criterion in check.criterion_names(templates)
+        ]
+
+    def checker(self, module, attribute):
+        """
+        Declares a checker class that is imported only when it is first used.
+
+        :param module: Name of the checker module, e.g. "cookie_options"
+        :param attribute: Name of the checker class in the module
+        :return: LazyChecker, called like the class itself
+        """
+        checker = LazyChecker(module, attribute)
+        self.checkers.append(checker)
+        return checker
+
+    def load_checkers(self):
+        """Imports all checker modules, returns {module: seconds the import took}."""
+        durations = {}
+        for checker in self.checkers:
+            start = time.perf_counter()
+            checker.load()
+            durations[checker.module] = time.perf_counter() - start
+        return durations
+
+    def prerequisite(self, name, requires=()):
+        """Decorator registering a prerequisite that is shared by several checks."""
+        def decorator(func):
+            if name in self.prerequisites:
+                raise ValueError(f"Prerequisite '{name}' is already registered.")
+            self.prerequisites[name] = Prerequisite(name, func, requires)
+            return func
+        return decorator
+
+    def validate(self):
+        """
+        Makes sure every requirement is registered and the prerequisites do not depend on each other in a cycle.
+        """
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name not in self.prerequisites:
+                raise ValueError(f"Unknown requirement '{name}' (required by {' -> '.join(path)}).")
+            if name in visiting:
+                raise ValueError(f"Cyclic requirement: {' -> '.join(path + [name])}.")
+            visiting.add(name)
+            for requirement in self.prerequisites[name].requires:
+                visit(requirement, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for check in self.checks.values():
+            for requirement in check.requires + ((check.fingerprint,) if check.fingerprint else ()):
+                visit(requirement, [check.name])
+
+
+# Registry used by the web app, the checks are registered in compliance_checks.py
+registry = CheckRegistry()
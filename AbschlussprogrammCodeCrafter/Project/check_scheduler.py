@@ -0,0 +1,196 @@
+import asyncio
+from contextlib import AsyncExitStack
+from resource_policy import ResourcePolicy, ResourceStats
+from navigation_policy import scan_deadline
+from language_service import scan_languages
+from result_cache import cached_feedback
+from har_archive import current_archive
+
+
+class ScanContext:
+    """
+    State of one scan: URL, templates and the memoized prerequisites.
+    Prerequisites that hold resources (pages, browser leases) register their cleanup
+    on the exit stack, which is closed when the scan is finished.
+    """
+    def __init__(self, registry, url, templates, deadline=None, read_cache=True, write_cache=True):
+        """
+        :param deadline: Event loop time at which the scan is stopped (None for no deadline)
+        :param read_cache: Take results from the result cache of the scheduler
+        :param write_cache: Store the results in the result cache of the scheduler
+        """
+        self.registry = registry
+        self.url = url
+        self.templates = templates
+        self.deadline = deadline
+        self.read_cache = read_cache
+        self.write_cache = write_cache
+        self.exit_stack = AsyncExitStack()
+        self.resource_stats = ResourceStats()  # Requests blocked by the resource policies of the scan
+        self._prerequisites = {}  # name -> asyncio.Task
+
+    def remaining(self):
+        """Seconds left until the deadline (None without a deadline)."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - asyncio.get_running_loop().time(), 0)
+
+    def resource_policy(self, profile):
+        """Returns a ResourcePolicy with the given profile that counts into the stats of this scan."""
+        return ResourcePolicy(profile, self.resource_stats)
+
+    async def enter(self, async_context_manager):
+        """Enters an async context manager that stays open until the scan is finished."""
+        return await self.exit_stack.enter_async_context(async_context_manager)
+
+    async def require(self, name):
+        """Returns the value of a prerequisite, computing it on first use only."""
+        if name not in self._prerequisites:
+            self._prerequisites[name] = asyncio.ensure_future(self._compute(name))
+        return await asyncio.shield(self._prerequisites[name])
+
+    async def needs(self, requirements):
+        """Resolves several requirements concurrently and returns them as a dict."""
+        values = await asyncio.gather(*(self.require(name) for name in requirements))
+        return dict(zip(requirements, values))
+
+    async def _compute(self, name):
+        prerequisite = self.registry.prerequisites[name]
+        needs = await self.needs(prerequisite.requires)
+        print(f"Prerequisite '{name}' is being prepared...")
+        return await prerequisite.func(self, needs)
+
+    async def close(self):
+        for task in self._prerequisites.values():
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*self._prerequisites.values(), return_exceptions=True)
+        await self.exit_stack.aclose()
+
+
+class CheckScheduler:
+    """
+    Runs the registered checks of a scan as a dependency graph.
+
+    Every check starts as soon as its requirements are available, shared prerequisites are
+    computed once and checks that use the same kind of resource are limited by a semaphore.
+    Checks still running when the deadline of the scan is reached are cancelled and reported as timed out.
+    Checks with a result in the cache are not run at all, so their prerequisites are not computed either.
+    A check with a fingerprint first computes only the fingerprint of its input, an older result
+    with the same fingerprint is carried forward instead of running the check again.
+    Scans replayed from a HAR archive never use the cache: their results describe the recording,
+    not the current website. A forced scan runs every check and only refreshes the cache.
+    """
+    def __init__(self, registry, resource_limits=None, deadline=None, cache=None):
+        """
+        :param registry: CheckRegistry with the checks to run
+        :param resource_limits: Maximum number of concurrently running checks per resource, e.g. {"browser": 4}
+        :param deadline: Time budget of a whole scan in seconds (None for no limit)
+        :param cache: Optional ResultCache for the results of single checks
+        """
+        self.registry = registry
+        self.resource_limits = resource_limits or {}
+        self.deadline = deadline
+        self.cache = cache
+
+    async def run(self, url, templates, on_result=None, only=None, force=False):
+        """
+        Runs all registered checks for the URL.
+
+        :param on_result: Optional callback on_result(criterion, result, feedback), called as soon as a criterion is evaluated
+        :param only: Optional names of the checks to run, their prerequisites are resolved as usual
+        :param force: Ignore cached results and run every check (the new results are cached)
+        Returns:
+        - tuple: (criteria_results, feedback_results) dictionaries in registration order.
+        """
+        self.registry.validate()
+        deadline = None
+        if self.deadline is not None:
+            deadline = asyncio.get_running_loop().time() + self.deadline
+        archive = current_archive.get()
+        replaying = archive is not None and archive.replaying
+        scan = ScanContext(self.registry, url, templates, deadline,
+                           read_cache=self.cache is not None and not replaying and not force,
+                           write_cache=self.cache is not None and not replaying)
+        semaphores = {resource: asyncio.Semaphore(limit) for resource, limit in self.resource_limits.items()}
+        checks = [check for check in self.registry.checks.values() if only is None or check.name in only]
+
+        # The tasks of the checks inherit the deadline, so navigations never wait past it,
+        # and the languages of the scan, so all checkers agree on the language of a banner
+        token = scan_deadline.set(deadline)
+        languages_token = scan_languages.set({})
+        try:
+            outcomes = await asyncio.gather(
+                *(self._run_check(scan, check, semaphores.get(check.resource), on_result) for check in checks)
+            )
+        finally:
+            scan_deadline.reset(token)
+            scan_languages.reset(languages_token)
+            await scan.close()
+            print(f"Resources of the scan of {url}: {scan.resource_stats.summary()}")
+
+        criteria_results = {}
+        feedback_results = {}
+        for check, outcome in zip(checks, outcomes):
+            for criterion, (result, feedback) in self._criteria(check, outcome).items():
+                criteria_results[criterion] = result
+                feedback_results[criterion] = feedback
+        return criteria_results, feedback_results
+
+    def _criteria(self, check, outcome):
+        """Normalizes the outcome of a check to {criterion: (result, feedback)}."""
+        if isinstance(outcome, dict):
+            return outcome  # Check evaluating several criteria
+        return {check.name: outcome}
+
+    async def _fingerprint(self, scan, check):
+        """Returns the fingerprint of the input of a check (None if it could not be computed)."""
+        try:
+            return await asyncio.wait_for(scan.require(check.fingerprint), timeout=scan.remaining())
+        except Exception as e:
+            print(f"Fingerprint '{check.fingerprint}' of check '{check.name}' could not be computed: {e}")
+            return None
+
+    async def _execute(self, scan, check, semaphore):
+        needs = await scan.needs(check.requires)
+        if semaphore is None:
+            return await check.func(scan, needs)
+        async with semaphore:
+            return await check.func(scan, needs)
+
+    async def _run_check(self, scan, check, semaphore, on_result=None):
+        """Runs a single check (or takes its result from the cache), errors are reported as a failed criterion."""
+        cached, fingerprint = None, None
+        if scan.read_cache:
+            cached = await asyncio.to_thread(self.cache.get, scan.url, check, scan.templates)
+            if cached is None and check.fingerprint is not None:
+                fingerprint = await self._fingerprint(scan, check)
+                if fingerprint is not None:
+                    cached = await asyncio.to_thread(self.cache.get, scan.url, check, scan.templates, fingerprint)
+        if cached is not None:
+            outcome, created = cached
+            print(f"Check '{check.name}' taken from the result cache{' (input unchanged)' if fingerprint else ''}.")
+            outcome = {
+                criterion: (result, cached_feedback(feedback, created, unchanged=fingerprint is not None))
+                for criterion, (result, feedback) in outcome.items()
+            }
+        else:
+            try:
+                outcome = await asyncio.wait_for(self._execute(scan, check, semaphore), timeout=scan.remaining())
+                if scan.write_cache:
+                    await asyncio.to_thread(self.cache.put, scan.url, check, scan.templates,
+                                            self._criteria(check, outcome), fingerprint)
+            except asyncio.TimeoutError:
+                print(f"Check '{check.name}' timed out.")
+                outcome = (False, f"Timed out: the scan did not finish within {self.deadline} seconds.")
+            except Exception as e:
+                print(f"Error during check '{check.name}': {e}")
+                outcome = (False, f"Error: {e}")
+
+        if on_result is not None:
+            for criterion, (result, feedback) in self._criteria(check, outcome).items():
+                try:
+                    on_result(criterion, result, feedback)
+                except Exception as e:
+                    print(f"Error while reporting '{criterion}': {e}")
+        return outcome
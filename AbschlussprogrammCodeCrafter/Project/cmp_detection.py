@@ -0,0 +1,176 @@
+import weakref
+
+# Identifies the consent management platform (CMP) of a page in one round trip.
+# Each CMP is recognised by its JavaScript globals, the URL of its script or its root element.
+# The order matters: the first match wins.
+_DETECT_CMP = """
+() => {
+    const scripts = Array.from(document.scripts).map(s => s.src || '').join(' ').toLowerCase();
+    const has = selector => !!document.querySelector(selector);
+    const signatures = [
+        ['OneTrust', !!window.OneTrust || !!window.OptanonWrapper || scripts.includes('cookielaw.org')
+            || scripts.includes('otsdkstub') || has('#onetrust-consent-sdk')],
+        ['Cookiebot', !!window.Cookiebot || scripts.includes('consent.cookiebot.com') || has('#CybotCookiebotDialog')],
+        ['Usercentrics', !!window.UC_UI || !!window.__ucCmp || scripts.includes('usercentrics.eu')
+            || has('#usercentrics-root') || has('#usercentrics-cmp-ui')],
+        ['Borlabs', !!window.BorlabsCookie || scripts.includes('borlabs-cookie') || has('#BorlabsCookieBox')
+            || has('.brlbs-cmpnt-container')],
+        ['CCM19', !!window.CCM19 || scripts.includes('ccm19') || has('.ccm-root') || has('#ccm-widget')],
+        ['CookieScript', !!window.CookieScript || scripts.includes('cookie-script.com') || has('#cookiescript_injected')],
+        ['consentmanager', scripts.includes('consentmanager.net') || scripts.includes('consensu.org') || has('#cmpbox')],
+        ['TrustCommander', !!(window.tC && window.tC.privacy) || scripts.includes('trustcommander')
+            || has('#popin_tc_privacy') || has('#footer_tc_privacy')],
+    ];
+    for (const [name, found] of signatures) {
+        if (found) {
+            return name;
+        }
+    }
+    return null;
+}
+"""
+
+
+class CMPStrategy:
+    """
+    Selectors of one consent management platform, grouped by the role of the element:
+      banner:            the cookie banner itself
+      text:              the element holding the banner text
+      reject:            the button that rejects all optional cookies
+      settings:          the button that opens the preference center
+      preference_center: the preference center
+    """
+    ROLES = ("banner", "text", "reject", "settings", "preference_center")
+
+    def __init__(self, name, banner, text=(), reject=(), settings=(), preference_center=()):
+        self.name = name
+        self.banner = list(banner)
+        self.text = list(text)
+        self.reject = list(reject)
+        self.settings = list(settings)
+        self.preference_center = list(preference_center)
+
+    def selectors(self, role):
+        """Returns the selectors of a role (empty list if the CMP has none)."""
+        return list(getattr(self, role))
+
+    async def find(self, page_or_frame, role):
+        """Returns the first visible element of a role, or None."""
+        for selector in self.selectors(role):
+            element = await page_or_frame.query_selector(selector)
+            if element and await element.is_visible():
+                return element
+        return None
+
+
+CMP_STRATEGIES = {
+    "OneTrust": CMPStrategy(
+        "OneTrust",
+        banner=['#onetrust-banner-sdk'],
+        text=['#onetrust-policy-text'],
+        reject=['#onetrust-reject-all-handler'],
+        settings=['#onetrust-pc-btn-handler'],
+        preference_center=['#onetrust-pc-sdk'],
+    ),
+    "Cookiebot": CMPStrategy(
+        "Cookiebot",
+        banner=['#CybotCookiebotDialog'],
+        text=['#CybotCookiebotDialogBodyContentText'],
+        reject=['#CybotCookiebotDialogBodyButtonDecline'],
+        settings=['#CybotCookiebotDialogBodyLevelButtonCustomize', '#CybotCookiebotDialogNavDetails',
+                  '#CybotCookiebotDialogBodyLevelDetailsButton'],
+        preference_center=['#CybotCookiebotDialogTabContentDetails', '#CybotCookiebotDialog'],
+    ),
+    "Usercentrics": CMPStrategy(
+        "Usercentrics",  # Version 2 renders into an open shadow root, Playwright selectors pierce it
+        banner=["[data-testid='uc-default-banner']", '#uc-main-dialog'],
+        text=["[data-testid='uc-message-container']", '#uc-privacy-description'],
+        reject=["[data-testid='uc-deny-all-button']", "button[data-action-type='deny']"],
+        settings=["[data-testid='uc-more-button']", "button[data-action-type='more']"],
+        preference_center=["[data-testid='uc-center-container']", '#uc-center-container'],
+    ),
+    "Borlabs": CMPStrategy(
+        "Borlabs",
+        banner=['#BorlabsCookieBox', 'div.brlbs-cmpnt-container'],
+        text=['#BorlabsCookieBox .cookie-box', '.brlbs-cmpnt-dialog-description'],
+        reject=['#BorlabsCookieBox [data-cookie-refuse]', '.brlbs-btn-accept-only-essential'],
+        settings=['#BorlabsCookieBox [data-cookie-individual]', '.brlbs-btn-preferences'],
+        preference_center=['#BorlabsCookieBox .cookie-preference', '.brlbs-cmpnt-preferences'],
+    ),
+    "CCM19": CMPStrategy(
+        "CCM19",
+        banner=['div.ccm-modal', '#ccm-widget > div'],
+        text=['div.ccm-modal--body'],
+        reject=['button.ccm--decline-cookies'],
+        settings=['button[data-ccm-modal="ccm-control-panel"]'],
+        preference_center=['#ccm-control-panel', 'div[class*="ccm-control-panel"]'],
+    ),
+    "CookieScript": CMPStrategy(
+        "CookieScript",
+        banner=['#cookiescript_injected'],
+        text=['#cookiescript_description'],
+        reject=['#cookiescript_reject'],
+        settings=['#cookiescript_manage'],
+        preference_center=['#cookiescript_cookietablewrap'],
+    ),
+    "consentmanager": CMPStrategy(
+        "consentmanager",
+        banner=['#cmpbox'],
+        text=['#cmpboxcontent .cmpboxtxt', '#cmpboxcontent'],
+        reject=['#cmpbox .cmpboxbtnno'],
+        settings=['#cmpbox .cmpboxbtncustom'],
+        preference_center=['#cmpbox2'],
+    ),
+    "TrustCommander": CMPStrategy(
+        "TrustCommander",
+        banner=['#popin_tc_privacy', '#footer_tc_privacy'],
+        text=['#popin_tc_privacy_text', '#footer_tc_privacy_text'],
+        reject=['#popin_tc_privacy_button_2', '#footer_tc_privacy_button_2'],
+        settings=['#popin_tc_privacy_button_3', '#footer_tc_privacy_button_3'],
+        preference_center=['#privacy-iframe', '#privacy-cat-modal'],
+    ),
+}
+
+# Detected CMP per page or frame, so the checks sharing a page probe it only once
+_detected = weakref.WeakKeyDictionary()
+
+
+async def detect_cmp(page_or_frame):
+    """
+    Identifies the consent management platform of a page or frame.
+
+    :return: The CMPStrategy of the platform, or None for unknown (custom) banners
+    """
+    try:
+        return _detected[page_or_frame]
+    except (KeyError, TypeError):
+        pass
+    try:
+        name = await page_or_frame.evaluate(_DETECT_CMP)
+    except Exception as e:
+        print(f"CMP detection failed: {e}")
+        return None
+    strategy = CMP_STRATEGIES.get(name)
+    print(f"Detected consent management platform: {name or 'unknown'}")
+    if strategy is not None:
+        # Unknown results are not stored, the CMP script may still be loading
+        try:
+            _detected[page_or_frame] = strategy
+        except TypeError:
+            pass  # Object can not be weakly referenced, detect again next time
+    return strategy
+
+
+async def cmp_selectors(page_or_frame, role, fallback):
+    """
+    Returns the selectors to try for a role: those of the detected CMP first,
+    the generic `fallback` selectors only afterwards (or alone for unknown CMPs).
+
+    :param role: One of CMPStrategy.ROLES
+    :param fallback: List of generic selectors of the checker
+    """
+    strategy = await detect_cmp(page_or_frame)
+    if strategy is None:
+        return list(fallback)
+    own = strategy.selectors(role)
+    return own + [selector for selector in fallback if selector not in own]
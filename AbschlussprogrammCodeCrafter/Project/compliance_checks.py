@@ -0,0 +1,278 @@
+from browser_pool import browser_pool
+from page_session import PageSession
+from newsletter_locator import NewsletterLocator
+from check_registry import registry
+from har_archive import current_archive
+import dom_fingerprint
+
+# The compliance checkers, each module is imported when its check runs for the first time
+# (or when the app warms up in the background), so importing the app stays fast
+CookieBannerVis = registry.checker("cookie_banner_visibility", "CookieBannerVis")
+WithoutConsentChecker = registry.checker("cookie_banner_without_consent", "WithoutConsentChecker")
+CookieSelectionChecker = registry.checker("cookie_options", "CookieSelectionChecker")
+CookieBannerText = registry.checker("cookie_banner_text", "CookieBannerText")
+CookieBannerLinkValidator = registry.checker("cookie_banner_link_checker", "CookieBannerLinkValidator")
+ScrollbarChecker = registry.checker("cookie_banner_scrollbar", "ScrollbarChecker")
+ConformDesignChecker = registry.checker("cookie_banner_conform_design", "ConformDesignChecker")
+CookieInfoChecker = registry.checker("cookie_more_information", "CookieInfoChecker")
+CookiePreferenceVis = registry.checker("cookie_preference_center_vis", "CookiePreferenceVis")
+CookiePreferenceLinkValidator = registry.checker("cookie_preference_clickable_links", "CookiePreferenceLinkValidator")
+ClearCTA = registry.checker("check_clear_cta", "ClearCTA")
+AgeLimitation = registry.checker("check_age_limitation", "AgeLimitation")
+NewsletterWording = registry.checker("check_newsletter_wording", "NewsletterWording")
+NewsletterFunctionality = registry.checker("check_newsletter_functionality", "NewsletterFunctionality")
+MoreDetails = registry.checker("check_newsletter_more_details", "MoreDetails")
+ImprintChecker = registry.checker("imprint_checker", "ImprintChecker")
+AsyncImprintVisibilityChecker = registry.checker("imprint_visibility_checker", "AsyncImprintVisibilityChecker")
+FooterLinkChecker = registry.checker("pagefooter", "FooterLinkChecker")
+AsyncFooterValidator = registry.checker("pagefooter_essentials", "AsyncFooterValidator")
+
+# IMPORTANT !
+# To add a criterion, register a check here. The check declares what it needs (see the
+# prerequisites below) and returns (result, feedback), the scheduler takes care of the rest.
+# The order of the registrations is the order of the criteria in the report.
+# Results are cached: declare the template keys a check uses with `templates=` and increase
+# `version=` whenever the logic of a check changes, otherwise old results are reused.
+
+
+# ---------------------------------------------------------------------------
+# Prerequisites shared by several checks (computed once per scan)
+# ---------------------------------------------------------------------------
+
+@registry.prerequisite("landing_page")
+async def landing_page(scan, needs):
+    """The landing page, loaded once and shared by the cookie banner checks."""
+    # "layout" instead of "text": the scrollbar check measures the banner on this page
+    return await scan.enter(PageSession(scan.url, policy=scan.resource_policy("layout")))
+
+
+@registry.prerequisite("browser")
+async def browser(scan, needs):
+    """A pooled browser for checkers that open several contexts themselves."""
+    return await scan.enter(browser_pool.browser())
+
+
+@registry.prerequisite("imprint")
+async def imprint(scan, needs):
+    """The imprint (URL and text of the imprint page), resolved once and cached across scans."""
+    from imprint_resolver import imprint_resolver, Imprint  # BeautifulSoup and aiohttp are only loaded for a scan
+    # The resolver does not use the browser, so its result is stored in the HAR archive of the scan
+    archive = current_archive.get()
+    if archive is not None and archive.replaying:
+        return Imprint(**archive.values.get("imprint", {"url": None, "error": "Not recorded"}))
+    imprint = await imprint_resolver.resolve(scan.url)
+    if archive is not None:
+        archive.remember("imprint", {"url": imprint.url, "text": imprint.text, "error": imprint.error})
+    return imprint
+
+
+@registry.prerequisite("newsletter_target", requires=("landing_page",))
+async def newsletter_target(scan, needs):
+    """The newsletter page of the website, found once and shared by the newsletter checks."""
+    return await NewsletterLocator(policy=scan.resource_policy("text")).locate(scan.url, needs["landing_page"])
+
+
+@registry.prerequisite("newsletter_page", requires=("newsletter_target",))
+async def newsletter_page(scan, needs):
+    """The newsletter page (with an opened newsletter modal), loaded once per scan."""
+    return await scan.enter(needs["newsletter_target"].session(scan.resource_policy("text")))
+
+
+@registry.prerequisite("templates")
+async def templates(scan, needs):
+    """The templates of the user (read from the session before the scan started)."""
+    return scan.templates
+
+
+# Fingerprints of the input of the checks. They are cheap compared to the checks themselves
+# (clicks, device emulations, crawls), if one did not change the previous result is carried forward.
+
+@registry.prerequisite("banner_fingerprint", requires=("landing_page",))
+async def banner_fingerprint(scan, needs):
+    """Fingerprint of the markup of the cookie banner (and preference center) on the landing page."""
+    return await dom_fingerprint.banner_fingerprint(await needs["landing_page"].shared_page())
+
+
+@registry.prerequisite("newsletter_fingerprint", requires=("newsletter_page",))
+async def newsletter_fingerprint(scan, needs):
+    """Fingerprint of the newsletter form."""
+    page = await needs["newsletter_page"].shared_page()
+    return await dom_fingerprint.region_fingerprint(page, dom_fingerprint.NEWSLETTER_FORM_SELECTORS)
+
+
+@registry.prerequisite("imprint_fingerprint", requires=("imprint",))
+async def imprint_fingerprint(scan, needs):
+    """Fingerprint of the imprint URL and text."""
+    imprint = needs["imprint"]
+    return dom_fingerprint.fingerprint([imprint.url, imprint.text]) if imprint.text else None
+
+
+@registry.prerequisite("footer_fingerprint", requires=("landing_page",))
+async def footer_fingerprint(scan, needs):
+    """Fingerprint of the footer of the landing page."""
+    page = await needs["landing_page"].shared_page()
+    return await dom_fingerprint.region_fingerprint(page, dom_fingerprint.FOOTER_SELECTORS, frames=False)
+
+
+# ---------------------------------------------------------------------------
+# Cookie banner
+# ---------------------------------------------------------------------------
+
+@registry.check("Cookie Banner Visibility", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_banner_visibility(scan, needs):
+    return await CookieBannerVis().check_visibility(scan.url, needs["landing_page"])
+
+
+@registry.check("Continue Without Consent Link", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def continue_without_consent(scan, needs):
+    return await WithoutConsentChecker().check_ohne_einwilligung_link(scan.url, needs["landing_page"])
+
+
+@registry.check("Cookie Selection", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_selection(scan, needs):
+    return await CookieSelectionChecker().check_cookie_selection(scan.url, needs["landing_page"])
+
+
+@registry.check("Cookie Banner Text Comparison", requires=("landing_page", "templates"), resource="browser", templates=("cookie_policy",), fingerprint="banner_fingerprint")
+async def cookie_banner_text(scan, needs):
+    checker = CookieBannerText()
+    try:
+        website_text = await checker.extract_cookie_banner_text(scan.url, needs["landing_page"])
+        cookie_policy_template = needs["templates"]['cookie_policy']  # Access the 'cookie_policy' template
+        result, similarity, feedback = checker.compare_cookie_banner_text(website_text, cookie_policy_template)
+        return result, feedback
+    except Exception as e:
+        return False, f"Error during text comparison: {e}"
+
+
+@registry.check("Cookie Banner Links to Imprint and Privacy Policy", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_banner_links(scan, needs):
+    return await CookieBannerLinkValidator().check_banner_and_links(scan.url, needs["landing_page"])
+
+
+@registry.check("Cookie Banner Scrollbar", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint", version=2)
+async def cookie_banner_scrollbar(scan, needs):
+    return await ScrollbarChecker().check_cookie_banner_with_scrollbar(scan.url, needs["landing_page"])
+
+
+@registry.check("Conform Design", requires=("browser",), resource="browser", fingerprint="banner_fingerprint")
+async def conform_design(scan, needs):
+    # Checks if the cookie banner follows a predefined layout and styling rules on several devices
+    return await ConformDesignChecker().check_all_conformity(needs["browser"], scan.url, scan.resource_policy("layout"))
+
+
+@registry.check("Cookie Preference Accessibility", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_preference_accessibility(scan, needs):
+    return await CookiePreferenceVis().check_visibility_and_preference_center(scan.url, needs["landing_page"])
+
+
+@registry.check("Cookie Preference Center Links to Imprint and Privacy Policy", requires=("landing_page",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_preference_links(scan, needs):
+    return await CookiePreferenceLinkValidator().check_preference_links(scan.url, needs["landing_page"])
+
+
+@registry.check("Cookie Prefence Center More Info", requires=("browser",), resource="browser", fingerprint="banner_fingerprint")
+async def cookie_more_info(scan, needs):
+    return await CookieInfoChecker().find_more_info_buttons(needs["browser"], scan.url, scan.resource_policy("text"))
+
+
+# ---------------------------------------------------------------------------
+# Newsletter
+# ---------------------------------------------------------------------------
+
+@registry.check("Clear CTA", requires=("newsletter_page",), resource="browser", fingerprint="newsletter_fingerprint")
+async def clear_cta(scan, needs):
+    return await ClearCTA(scan.url).check_clear_cta(needs["newsletter_page"])
+
+
+@registry.check("Age Limitation", requires=("newsletter_page", "landing_page"), resource="browser", fingerprint="newsletter_fingerprint")
+async def age_limitation(scan, needs):
+    return await AgeLimitation(scan.url).check_age_limitation(needs["newsletter_page"], needs["landing_page"])
+
+
+@registry.check("Newsletter Wording", requires=("newsletter_page", "templates"), resource="browser", templates=("newsletter",), fingerprint="newsletter_fingerprint")
+async def newsletter_wording(scan, needs):
+    try:
+        newsletter_template = needs["templates"]['newsletter']
+        conformity, similarity, feedback = await NewsletterWording(scan.url).check_newsletter_wording(scan.url, newsletter_template, needs["newsletter_page"])
+        return conformity, feedback
+    except Exception as e:
+        return False, f"<strong>Error during newsletter text check:</strong> {e}"
+
+
+@registry.check("Newsletter Functionality", requires=("newsletter_page",), resource="browser", fingerprint="newsletter_fingerprint")
+async def newsletter_functionality(scan, needs):
+    try:
+        link_results, feedback = await NewsletterFunctionality(scan.url).check_newsletter_functionality(needs["newsletter_page"])
+    except Exception:
+        return False, "Error during newsletter functionality check."
+    return (all(link_results.values()) if isinstance(link_results, dict) else False), feedback
+
+
+@registry.check("Newsletter More Details", requires=("newsletter_page", "templates"), resource="browser", templates=("newsletterdetail",), fingerprint="newsletter_fingerprint")
+async def newsletter_more_details(scan, needs):
+    try:
+        newsletter_more_details_template = needs["templates"]['newsletterdetail']
+        conformity, similarity, feedback = await MoreDetails(scan.url).check_newsletter_more_details(
+            expected_text=newsletter_more_details_template, session=needs["newsletter_page"])
+        return conformity, feedback
+    except Exception as e:
+        return False, f"<strong>Error during More Details check:</strong> {e}"
+
+
+# ---------------------------------------------------------------------------
+# Imprint and page footer
+# ---------------------------------------------------------------------------
+
+@registry.check("Imprint URL", requires=("imprint",))
+async def imprint_url(scan, needs):
+    url = needs["imprint"].url
+    return bool(url), f"Imprint found at {url}." if url else "No valid Imprint link found."
+
+
+@registry.check("Imprint Visibility", requires=("imprint",), resource="browser", fingerprint="imprint_fingerprint")
+async def imprint_visibility(scan, needs):
+    # An empty string skips the second search for the imprint link
+    return await AsyncImprintVisibilityChecker().check_scrollable(
+        scan.url, needs["imprint"].url or "", scan.resource_policy("layout"))
+
+
+@registry.check("Footer Links", resource="http", fingerprint="footer_fingerprint")
+async def footer_links(scan, needs):
+    footer_failed_links = await FooterLinkChecker().check_footer_links_on_all_pages(scan.url)
+    if footer_failed_links:
+        return False, f"The following footer links do not work: {', '.join(footer_failed_links)}"
+    return True, "All footer links work properly."
+
+
+@registry.check("Footer Essentials", resource="http", fingerprint="footer_fingerprint",
+                criteria=("Footer Imprint", "Footer privacy policy", "Footer cookie settings"))
+async def footer_essentials(scan, needs):
+    try:
+        footer_results = await AsyncFooterValidator().check_footer_links(scan.url)
+    except Exception as e:
+        print(f"Error during footer check: {e}")
+        footer_results = {"imprint": False, "privacy policy": False, "cookie": False}
+    return {
+        "Footer Imprint": (footer_results.get("imprint", False),
+                           "Imprint-Link found." if footer_results.get("imprint") else "Imprint link missing!"),
+        "Footer privacy policy": (footer_results.get("privacy policy", False),
+                                  "Privacy policy link found." if footer_results.get("privacy policy") else "privacy policy link is missing!"),
+        "Footer cookie settings": (footer_results.get("cookie", False),
+                                   "Cookie settings link found." if footer_results.get("cookie") else "Cookie settings link missing!"),
+    }
+
+
+@registry.check("Imprint Terms", requires=("imprint", "templates"), templates=("additional_imprint",),
+                criteria=lambda templates: [f"Imprint Term: {term}" for term in templates.get('additional_imprint') or []])
+async def imprint_terms(scan, needs):
+    additional_imprint = needs["templates"].get('additional_imprint', [])
+    print("Debug (imprint_terms): Loaded additional_imprint:", additional_imprint)  # Debugging
+    if not additional_imprint:
+        print("No additional Imprint terms found.")
+    _, term_results, _, _ = await ImprintChecker().check_terms(scan.url, additional_imprint, needs["imprint"])
+    print("Debug (imprint_terms): Term Results:", term_results)
+    return {
+        f"Imprint Term: {term}": (found, f"Term '{term}' was found." if found else f"Term '{term}' was not found.")
+        for term, found in term_results.items()
+    }
@@ -1,5 +1,8 @@
 from playwright.async_api import async_playwright
 import asyncio
+from cmp_detection import cmp_selectors
+from navigation_policy import navigation_policy
+from har_archive import new_context, close_context
 
 class ConformDesignChecker:
     # Default selectors for various cookie-related elements
@@ -232,7 +235,7 @@ class ConformDesignChecker:
         """
         self.selectors = selectors or self.DEFAULT_SELECTORS
 
-    async def check_all_conformity(self, browser, url):
+    async def check_all_conformity(self, browser, url, policy=None):
         """
         Perform all checks for conformity in one function:
         1. Check if 'Cookie Settings' is at the bottom-left.
@@ -240,20 +243,25 @@ class ConformDesignChecker:
         3. Check if buttons 'Alle akzeptieren' and 'Auswahl speichern' are the same size and aligned.
         4. Ensure readable font size for cookie banner elements.
         5. Test responsiveness across multiple devices.
+
+        :param policy: Optional ResourcePolicy applied to every context (positions and font sizes need the "layout" profile)
         """
         feedback = f"<strong>Conform Design Check:</strong><br>"
         design_conform = True
+        context = None
 
         try:
             # Create a page and navigate to the URL
-            context = await browser.new_context()
+            context = await new_context(browser)
+            if policy is not None:
+                await policy.apply(context)
             page = await context.new_page()
-            await page.goto(url)
+            await navigation_policy.goto(page, url)
             
 
             # 1. Check if "Cookie-Einstellungen" is at the bottom-left
             cookie_settings = None
-            for selector in self.selectors["cookie_settings"]:
+            for selector in await cmp_selectors(page, "settings", self.selectors["cookie_settings"]):
                 cookie_settings = await page.query_selector(selector)
                 if cookie_settings:
                     break
@@ -363,7 +371,7 @@ class ConformDesignChecker:
 
             # 4. Check font size for all elements in the cookie banner
             cookie_banner = None
-            for selector in self.selectors["cookie_banner"]:
+            for selector in await cmp_selectors(page, "banner", self.selectors["cookie_banner"]):
                 cookie_banner = await page.query_selector(selector)
                 if cookie_banner:
                     break
@@ -389,18 +397,22 @@ class ConformDesignChecker:
             ]
 
             for device in devices:
+                device_context = None
                 try:
                     # Create a context for the specific device
-                    context = await browser.new_context(
+                    device_context = await new_context(
+                        browser,
                         viewport=device["viewport"],
                         user_agent=device["user_agent"]
                     )
-                    page = await context.new_page()
-                    await page.goto(url, wait_until="load")
+                    if policy is not None:
+                        await policy.apply(device_context)
+                    page = await device_context.new_page()
+                    await navigation_policy.goto(page, url, wait_until="load")
 
                     # Check for cookie banner visibility
                     cookie_banner = None
-                    for selector in self.selectors["cookie_banner"]:
+                    for selector in await cmp_selectors(page, "banner", self.selectors["cookie_banner"]):
                         cookie_banner = await page.query_selector(selector)
                         if cookie_banner:
                             break
@@ -410,14 +422,17 @@ class ConformDesignChecker:
                     else:
                         design_conform = False
                         feedback += f"<strong><strong>Warning:</strong> Cookie banner is not visible on {device['name']}.</strong><br>"
-
-                    await context.close()
                 except Exception as e:
                     feedback += f"<strong>Error:</strong> Device check failed for {device['name']} with error: {str(e)}.<br>"
+                finally:
+                    await close_context(device_context)
 
         except Exception as e:
             design_conform = False
             feedback += f"<strong>Error:</strong> {str(e)}<br>"
+        finally:
+            # The browser is lent by the pool, only the contexts of this check are closed
+            await close_context(context)
 
         return design_conform, feedback
 
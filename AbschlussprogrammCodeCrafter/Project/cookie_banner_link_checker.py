@@ -1,56 +1,15 @@
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import cmp_selectors
+from banner_selectors import BANNER_SELECTORS, collect_banner_candidates, large_candidates, candidate_element
 import asyncio
-from langdetect import detect
+from language_service import language_service
 
 
 class CookieBannerLinkValidator:
     def __init__(self):
         # List of common selectors for cookie banners on various websites
-        self.common_selectors = [
-            'div.sticky',
-            'div.hp__sc-yx4ahb-7',
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'p.hp__sc-hk8z4-0',
-            'button.hp__sc-9mw778-1',
-            'div.cmp-container',
-            'div.ccm-modal-inner',
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            '#cookiescript_injected', #radbag
-            'div[role="dialog"]',
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]',
-            'div[class*="consent"]',
-            'div[id*="banner"]',
-            'div[class*="cookie-banner"]',
-            '//*[@id="page-id-46"]/div[3]/div/div/div',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]',
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]',
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',
-            'div#BorlabsCookieBox',
-            'div#BorlabsCookieWidget',
-            'div.elementText',
-            'h3:has-text("Datenschutzhinweis")',
-            '#imprintLinkb',  # Added selector for Imprint link
-            '#uc-main-dialog',  # Specific selector for Dr. Oetker cookie banner
-        ]
+        self.common_selectors = BANNER_SELECTORS
         # Additional specific selector for Dr. Oetker cookie banner
         self.specific_selector = "#uc-main-dialog"  # Selector for Dr. Oetker cookie banner
         # Common text values for Privacy Policy and Imprint links in different languages
@@ -61,60 +20,35 @@ class CookieBannerLinkValidator:
         self.global_imprint_selector = '#imprintLinkb' # for 1&1
         self.global_privacy_selector = '#privacyPolicyLinkb' # for 1&1
 
-    async def is_visible_cookie_banner(self, page_or_frame):
-        """Detect visible cookie banners with size checks."""
-        for selector in self.common_selectors:
-            elements = await page_or_frame.query_selector_all(selector)
-            for element in elements:
-                if element and await element.is_visible():
-                    box = await element.bounding_box()
-                    if box and box['width'] > 300 and box['height'] > 50:
-                        return selector
-        return None
-
-    async def check_banner_and_links(self, url):
-        """Checks for the presence of a cookie banner and validates Privacy Policy and Imprint links."""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36"
-            )
-            page = await context.new_page()
-
-            try:
-                print(f"Visiting URL: {url}")
-                # Retry mechanism for page load
-                for attempt in range(5):
-                    try:
-                        await page.goto(url, timeout=60000)
-                        await page.wait_for_load_state("networkidle")
-                        break
-                    except TimeoutError:
-                        print(f"Attempt {attempt + 1} failed. Retrying...")
-                else:
-                    return False, "Page failed to load after multiple attempts."
-
-                # Check for visible cookie banners
-                cookie_banner_selector = await self.is_visible_cookie_banner(page)
-                if not cookie_banner_selector:
-                    # Check iframes for cookie banners
-                    iframes = await page.query_selector_all('iframe')
-                    for iframe in iframes:
-                        iframe_content = await iframe.content_frame()
-                        if iframe_content:
-                            cookie_banner_selector = await self.is_visible_cookie_banner(iframe_content)
-                            if cookie_banner_selector:
-                                break
-
-                if not cookie_banner_selector:
+    async def is_visible_cookie_banner(self, page):
+        """
+        Detect visible cookie banners with size checks (selectors of a known CMP first).
+        The page and its iframes are evaluated in one call each, returns the first candidate or None.
+        """
+        selectors = await cmp_selectors(page, "banner", self.common_selectors)
+        candidates = large_candidates(await collect_banner_candidates(page, selectors))
+        return candidates[0] if candidates else None
+
+    async def check_banner_and_links(self, url, session=None):
+        """
+        Checks for the presence of a cookie banner and validates Privacy Policy and Imprint links.
+        Uses the already loaded landing page of `session` if one is given.
+        """
+        try:
+            async with landing_page(url, session) as page:
+                # Check for visible cookie banners (main document and iframes)
+                candidate = await self.is_visible_cookie_banner(page)
+                if not candidate:
                     return False, "No visible cookie banner found."
 
-                print(f"Cookie banner detected using selector: {cookie_banner_selector}")
-                cookie_banner = await page.query_selector(cookie_banner_selector)
+                print(f"Cookie banner detected using selector: {candidate['selector']}")
+                cookie_banner = await candidate_element(candidate)
+                if not cookie_banner:
+                    return False, "No visible cookie banner found."
 
                  # Detect language of the banner
                 banner_text = await cookie_banner.inner_text()
-                detected_language = detect(banner_text)
+                detected_language = await language_service.detect(cookie_banner, banner_text)
                 print(f"Detected banner language: {detected_language}")
 
                 # Set texts to check based on detected language
@@ -141,13 +75,12 @@ class CookieBannerLinkValidator:
                 else:
                     return False, f"<strong>Validation failed:</strong><br>{privacy_feedback}{imprint_feedback}"
 
-            except TimeoutError:
-                return False, "Page load timed out."
-            except Exception as e:
-                return False, f"An error occurred: {e}"
-            finally:
-                await context.close()
-                await browser.close()
+        except PageLoadError as e:
+            return False, str(e)
+        except TimeoutError:
+            return False, "Page load timed out."
+        except Exception as e:
+            return False, f"An error occurred: {e}"
     async def validate_links(self, cookie_banner, texts):
         """Helper function to validate links for specific texts."""
         found = clickable = False # Initialize status variables
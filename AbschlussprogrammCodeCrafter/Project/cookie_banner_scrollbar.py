@@ -1,47 +1,14 @@
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import cmp_selectors
+from banner_selectors import BANNER_SELECTORS, SCROLL_CONTAINER_SELECTORS, collect_banner_candidates, find_cookie_banner, candidate_element
 import asyncio
 
 
 class ScrollbarChecker:
     def __init__(self):
-        self.common_selectors = [
-            # 🔹 Allgemeine Cookie-Banner Selektoren (höchste Priorität für breite Abdeckung)
-            'div[class*="cookie"]', # Santander, Gemeinde Wasserburg, VDZ
-            'div[class*="consent"]', # Veri veri verivox :), 1&1 , Kneip
-            'div[class*="cookie-banner"]',
-            'div.cc-banner',
-            'section.consentDrawer', # BMW Group
-            
-            # 🔹 OneTrust und ähnliche Frameworks
-            'div.ot-cat-lst',  # Scrollbare Liste innerhalb des OneTrust Banners (Loreal)
-            'div.ot-scrollbar',  # Scrollbare Bereiche in OneTrust
-            '#onetrust-banner-sdk',  # Hauptcontainer OneTrust (Loreal, Henkel, Kao, Weleda, Schwarzkopf, Wagner, just spices, royal canin, Gardena, Husqvarna, Kärcher, Saint-Gobain, aldi, aldi süd)
-            '#onetrust-banner-sdk > div > div.ot-sdk-container.ot-scrollbar',
-            
-            # 🔹 Webseite-spezifische Selektoren (niedrigere Priorität)
-            '#cmpboxcontent',  # Beiersdorf, tesa, Huber Burda Media
-            '#CybotCookiebotDialog',  # Franken Brunnen, brandt-zwieback, weber, tetesept, ivoclar vivadent, Landesanstalt für Medien nrw
-            '#page-id-46 > div.l-module.p-privacy-settings.t-ui-light.is-visible > div > div > div',  # Griesson
-            '#uc-main-dialog', # Dr. Oetker
-            '[data-testid="uc-default-banner"]',  # Hochland, coa
-            '#popin_tc_privacy', # danone
-            '#privacydialog\\:desc',   # Hassia scrollbar
-            'body > div.cookie-layer-advanced.state-visible', # Hansgrohe
-            '#uc-center-container', # blanco
-            '#cookie-law-info-bar', # Vendis capital
-            '#cookiescript_injected', # radbag (it has hidden checkboxs)
-            '#ccm-widget > div', # Merz, ding 
-            'div.brlbs-cmpnt-container', # Ehiner-Energie
-            'h3:has-text("Datenschutzhinweis")', # SWHN
-            'body > div > div > div.om-cookie-panel.active', # CAU
-           
-            # 🔹 Urlaubspiraten spezifische Selektoren
-            'div.hp__sc-yx4ahb-7',
-            'p.hp__sc-iv4use-0',
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div', # Urlaubspiraten
-            'p.hp__sc-hk8z4-0',
-            'button.hp__sc-9mw778-1'
-        ]
+        # Scroll containers of known banners first, then the selector catalogue
+        self.common_selectors = SCROLL_CONTAINER_SELECTORS + BANNER_SELECTORS
 
     async def is_scrollable(self, page, element):
         """
@@ -122,57 +89,51 @@ class ScrollbarChecker:
             # Handle errors and return an error message
             return False, f"Error checking overflow: {str(e)}"
 
-    async def check_cookie_banner_with_scrollbar(self, url):
+    async def check_cookie_banner_with_scrollbar(self, url, session=None):
         """
         Check if the cookie banner has overflowing elements and whether it has a scrollbar.
+        Uses the already loaded landing page of `session` if one is given.
         """
-        async with async_playwright() as p:
-            # Launch a headless browser session
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            try:
-                print(f"Navigating to {url}...")
-                # Load the webpage and wait until network activity is idle
-                await page.goto(url, timeout=30000)
-                await page.wait_for_load_state("networkidle")
-
-                # Iterate through a list of common cookie banner selectors
-                for selector in self.common_selectors:
-                    element = await page.query_selector(selector)
-                    if element and await element.is_visible(): # Check if the element exists and is visible
-                        print(f"Cookie banner detected with selector: {selector}")
-
-                        # Check if any child elements inside the banner overflow
-                        children_overflow, overflow_feedback = await self.check_overflow(page, element)
-
-                        # Check if the parent element (cookie banner) has a scrollbar
-                        parent_scrollable, parent_feedback = await self.is_scrollable(page, element)
-
-                        # Debugging output to provide insights into checks
-                        print(f"🔍 Overflow Check: {overflow_feedback}")
-                        print(f"🔍 Parent Scrollbar Check: {parent_feedback}")
-
-                        # **Rules for Conformity**
-                        if children_overflow and not parent_scrollable:
-                            return False, f"Not Conform: Overflow detected but no scrollbar available. {parent_feedback}"
-                        elif children_overflow and parent_scrollable:
-                            return True, f"Conform: Overflow detected and scrollbar is present."
-                        elif not children_overflow and parent_scrollable:
-                            return False, f"Not Conform: No overflow, but scrollbar is unnecessarily present. {parent_feedback}"
-                        else:
-                            return True, "Conform: No overflow, no scrollbar needed."
+        try:
+            async with landing_page(url, session) as page:
+                # The banner selectors of a known CMP, then the common cookie banner selectors, evaluated in one call.
+                # The first large candidate with cookie wording is the banner (not e.g. a sticky header).
+                selectors = await cmp_selectors(page, "banner", self.common_selectors)
+                banner = find_cookie_banner(await collect_banner_candidates(page, selectors, frames=False))
+                element = await candidate_element(banner) if banner else None
+                if element:
+                    print(f"Cookie banner detected with selector: {banner['selector']}")
+
+                    # Check if any child elements inside the banner overflow
+                    children_overflow, overflow_feedback = await self.check_overflow(page, element)
+
+                    # Check if the parent element (cookie banner) has a scrollbar
+                    parent_scrollable, parent_feedback = await self.is_scrollable(page, element)
+
+                    # Debugging output to provide insights into checks
+                    print(f"🔍 Overflow Check: {overflow_feedback}")
+                    print(f"🔍 Parent Scrollbar Check: {parent_feedback}")
+
+                    # **Rules for Conformity**
+                    if children_overflow and not parent_scrollable:
+                        return False, f"Not Conform: Overflow detected but no scrollbar available. {parent_feedback}"
+                    elif children_overflow and parent_scrollable:
+                        return True, f"Conform: Overflow detected and scrollbar is present."
+                    elif not children_overflow and parent_scrollable:
+                        return False, f"Not Conform: No overflow, but scrollbar is unnecessarily present. {parent_feedback}"
+                    else:
+                        return True, "Conform: No overflow, no scrollbar needed."
 
                 # If no visible cookie banner is found, return a failure message
                 return False, "No visible cookie banner found."
-            except TimeoutError:
-                # Handle timeout errors when loading the page
-                return False, "Page load timeout."
-            except Exception as e:
-                # Catch and return other errors encountered during execution
-                return False, f"Error: {str(e)}"
-            finally:
-                await browser.close()
+        except PageLoadError as e:
+            return False, str(e)
+        except TimeoutError:
+            # Handle timeout errors when loading the page
+            return False, "Page load timeout."
+        except Exception as e:
+            # Catch and return other errors encountered during execution
+            return False, f"Error: {str(e)}"
 
 """
 # Example Usage
@@ -1,47 +1,18 @@
-from playwright.async_api import async_playwright
-from difflib import SequenceMatcher
-from spellchecker import SpellChecker
+from page_session import landing_page
+from cmp_detection import cmp_selectors
+from text_similarity import prepare_template
+from spell_service import spell_service
 import re
 import asyncio
-from langdetect import detect
+from language_service import language_service
 
 
 class CookieBannerText:
     def __init__(self):
         """
-        Initializes the CookieBannerText class, setting up spell checkers for German and English 
-        and defining common, specific, and excluded selectors for cookie banners.
+        Initializes the CookieBannerText class, defining common, specific, and excluded selectors for cookie banners.
+        Spell checking uses the shared spell_service, the dictionaries are loaded once per process.
         """
-        # Initialize PySpellChecker for German and English languages
-        self.spell_checker = SpellChecker(language='de')
-        self.spell_checker_en = SpellChecker(language='en')
-        # Add custom German words to avoid false spelling errors
-        self.spell_checker.word_frequency.load_words([
-            "Drittunternehmen",
-            "Einwilligungsbedürftige",
-            "Datenschutzerklärung",
-            "Rechtsgrundlagen",
-            "Einwilligung",
-            "Zweck", "z",  # Abbreviation for 'z.B.'
-            "ID",  # As part of 'Nutzer-ID'
-            "Datenschutzinformationen",
-            "zuzuschneiden",
-            "Onlineangeboten",
-            "Marketingbemühungen",
-            "Auswertungsmöglichkeiten",
-            "Schaltfläche",
-            "Überwachungszwecken",
-            "Rechtsbehelfsmöglichkeiten",
-            "Widerrufsmöglichkeit",
-            'Verarbeitungsvorgänge',
-            'Überwachungsprogrammen',
-            'Klagemöglichkeit',
-            'Endgeräteinformationen'
-        ])
-        
-        self.spell_checker_en.word_frequency.load_words([
-            
-        ])
         self.usercentrics_banner_selector = "div[data-testid='uc-default-banner']"
         self.usercentrics_message_selector = "div[data-testid='uc-message-container']"
          # 🔹 **Common Selectors First** (Most Commonly Used Cookie Banners)
@@ -138,91 +109,74 @@ class CookieBannerText:
      
     def detect_language(self, text):
         """
-        Detects the language of a given text using the langdetect library.
+        Detects the language of a given text with the shared language_service (seeded langdetect).
         """
-        try:
-            return detect(text)
-        except Exception:
-            return "unknown"
+        return language_service.text_language(text, default="unknown")
         
     def get_spell_checker(self, language):
         """
         Returns the appropriate spell checker based on the detected language.
         """
-        if language == "de":
-            return self.spell_checker_de
-        elif language == "en":
-            return self.spell_checker_en
-        else:
-            return None
+        if language in ("de", "en"):
+            return spell_service.checker(language)
+        return None
 
-    async def extract_cookie_banner_text(self, url):
+    async def extract_cookie_banner_text(self, url, session=None):
         """
         Extracts the cookie banner text from the website using Playwright.
+        Removes excluded elements from the banner, so it works on a forked page when `session` is given.
         """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                try:
-                    print(f"Visiting URL: {url}")
-                    await page.goto(url, timeout=60000)
-                    
-                    # ✅ **Wait for the page to fully load**
-                    await page.wait_for_load_state("networkidle")
-                    await page.wait_for_selector("body", timeout=15000)  # Ensure DOM is ready
-                    await asyncio.sleep(2)  # Small delay to allow elements to fully render
+            async with landing_page(url, session, mutating=True) as page:
+                # ✅ **Wait for the page to fully load**
+                await page.wait_for_selector("body", timeout=15000)  # Ensure DOM is ready
+                # No extra delay: the page session only hands out the page once the banner has settled
 
-                    print("✅ Page loaded successfully.")
-                    
-                    # Fallback to other selectors
-                    for selector in self.common_selectors:
-                        try:
-                            element = await page.query_selector(selector)
-                            if element and await element.is_visible():
-                                full_text = await element.inner_text()
-                                 # Remove unwanted elements
-                                for exclude_selector in self.excluded_selectors:
-                                    unwanted_elements = await element.query_selector_all(exclude_selector)
-                                    for unwanted in unwanted_elements:
-                                        await unwanted.evaluate("(el) => el.remove()")
+                print("✅ Page loaded successfully.")
+                
+                # Text container of a known CMP first, then the common selectors
+                for selector in await cmp_selectors(page, "text", self.common_selectors):
+                    try:
+                        element = await page.query_selector(selector)
+                        if element and await element.is_visible():
+                            full_text = await element.inner_text()
+                             # Remove unwanted elements
+                            for exclude_selector in self.excluded_selectors:
+                                unwanted_elements = await element.query_selector_all(exclude_selector)
+                                for unwanted in unwanted_elements:
+                                    await unwanted.evaluate("(el) => el.remove()")
 
-                                # Get clean text after removing unwanted elements
-                                clean_text = await element.inner_text()
-                                
-                                print(f"✅ Cookie banner found with selector: {selector}")
-                                print(f"📜 Extracted Clean Text: {clean_text[:500]}...")  # Limiting output length
-                                return clean_text.strip()
+                            # Get clean text after removing unwanted elements
+                            clean_text = await element.inner_text()
                             
-                        except Exception as e:
-                            print(f"Error with selector {selector}: {e}")
-                            continue
-                    
-                    # 🔹 **Check Less Common (Website-Specific) Selectors**
-                    for selector in self.specific_selectors:
-                        try:
-                            element = await page.query_selector(selector)
-                            if element and await element.is_visible():
-                                banner_text = await element.inner_text()
-                                # Remove unwanted elements
-                                for exclude_selector in self.excluded_selectors:
-                                    unwanted_elements = await element.query_selector_all(exclude_selector)
-                                    for unwanted in unwanted_elements:
-                                        await unwanted.evaluate("(el) => el.remove()")
-
-                                # Get clean text after removing unwanted elements
-                                clean_text = await element.inner_text()
+                            print(f"✅ Cookie banner found with selector: {selector}")
+                            print(f"📜 Extracted Clean Text: {clean_text[:500]}...")  # Limiting output length
+                            return clean_text.strip()
+                        
+                    except Exception as e:
+                        print(f"Error with selector {selector}: {e}")
+                        continue
+                
+                # 🔹 **Check Less Common (Website-Specific) Selectors**
+                for selector in self.specific_selectors:
+                    try:
+                        element = await page.query_selector(selector)
+                        if element and await element.is_visible():
+                            banner_text = await element.inner_text()
+                            # Remove unwanted elements
+                            for exclude_selector in self.excluded_selectors:
+                                unwanted_elements = await element.query_selector_all(exclude_selector)
+                                for unwanted in unwanted_elements:
+                                    await unwanted.evaluate("(el) => el.remove()")
 
-                                print(f"✅ Cookie banner found with specific selector: {selector}")
-                                return clean_text.strip()
-                        except Exception as e:
-                            print(f"⚠️ Error using selector {selector}: {e}")
-                            continue
+                            # Get clean text after removing unwanted elements
+                            clean_text = await element.inner_text()
 
-                    
-                   
-                finally:
-                    await browser.close()
+                            print(f"✅ Cookie banner found with specific selector: {selector}")
+                            return clean_text.strip()
+                    except Exception as e:
+                        print(f"⚠️ Error using selector {selector}: {e}")
+                        continue
 
         except Exception as e:
             print(f"❌ Error extracting cookie banner text: {str(e)}")
@@ -235,15 +189,15 @@ class CookieBannerText:
         website_text_c = self.clean_string(website_text)
         template_text_c = self.clean_string(template_text)
 
-        similarity = SequenceMatcher(None, template_text_c, website_text_c).ratio() * 100
+        similarity = prepare_template(template_text_c).similarity(website_text_c)
 
         
         # Extract words and filter only likely German words
         website_words = re.findall(r'\b[A-Za-zäöüßÄÖÜ]+\b', website_text)  # Extract German-like words
-        german_words = [word for word in website_words if re.search(r'[äöüßÄÖÜ]', word) or word.lower() in self.spell_checker]
+        german_words = [word for word in website_words if re.search(r'[äöüßÄÖÜ]', word) or spell_service.known(word, "de")]
         
         # Check spelling mistakes
-        website_mistakes = [word for word in german_words if word.lower() not in self.spell_checker]
+        website_mistakes = spell_service.misspelled(german_words, "de")
 
 
         feedback = f"""
@@ -262,15 +216,16 @@ class CookieBannerText:
         is_conformant = similarity == 100 and len(website_mistakes) == 0
         return is_conformant, similarity, feedback
 
-    async def check_cookie_banner_text(self, url, template_text):
+    async def check_cookie_banner_text(self, url, template_text, session=None):
         """
         Extract cookie banner text from a website and compare it with the template text.
         :param url: URL of the website to check.
         :param template_text: Template text to compare against.
+        :param session: Optional PageSession with the already loaded landing page.
         :return: A tuple containing conformity, similarity, and feedback.
         """
         try:
-            website_text = await self.extract_cookie_banner_text(url)
+            website_text = await self.extract_cookie_banner_text(url, session)
             # If no cookie banner text is found, return immediately without checking spelling mistakes
             if not website_text:
                 return False, 0, "No cookie banner text found on the website."
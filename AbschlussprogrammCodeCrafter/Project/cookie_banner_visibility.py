@@ -1,5 +1,8 @@
 import asyncio
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError, DEFAULT_USER_AGENT
+from cmp_detection import detect_cmp
+from banner_selectors import BANNER_SELECTORS, collect_banner_candidates, find_cookie_banner
 
 
 class CookieBannerVis:
@@ -8,138 +11,36 @@ class CookieBannerVis:
         Initializes the CookieBannerVis class.
         Defines common selectors used to detect cookie banners across various websites.
         """
-        self.common_selectors = [
-            'div.sticky',  # The main sticky container of the cookie banne
-            'div.hp__sc-yx4ahb-7',  # Urlaubspiraten main container
-            'p.hp__sc-iv4use-0',  # Urlaubspiraten specific paragraph
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'div.hp__sc-yx4ahb-7',  # Main container for the cookie banner on Urlaubspiraten
-            'p.hp__sc-hk8z4-0',  # Paragraphs containing cookie consent text
-            'button.hp__sc-9mw778-1',  # Buttons for actions
-            '#cookieboxBackgroundModal > div',  # Spezifischer Selector für den Cookie-Banner von santander
-            '[data-testid="uc-default-banner"]',  # Selector for Zalando cookie banner
-            'div.cmp-container',
-            'div.ccm-modal-inner',
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            'div[role="dialog"]',
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]',
-            'div[class*="consent"]',
-            'div[id*="banner"]',
-            'div[class*="cookie-banner"]',
-            '//*[@id="page-id-46"]/div[3]/div/div/div',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]',
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]',
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',  # Selector for Borlabs Cookie
-            'div#BorlabsCookieBox',  # Specific ID for Borlabs Cookie Box
-            'div#BorlabsCookieWidget',  # Specific ID for Borlabs Cookie Widget
-            'div.elementText',  # Selector for the custom cookie banner text container
-            'h3:has-text("Datenschutzhinweis")',  # Check for the header text'
-        ]
-   
+        self.user_agent = DEFAULT_USER_AGENT
+        self.common_selectors = BANNER_SELECTORS
     
-    async def check_visibility(self, url):
+    async def check_visibility(self, url, session=None):
         """
         Checks if a visible cookie or consent banner is present on the given webpage.
+        Uses the already loaded landing page of `session` if one is given.
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36"
-            )
-            page = await context.new_page()
-
-            async def is_visible_cookie_banner(page_or_frame):
-                """
-                Checks for visible cookie banners in the given page or iframe.
-                """
-                found_banners = []  # Store found banners for debugging
-                for selector in self.common_selectors:
-                    elements = await page_or_frame.query_selector_all(selector)
-                    for element in elements:
-                        if element and await element.is_visible():
-                            box = await element.bounding_box()
-                            # Check minimum dimensions for the banner
-                            if box and box['width'] > 300 and box['height'] > 50:
-                                # Get the text content of the element
-                                element_text = (await element.evaluate("el => el.textContent")).lower() or ""
-                                found_banners.append({
-                                    'selector': selector,
-                                    'text': element_text,
-                                    'bounding_box': box,
-                                })
-
-                # Debugging output for detected banners
-                for banner in found_banners:
-                    print(f"Found banner with selector: '{banner['selector']}'")
-                    print(f"Element text: '{banner['text']}'")
-                    print(f"Element bounding box: {banner['bounding_box']}")
-
-                # Check for keywords in the page content
-                keywords = ["cookie", "consent", "gdpr", "privacy", "tracking", "preferences"]
-                for banner in found_banners:
-                    if any(keyword in banner['text'] for keyword in keywords):
-                        return True, f"Cookie banner detected."
-
-                return False, "No relevant cookie banner detected."
-
-            try:
-                # Load the page with retries
-                for attempt in range(5):
-                    try:
-                        print(f"Attempting to load the page (Attempt {attempt + 1})...")
-                        await page.goto(url, timeout=60000)
-                        await page.wait_for_load_state('networkidle')
-                        print("Page loaded successfully.")
-                        break
-                    except TimeoutError:
-                        print(f"Attempt {attempt + 1} failed. Retrying...")
-                else:
-                    return False, "Page failed to load after multiple attempts."
-
-                # Check for visible cookie banners
-                result, message = await is_visible_cookie_banner(page)
-                if result:
-                    print("Cookie banner found in the main document.")
-                    return True, message
-
-                # If not found, check inside iframes
-                iframes = await page.query_selector_all('iframe')
-                for iframe in iframes:
-                    iframe_content = await iframe.content_frame()
-                    if iframe_content:
-                        result, message = await is_visible_cookie_banner(iframe_content)
-                        if result:
-                            print("Cookie banner found in an iframe.")
-                            return True, message
+        try:
+            async with landing_page(url, session, user_agent=self.user_agent) as page:
+                # Banners of a known consent management platform are found directly by its own selectors
+                strategy = await detect_cmp(page)
+                if strategy and await strategy.find(page, "banner"):
+                    return True, f"Cookie banner detected ({strategy.name})."
+
+                # Check the visible candidates of the page and all iframes (one evaluate call per frame)
+                candidates = await collect_banner_candidates(page, self.common_selectors)
+                banner = find_cookie_banner(candidates)
+                if banner:
+                    location = "the main document" if banner["frame"] is page.main_frame else "an iframe"
+                    print(f"Cookie banner found in {location}.")
+                    return True, "Cookie banner detected."
 
                 print("No visible cookie banner found.")
                 return False, "No visible cookie banner found."
+        except PageLoadError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Error during cookie banner check: {e}"
 
-            except Exception as e:
-                return False, f"Error during cookie banner check: {e}"
-
-            finally:
-                await context.close()
-                await browser.close()
 # Uncomment the following code to test the implementation
 """                
 async def main():
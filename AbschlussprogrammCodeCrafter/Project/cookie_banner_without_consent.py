@@ -1,4 +1,7 @@
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import cmp_selectors
+from banner_selectors import BANNER_SELECTORS, BANNER_BUTTON_SELECTORS, selector_list
 import asyncio
 
 class WithoutConsentChecker:
@@ -17,79 +20,21 @@ class WithoutConsentChecker:
             'button:has-text("Continue Without Consent")',
             'a:has-text("Continue Without Consent")'
         ]
-        # List of common cookie banner selectors used to detect and interact with them
-        self.cookie_banner_selector = ', '.join([
-            'div.sticky',
-            'div.hp__sc-yx4ahb-7',
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'p.hp__sc-hk8z4-0',
-            'button.hp__sc-9mw778-1',
-            'div.cmp-container',
-            'div.ccm-modal-inner',
-            '#cookiescript_injected',  # radbag cookie banner
-            "#cookiescript_injected > div.cookiescript_pre_header", # radbag
-            "button:has-text('Ohne Einwilligung')",
-            "a:has-text('Ohne Einwilligung')",
-            "div[class*='cookie'] button",
-            "div[class*='consent'] button",
-            "div[class*='cookie-banner'] button",
-            "div[class*='cookie'] a",
-            "div[class*='cookie-banner'] a",
-            "button#onetrust-reject-all-handler",
-            "button[data-cookiebanner='reject']",
-            "div[style*='position: absolute'][style*='right'] button:has-text('Ohne Einwilligung')",
-            "div[style*='position: absolute'][style*='right'] a:has-text('Ohne Einwilligung')",
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            'div[role="dialog"]',
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]',
-            'div[class*="consent"]',
-            'div[id*="banner"]',
-            'div[class*="cookie-banner"]',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]',
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]',
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',
-            'div#BorlabsCookieBox',
-            'div#BorlabsCookieWidget',
-            'div.elementText',
-            'h3:has-text("Datenschutzhinweis")',
-        ])
-    async def check_ohne_einwilligung_link(self, url):
+        # Common cookie banner selectors and the buttons of banners that only show up as buttons
+        self.cookie_banner_selectors = BANNER_SELECTORS + BANNER_BUTTON_SELECTORS
+        self.cookie_banner_selector = selector_list(self.cookie_banner_selectors)
+    async def check_ohne_einwilligung_link(self, url, session=None):
         """
         Checks for the presence of an 'Ohne Einwilligung' or 'Continue Without Consent' 
         link or button on the given webpage.
+        Uses the already loaded landing page of `session` if one is given.
         """
-        async with async_playwright() as p:
-            # Launch a headless Chromium browser
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            try:
-                # Load the page and wait for the cookie banner
-                await page.goto(url, timeout=30000)
-                print("Page loaded successfully.")
-
-                # Wait for the cookie banner to appear
-                await page.wait_for_selector(self.cookie_banner_selector, timeout=10000)
+        try:
+            async with landing_page(url, session) as page:
+                # Wait for the cookie banner to appear: the banner of a known CMP or any of the generic
+                # selectors, for CMPs that render a variant of their container
+                banner_selector = selector_list(await cmp_selectors(page, "banner", self.cookie_banner_selectors))
+                await page.wait_for_selector(banner_selector, timeout=10000)
                 print("Cookie banner detected.")
 
                 # Iterate through selectors to find the "Ohne Einwilligung" button/link
@@ -127,16 +72,15 @@ class WithoutConsentChecker:
                 print("No clickable 'Continue Without Consent' link or button found.")
                 return False, "No clickable 'Continue Without Consent' link or button found."
 
-            except TimeoutError:
-                print("Error: Timeout while loading the page.")
-                return False, "Timeout while waiting for the 'Continue Without Consent' button. It is likely that the expected 'Continue Without Consent' button are not present on this page."
+        except PageLoadError as e:
+            return False, str(e)
+        except TimeoutError:
+            print("Error: Timeout while loading the page.")
+            return False, "Timeout while waiting for the 'Continue Without Consent' button. It is likely that the expected 'Continue Without Consent' button are not present on this page."
 
-            except Exception as e:
-                print(f"General error occurred: {e}")
-                return False, f"Error during check: {e}"
-            finally:
-                await context.close()
-                await browser.close()
+        except Exception as e:
+            print(f"General error occurred: {e}")
+            return False, f"Error during check: {e}"
 # Uncomment the following code to test the implementation
 """
 # Example usage
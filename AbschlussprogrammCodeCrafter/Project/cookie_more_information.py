@@ -1,5 +1,9 @@
 from playwright.async_api import async_playwright
 import re
+from cmp_detection import cmp_selectors
+from banner_readiness import wait_until_settled
+from navigation_policy import navigation_policy
+from har_archive import new_context, close_context
 
 
 class CookieInfoChecker:
@@ -64,27 +68,33 @@ class CookieInfoChecker:
         """
         self.selectors = selectors or self.DEFAULT_SELECTORS
 
-    async def find_more_info_buttons(self, browser, url):
+    async def find_more_info_buttons(self, browser, url, policy=None):
         """
         Detect the number of "More Information" buttons on the cookie settings page.
+
+        :param policy: Optional ResourcePolicy applied to the context
         """
         feedback = f"<strong>Checking for 'More Information' buttons in the Cookie Preference Center.>"
         buttons_found = 0
         section_names = []
+        context = None
 
         try:
             # Open a new browser context and page
-            context = await browser.new_context()
+            context = await new_context(browser)
+            if policy is not None:
+                await policy.apply(context)
             page = await context.new_page()
-            await page.goto(url)
+            await navigation_policy.goto(page, url)
 
             # Step 1: Click on "Cookie Einstellungen" (Cookie Settings) button if found
-            for selector in self.selectors["cookie_settings_button"]:
+            for selector in await cmp_selectors(page, "settings", self.selectors["cookie_settings_button"]):
                 cookie_settings_button = await page.query_selector(selector)
                 if cookie_settings_button:
                     # Use JavaScript to click to avoid scroll issues
                     await page.evaluate("(el) => el.click()", cookie_settings_button)
-                    await page.wait_for_timeout(3000)  # Wait for the modal to load
+                    # Wait until the modal stopped changing
+                    await wait_until_settled(page, await cmp_selectors(page, "preference_center", self.selectors["expand_buttons"]), timeout=6000)
                     feedback += "- Successfully clicked 'Cookie Einstellungen'.<br>"
                     break
             else:
@@ -147,6 +157,9 @@ class CookieInfoChecker:
 
         except Exception as e:
              return 0, f"Error while checking 'More Information' buttons: {e}"
+        finally:
+            # The browser is lent by the pool, only the context of this check is closed
+            await close_context(context)
 
         return buttons_found, feedback
 
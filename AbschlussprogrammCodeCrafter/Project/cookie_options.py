@@ -1,6 +1,9 @@
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import detect_cmp
+from banner_selectors import BANNER_SELECTORS, collect_banner_candidates
 import asyncio
-from langdetect import detect
+from language_service import language_service
 
 class CookieSelectionChecker:
     def __init__(self):
@@ -32,83 +35,66 @@ class CookieSelectionChecker:
         )
         self.cookiebot_toggle_selector = "div.CybotCookiebotDialogBodyLevelButtonWrapper span"
         # Common cookie banner selectors for detection
-        self.common_selectors = [
-            'div.sticky',  # The main sticky container of the cookie banne
-            'div.hp__sc-yx4ahb-7',  # Urlaubspiraten main container
-            'p.hp__sc-iv4use-0',  # Urlaubspiraten specific paragraph
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'div.hp__sc-yx4ahb-7',  # Main container for the cookie banner on Urlaubspiraten
-            'p.hp__sc-hk8z4-0',  # Paragraphs containing cookie consent text
-            'button.hp__sc-9mw778-1',  # Buttons for actions
-            '#cookieboxBackgroundModal > div',  # Spezifischer Selector für den Cookie-Banner von santander
-            '[data-testid="uc-default-banner"]',  # Selector for Zalando cookie banner
-            'div.cmp-container',
-            'div.ccm-modal-inner',
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            'div[role="dialog"]',
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]',
-            'div[class*="consent"]',
-            'div[id*="banner"]',
-            'div[class*="cookie-banner"]',
-            '//*[@id="page-id-46"]/div[3]/div/div/div',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]',
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]',
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',  # Selector for Borlabs Cookie
-            'div#BorlabsCookieBox',  # Specific ID for Borlabs Cookie Box
-            'div#BorlabsCookieWidget',  # Specific ID for Borlabs Cookie Widget
-            'div.elementText',  # Selector for the custom cookie banner text container
-            'h3:has-text("Datenschutzhinweis")',  # Check for the header text'
-        ]
+        self.common_selectors = BANNER_SELECTORS
     
     async def detect_language(self, page):
         """
-        Detects the language of the cookie banner text by extracting the inner text.
+        Detects the language of the cookie banner (declared by the page or detected from the inner text).
         """
-        for selector in self.common_selectors:
-            elements = await page.query_selector_all(selector)
-            if elements:
-                for element in elements:
-                    if await element.is_visible():
-                        banner_text = await element.inner_text()
-                        if banner_text:
-                            detected_language = detect(banner_text)
-                            return detected_language
+        for candidate in await collect_banner_candidates(page, self.common_selectors, frames=False):
+            if candidate["text"]:
+                return await language_service.detect(page, candidate["text"])
         return None
 
-    async def check_cookie_selection(self, url):
+    async def read_onetrust_options(self, page):
+        """
+        Opens the OneTrust preference center and returns the cookie options and their checked status.
+        """
+        await page.wait_for_selector(self.onetrust_banner_selector, timeout=10000)
+        print("OneTrust cookie banner found.")
+
+        # Click the settings button to open preferences
+        await page.click(self.settings_button_selector)
+
+        # Wait for the settings menu to load
+        await page.wait_for_selector(self.onetrust_settings_menu_selector, timeout=10000)
+
+        # Extract options and their states
+        return await page.evaluate(f"""
+            () => Array.from(document.querySelectorAll('{self.checkbox_selector}'))
+                .map(element => {{
+                    const checkbox = element.previousElementSibling || element.querySelector('input[type="checkbox"]'); // Get the associated checkbox
+                    return {{
+                        text: element.innerText.trim() || element.textContent.trim(),
+                        checked: checkbox ? checkbox.checked : false // Check if the checkbox is selected
+                    }};
+                }}).filter(item => item.text && item.checked !== undefined);
+        """)
+
+    async def read_cookiebot_options(self, page):
+        """
+        Returns the cookie options of the Cookiebot banner and their checked status.
+        """
+        await page.wait_for_selector(self.cookiebot_banner_selector, timeout=10000)
+        print("Cookiebot cookie banner found.")
+        return await page.evaluate(f"""
+            () => Array.from(document.querySelectorAll('{self.cookiebot_toggle_selector}'))
+                .map(element => {{
+                    const toggle = element.closest("div").querySelector('input[type="checkbox"]');
+                    return {{
+                        text: element.textContent.trim(),
+                        checked: toggle ? toggle.checked : false
+                    }};
+                }}).filter(item => item.text && item.checked !== undefined);
+        """)
+
+    async def check_cookie_selection(self, url, session=None):
         """
         Checks for specific cookie categories and shows their presence and checked status.
+        Opens the cookie settings, so it works on a forked page when `session` is given.
         """
-        async with async_playwright() as p:
-            # Launch a headless Chromium browser
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            try:
-                # Load the page
-                await page.goto(url, timeout=30000)
-                print("Page loaded successfully.")
-
+        try:
+            async with landing_page(url, session, mutating=True) as page:
                 # Detect the language of the website
                 detected_language = await self.detect_language(page)
                 if not detected_language:
@@ -124,55 +110,30 @@ class CookieSelectionChecker:
 
                 available_options = {}
 
-                # Check for OneTrust banner
-                try:
-                    await page.wait_for_selector(self.onetrust_banner_selector, timeout=10000)
-                    print("OneTrust cookie banner found.")
-
-                    # Click the settings button to open preferences
-                    await page.click(self.settings_button_selector)
-
-                    # Wait for the settings menu to load
-                    await page.wait_for_selector(self.onetrust_settings_menu_selector, timeout=10000)
-
-                    # Extract options and their states
-                    available_options = await page.evaluate(f"""
-                        () => Array.from(document.querySelectorAll('{self.checkbox_selector}'))
-                            .map(element => {{
-                                const checkbox = element.previousElementSibling || element.querySelector('input[type="checkbox"]'); // Get the associated checkbox
-                                return {{
-                                    text: element.innerText.trim() || element.textContent.trim(),
-                                    checked: checkbox ? checkbox.checked : false // Check if the checkbox is selected
-                                }};
-                            }}).filter(item => item.text && item.checked !== undefined);
-                    """)
-                except TimeoutError:
-                    print("OneTrust cookie banner not found. Checking for Cookiebot.")
-
-                    # Check for Cookiebot banner
+                # Go straight to the banner of a known consent management platform
+                strategy = await detect_cmp(page)
+                if strategy is not None and strategy.name == "OneTrust":
+                    available_options = await self.read_onetrust_options(page)
+                elif strategy is not None and strategy.name == "Cookiebot":
+                    available_options = await self.read_cookiebot_options(page)
+                elif strategy is not None:
+                    # Options of other platforms are not read (yet), so they count as not found
+                    print(f"{strategy.name} cookie banner found.")
+                else:
+                    # Unknown platform, try OneTrust and Cookiebot one after the other
                     try:
-                        await page.wait_for_selector(self.cookiebot_banner_selector, timeout=10000)
-                        print("Cookiebot cookie banner found.")
-                        available_options = await page.evaluate(f"""
-                            () => Array.from(document.querySelectorAll('{self.cookiebot_toggle_selector}'))
-                                .map(element => {{
-                                    const toggle = element.closest("div").querySelector('input[type="checkbox"]');
-                                    return {{
-                                        text: element.textContent.trim(),
-                                        checked: toggle ? toggle.checked : false
-                                    }};
-                                }}).filter(item => item.text && item.checked !== undefined);
-                        """)
+                        available_options = await self.read_onetrust_options(page)
                     except TimeoutError:
-                        print("Cookiebot banner not found. Checking for common cookie banners.")
-                        # Check for common selectors
-                        for selector in self.common_selectors:
-                            elements = await page.query_selector_all(selector)
-                            if elements:
-                                print(f"Found cookie banner with selector: {selector}")
-                                break
-                        else:
-                            return False, "No cookie banner detected with common selectors."
+                        print("OneTrust cookie banner not found. Checking for Cookiebot.")
+                        try:
+                            available_options = await self.read_cookiebot_options(page)
+                        except TimeoutError:
+                            print("Cookiebot banner not found. Checking for common cookie banners.")
+                            # Check for common selectors
+                            candidates = await collect_banner_candidates(page, self.common_selectors, frames=False)
+                            if not candidates:
+                                return False, "No cookie banner detected with common selectors."
+                            print(f"Found cookie banner with selector: {candidates[0]['selector']}")
 
                 # Create a dictionary of options and their states
                 found_options = {option['text']: option['checked'] for option in available_options}
@@ -197,20 +158,19 @@ class CookieSelectionChecker:
                     feedback += "<br><strong>Not all required cookie options are present or some are preselected.</strong>"
                     return False, feedback
 
-            except TimeoutError:
-                print("Error: Timeout while waiting for the cookie banner or settings menu.")
-                feedback = (
-                    "Timeout occurred while waiting for the cookie banner or settings menu.<br>"
-                    "The required options ('Leistungs-Cookies', 'Funktionelle Cookies', "
-                    "'Werbe-Cookies', 'Social-Media-Cookies') may not be present on this page."
-                )
-                return False, feedback
-            except Exception as e:
-                print(f"Error occurred: {e}")
-                return False, f"Error occurred during cookie selection check: {e}"
-            finally:
-                await context.close()
-                await browser.close()
+        except PageLoadError as e:
+            return False, str(e)
+        except TimeoutError:
+            print("Error: Timeout while waiting for the cookie banner or settings menu.")
+            feedback = (
+                "Timeout occurred while waiting for the cookie banner or settings menu.<br>"
+                "The required options ('Leistungs-Cookies', 'Funktionelle Cookies', "
+                "'Werbe-Cookies', 'Social-Media-Cookies') may not be present on this page."
+            )
+            return False, feedback
+        except Exception as e:
+            print(f"Error occurred: {e}")
+            return False, f"Error occurred during cookie selection check: {e}"
 
 # Uncomment the following code to test the implementation
 """
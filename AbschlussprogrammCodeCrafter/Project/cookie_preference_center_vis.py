@@ -1,59 +1,15 @@
 import asyncio
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import detect_cmp, cmp_selectors
+from banner_readiness import wait_until_settled
+from banner_selectors import BANNER_SELECTORS, collect_banner_candidates, find_cookie_banner
 
 
 class CookiePreferenceVis:
     def __init__(self):
         # List of common selectors for detecting cookie banners
-        self.common_selectors = [
-            # Various selectors for different websites' cookie banners
-            'div.sticky',  # The main sticky container of the cookie banner
-            'div.hp__sc-yx4ahb-7',  # Urlaubspiraten main container
-            'p.hp__sc-iv4use-0',  # Urlaubspiraten specific paragraph
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'div.hp__sc-yx4ahb-7',  # Main container for the cookie banner on Urlaubspiraten
-            'p.hp__sc-hk8z4-0',  # Paragraphs containing cookie consent text
-            'button.hp__sc-9mw778-1',  # Buttons for actions
-            '#cookieboxBackgroundModal > div',  # Spezifischer Selector für den Cookie-Banner von santander
-            '[data-testid="uc-default-banner"]',  # Selector for Zalando cookie banner
-            'div.cmp-container', # verivox
-            'div.ccm-modal-inner',
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            '#onetrust-consent-sdk',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            'div[role="dialog"]', # Schwarzkopf, hochland, Hassia Gruppe
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]', # hansgrohe
-            'div[class*="consent"]',
-            'div[id*="banner"]',
-            'div[class*="cookie-banner"]',
-            '//*[@id="page-id-46"]/div[3]/div/div/div',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]', # tesa
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]', # weleda, BMW Group
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',  # Selector for Borlabs Cookie
-            'div#BorlabsCookieBox',  # Specific ID for Borlabs Cookie Box
-            'div#BorlabsCookieWidget',  # Specific ID for Borlabs Cookie Widget
-            'div.elementText',  # Selector for the custom cookie banner text container
-            'h3:has-text("Datenschutzhinweis")',  # Check for the header text'
-            '#BorlabsCookieEntranceA11YDescription'
-        ]
+        self.common_selectors = BANNER_SELECTORS
         # Selectors for finding cookie preference settings
         self.preference_selectors = [
             # Selectors for "Cookie-Einstellungen" or "Cookie Settings"
@@ -119,29 +75,14 @@ class CookiePreferenceVis:
         """
         Check for visible cookie banners in the given page or frame.
         """
-        found_banners = []
-        for selector in self.common_selectors:
-            elements = await page_or_frame.query_selector_all(selector)
-            for element in elements:
-                if element and await element.is_visible():
-                    box = await element.bounding_box()
-                    if box and box['width'] > 300 and box['height'] > 50:
-                        element_text = (await element.evaluate("el => el.textContent")).lower() or ""
-                        found_banners.append({
-                            'selector': selector,
-                            'text': element_text,
-                            'bounding_box': box,
-                        })
-        # Print detected banners for debugging
-        for banner in found_banners:
-            print(f"Found banner with selector: '{banner['selector']}'")
-            print(f"Element text: '{banner['text']}'")
-            print(f"Element bounding box: {banner['bounding_box']}")
-        # Check if the detected banner contains relevant keywords
-        keywords = ["cookie", "consent", "gdpr", "privacy", "tracking", "preferences"]
-        for banner in found_banners:
-            if any(keyword in banner['text'] for keyword in keywords):
-                return True, f"Cookie banner detected."
+        strategy = await detect_cmp(page_or_frame)
+        if strategy and await strategy.find(page_or_frame, "banner"):
+            return True, f"Cookie banner detected ({strategy.name})."
+
+        # All visible candidates in one evaluate call, then the size and keyword checks
+        candidates = await collect_banner_candidates(page_or_frame, self.common_selectors, frames=False)
+        if find_cookie_banner(candidates):
+            return True, f"Cookie banner detected."
 
         return False, "No relevant cookie banner detected."
 
@@ -149,17 +90,18 @@ class CookiePreferenceVis:
         """
         Check if 'Cookie-Einstellungen' or 'Cookie Settings' is clickable and opens the Preference Center.
         """
-        for pref_selector in self.preference_selectors:
+        for pref_selector in await cmp_selectors(page_or_frame, "settings", self.preference_selectors):
             preference_button = await page_or_frame.query_selector(pref_selector)
             if preference_button and await preference_button.is_visible():
                 print(f"Preference Center button found: {pref_selector}")
 
                 # Click the preference button
                 await preference_button.click()
-                await page_or_frame.wait_for_timeout(2000)  # Give time for modal to open
+                identifiers = await cmp_selectors(page_or_frame, "preference_center", self.preference_center_identifiers)
+                await wait_until_settled(page_or_frame, identifiers, timeout=5000)  # Until the modal is open
 
                 # ✅ Check if a new element (Preference Center) appeared
-                for identifier in self.preference_center_identifiers:
+                for identifier in identifiers:
                     preference_center = await page_or_frame.query_selector(identifier)
                     if preference_center and await preference_center.is_visible():
                         print(f"✅ Preference Center detected with selector: {identifier}")
@@ -176,29 +118,13 @@ class CookiePreferenceVis:
         print("❌ No 'Cookie-Einstellungen' or Preference Center button found.")
         return False, "No 'Cookie-Einstellungen' or Preference Center button found."
 
-    async def check_visibility_and_preference_center(self, url):
+    async def check_visibility_and_preference_center(self, url, session=None):
         """
         Combined check for cookie banner visibility and Preference Center accessibility.
+        Clicks the Preference Center button, so it works on a forked page when `session` is given.
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36"
-            )
-            page = await context.new_page()
-
-            try:
-                print(f"Loading URL: {url}")
-                for attempt in range(5): # Retry loading the page up to 5 times
-                    try:
-                        await page.goto(url, timeout=60000)
-                        await page.wait_for_load_state('networkidle')
-                        print("Page loaded successfully.")
-                        break
-                    except TimeoutError:
-                        print(f"Attempt {attempt + 1} failed. Retrying...")
-                else:
-                    return False, "Page failed to load after multiple attempts."
+        try:
+            async with landing_page(url, session, mutating=True) as page:
                 # Check if a cookie banner is visible
                 result, message = await self.check_visibility(page)
                 if result:
@@ -210,12 +136,11 @@ class CookiePreferenceVis:
 
                 return False, message
 
-            except Exception as e:
-                return False, f"Error during check: {e}"
+        except PageLoadError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Error during check: {e}"
 
-            finally:
-                await context.close()
-                await browser.close()
 # Uncomment and run this section if you want to test the script
 """
 async def main():
@@ -1,6 +1,10 @@
-from playwright.async_api import async_playwright, TimeoutError
+from playwright.async_api import TimeoutError
+from page_session import landing_page, PageLoadError
+from cmp_detection import cmp_selectors
+from banner_readiness import wait_until_settled
+from banner_selectors import BANNER_SELECTORS, collect_banner_candidates, large_candidates, candidate_element
 import asyncio
-from langdetect import detect
+from language_service import language_service
 
 
 class CookiePreferenceLinkValidator:
@@ -10,57 +14,7 @@ class CookiePreferenceLinkValidator:
         Defines selectors for common cookie banners, preference centers, and relevant links.
         """
         # Common selectors used to detect cookie banners across various websites
-        self.common_selectors = [
-             # Common cookie banner selectors
-            'div.sticky',  # The main sticky container of the cookie banner
-            'div.hp__sc-yx4ahb-7',  # Urlaubspiraten main container
-            'p.hp__sc-iv4use-0',  # Urlaubspiraten specific paragraph
-            '#hp-app > div.hp__sc-s043ov-0.eTEUOO > div',  # Specific selector for Urlaubspiraten cookie banner
-            'div.hp__sc-yx4ahb-7',  # Main container for the cookie banner on Urlaubspiraten
-            'p.hp__sc-hk8z4-0',  # Paragraphs containing cookie consent text
-            'button.hp__sc-9mw778-1',  # Buttons for actions
-            '#cookieboxBackgroundModal > div',  # Spezifischer Selector für den Cookie-Banner von santander
-            '[data-testid="uc-default-banner"]', 
-            'div.cmp-container', # verivox
-            'div.ccm-modal-inner',
-            'div.ccm-modal--header',
-            'div.ccm-modal--body',
-            'div.ccm-widget--buttons',
-            'button.ccm--decline-cookies',
-            'button.ccm--save-settings',
-            'button[data-ccm-modal="ccm-control-panel"]',
-            'div.ccm-powered-by',
-            'div.ccm-link-container',
-            'div.ccm-modal',
-            'div[class*="ccm-settings-summoner"]',
-            'div[class*="ccm-control-panel"]',
-            'div[class*="ccm-modal--footer"]',
-            '#onetrust-consent-sdk',
-            'button.ccm--button-primary',
-            'div[data-testid="uc-default-wall"]',
-            'div[role="dialog"]', # Schwarzkopf, hochland, Hassia Gruppe
-            'div.cc-banner',
-            'section.consentDrawer',
-            'div[class*="cookie"]', # hansgrohe
-            'div[class*="consent"]',
-             # 'div[id*="banner"]',
-            '#onetrust-banner-sdk > div > div.ot-sdk-container > div', # kao
-            'div[class*="cookie-banner"]',
-            '//*[@id="page-id-46"]/div[3]/div/div/div',
-            'div[class*="cookie-notice"]',
-            '[role="dialog"]', # tesa
-            '[aria-label*="cookie"]',
-            '[data-cookie-banner]',
-            'div[style*="bottom"]', # weleda, BMW Group
-            'div[style*="fixed"]',
-            'div[data-borlabs-cookie-consent-required]',  # Selector for Borlabs Cookie
-            'div#BorlabsCookieBox',  # Specific ID for Borlabs Cookie Box
-            'div#BorlabsCookieWidget',  # Specific ID for Borlabs Cookie Widget
-            'div.elementText',  # Selector for the custom cookie banner text container
-            'h3:has-text("Datenschutzhinweis")',  # Check for the header text'
-            '#BorlabsCookieEntranceA11YDescription',
-            '#onetrust-banner-sdk', # original wagner
-        ]
+        self.common_selectors = BANNER_SELECTORS
 
         # Selectors used to detect the preference center, where users can modify their cookie settings
         self.preference_center_selectors = [
@@ -129,19 +83,14 @@ class CookiePreferenceLinkValidator:
         self.imprint_texts = ["Impressum", "Imprint"]
         self.privacy_policy_texts = ["Datenschutzinformationen", "Privacy Policy"]
 
-    async def is_visible_cookie_banner(self, page_or_frame):
+    async def is_visible_cookie_banner(self, page):
         """
-        Detects visible cookie banners based on predefined selectors.
-        Ensures the banner meets basic size criteria.
+        Detects visible cookie banners based on predefined selectors (selectors of a known CMP first).
+        Ensures the banner meets basic size criteria. The page and its iframes are evaluated in one call each.
         """
-        for selector in self.common_selectors:
-            elements = await page_or_frame.query_selector_all(selector)
-            for element in elements:
-                if element and await element.is_visible():
-                    box = await element.bounding_box()
-                    if box and box['width'] > 300 and box['height'] > 50:  # Basic size check
-                        return selector # Return the selector if a valid banner is found
-        return None # Return None if no valid banner is detected
+        selectors = await cmp_selectors(page, "banner", self.common_selectors)
+        candidates = large_candidates(await collect_banner_candidates(page, selectors))
+        return candidates[0] if candidates else None # Return the first valid banner or None
 
     async def validate_links(self, element, texts):
         """
@@ -187,14 +136,14 @@ class CookiePreferenceLinkValidator:
         Validates links inside the Cookie Preference Center.
         """
         feedback = ""
-        for selector in self.preference_center_selectors:
+        for selector in await cmp_selectors(page, "preference_center", self.preference_center_selectors):
             preference_center = await page.query_selector(selector)
             if preference_center and await preference_center.is_visible():
                 feedback += f"<strong>Cookie Preference Center detected using selector:</strong> {selector}<br>"
 
                 # Detect language
                 center_text = await preference_center.inner_text()
-                detected_language = detect(center_text)
+                detected_language = await language_service.detect(preference_center, center_text)
                 privacy_texts = self.privacy_policy_texts if detected_language != "de" else ["Datenschutzinformationen"]
                 imprint_texts = self.imprint_texts if detected_language != "de" else ["Impressum"]
 
@@ -212,47 +161,28 @@ class CookiePreferenceLinkValidator:
                 )
         return False, "<strong>No visible Cookie Preference Center found.</strong>"
 
-    async def check_preference_links(self, url):
+    async def check_preference_links(self, url, session=None):
         """
         Checks for the presence of a cookie banner and validates Privacy Policy and Imprint links.
+        Clicks the Preference Center button, so it works on a forked page when `session` is given.
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537"
-            )
-            page = await context.new_page()
-
-            try:
-                print(f"Visiting URL: {url}")
-                await page.goto(url, timeout=60000)
-                await page.wait_for_load_state("networkidle")
-
-                # Check for cookie banner on the main page
-                cookie_banner_selector = await self.is_visible_cookie_banner(page)
-                if not cookie_banner_selector:
-                    # Check iframes for cookie banners
-                    iframe_result = await self.check_iframes(page, self.is_visible_cookie_banner)
-                    if iframe_result:
-                        cookie_banner_selector = iframe_result
-                    else:
-                        return False, "No visible cookie banner found."
-
-                print(f"Cookie banner detected using selector: {cookie_banner_selector}")
-                cookie_banner = await page.query_selector(cookie_banner_selector)
+        try:
+            async with landing_page(url, session, mutating=True) as page:
+                # Check for cookie banner on the main page and in iframes
+                candidate = await self.is_visible_cookie_banner(page)
+                if not candidate:
+                    return False, "No visible cookie banner found."
+
+                print(f"Cookie banner detected using selector: {candidate['selector']}")
+                cookie_banner = await candidate_element(candidate)
+                if not cookie_banner:
+                    return False, "No visible cookie banner found."
 
                 # Detect language of the cookie banner
                 banner_text = await cookie_banner.inner_text()
 
-                # Falls der Text leer oder None ist, Standardwert setzen
-                if not banner_text or banner_text.strip() == "":
-                    detected_language = "de"  # Fallback auf German
-                else:
-                    try:
-                        detected_language = detect(banner_text)
-                    except Exception as e:
-                        print(f"Language detection failed: {e}")  # Debugging-Info ausgeben
-                        detected_language = "de"  # Fallback auf German
+                # Fallback auf German, falls die Sprache nicht erkannt wird
+                detected_language = await language_service.detect(cookie_banner, banner_text, default="de")
 
                 privacy_texts = self.privacy_policy_texts if detected_language != "de" else ["Datenschutzinformationen"]
                 imprint_texts = self.imprint_texts if detected_language != "de" else ["Impressum"]
@@ -260,12 +190,13 @@ class CookiePreferenceLinkValidator:
                 # Initialize feedback variable
                 feedback = ""
                 # Click "Cookie-Einstellungen" or "Einstellungen" button if available
-                for selector in self.preference_selectors:
+                for selector in await cmp_selectors(page, "settings", self.preference_selectors):
                     preference_button = await cookie_banner.query_selector(selector)
                     if preference_button:
                         print(f"Found and clicking preference button: {selector}")
                         await preference_button.click()
-                        await page.wait_for_timeout(2000)  # Wait for preference center to load
+                        # Wait until the preference center stopped changing
+                        await wait_until_settled(page, await cmp_selectors(page, "preference_center", self.preference_center_selectors), timeout=5000)
                         break  # Stop after clicking the first found button
                      # If no preference button was found, return feedback immediately
                 if not preference_button:
@@ -289,13 +220,12 @@ class CookiePreferenceLinkValidator:
                     f"{privacy_feedback}{imprint_feedback}",
                 )
 
-            except TimeoutError:
-                return False, "Page load timed out."
-            except Exception as e:
-                return False, f"An error occurred: {e}"
-            finally:
-                await context.close()
-                await browser.close()
+        except PageLoadError as e:
+            return False, str(e)
+        except TimeoutError:
+            return False, "Page load timed out."
+        except Exception as e:
+            return False, f"An error occurred: {e}"
 
 """
 # Uncomment the following code to test the implementation
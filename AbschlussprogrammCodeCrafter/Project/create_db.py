@@ -16,9 +16,16 @@ def init_db():
                 date DATETIME DEFAULT (datetime('now', 'localtime')),
                 url TEXT NOT NULL,
                 conformity TEXT NOT NULL,
-                conformity_details BLOB NOT NULL
+                conformity_details BLOB NOT NULL,
+                job_id TEXT
             )
         ''')
+        # Add columns that were introduced after the table was created
+        migrate_db(c)
+        # Cache of the results of single checks, see result_cache.py
+        create_result_cache_table(c)
+        # Status of checked links, see link_status.py
+        create_link_status_table(c)
         # Commit the transaction to apply the changes
         conn.commit()
         print("Database initialized and table created.")
@@ -28,6 +35,55 @@ def init_db():
     finally:
         # Ensure the database connection is closed, even if an error occurs
         conn.close()  # Ensure the connection is closed even if an error occurs
+
+def migrate_db(cursor):
+    """
+    Adds columns that are missing in databases created by older versions of the tool.
+    """
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(compliance)")]
+    if "job_id" not in columns:
+        # Id of the scan job that produced the report, results pages are addressed by it
+        cursor.execute("ALTER TABLE compliance ADD COLUMN job_id TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_compliance_job_id ON compliance (job_id)")
+
+def create_result_cache_table(cursor):
+    """
+    Creates the table of the result cache: one row per check, website, template hash and check version.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS result_cache (
+            url TEXT NOT NULL,
+            check_name TEXT NOT NULL,
+            template_hash TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            created REAL NOT NULL,
+            outcome TEXT NOT NULL,
+            fingerprint TEXT,
+            PRIMARY KEY (url, check_name, template_hash, version)
+        )
+    ''')
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(result_cache)")]
+    if "fingerprint" not in columns:
+        # Fingerprint of the input of the check (e.g. the banner markup), see dom_fingerprint.py
+        cursor.execute("ALTER TABLE result_cache ADD COLUMN fingerprint TEXT")
+
+def create_link_status_table(cursor):
+    """
+    Creates the table of the link status registry: the last HTTP status of every checked link,
+    with the validators (ETag, Last-Modified) of the response for conditional revalidation.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS link_status (
+            url TEXT NOT NULL,
+            follow_redirects INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            checked REAL NOT NULL,
+            PRIMARY KEY (url, follow_redirects)
+        )
+    ''')
+
 # If the script is executed directly, initialize the database
 if __name__ == '__main__':
     init_db()
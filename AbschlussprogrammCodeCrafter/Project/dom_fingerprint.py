@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import re
+from cmp_detection import detect_cmp
+from banner_selectors import collect_banner_candidates, find_cookie_banner
+
+# Regions of a page whose fingerprint decides whether a check has to run again
+NEWSLETTER_FORM_SELECTORS = ['form:has(input[type="email"])', 'form:has(input[name*="mail" i])']
+FOOTER_SELECTORS = ['footer', '.footer', '#footer']
+
+# Markup of all elements matching the selectors (nested matches only once) with their rounded size,
+# so a restyled banner with the same markup gets a new fingerprint as well
+_REGION_MARKUP = """
+(selectors) => {
+    const elements = [];
+    for (const selector of selectors) {
+        let matches;
+        try {
+            matches = document.querySelectorAll(selector);
+        } catch (e) {
+            continue;  // Invalid selector
+        }
+        for (const element of matches) {
+            if (!elements.some(other => other === element || other.contains(element))) {
+                elements.push(element);
+            }
+        }
+    }
+    return elements.map(element => {
+        const rect = element.getBoundingClientRect();
+        return `${Math.round(rect.width / 10)}x${Math.round(rect.height / 10)} ${element.outerHTML}`;
+    });
+}
+"""
+
+# Values that change on every page load without changing the content (nonces, session ids, timestamps)
+_VOLATILE_ATTRIBUTES = re.compile(r'\s(?:nonce|data-nonce|integrity|data-timestamp|csrf[\w-]*)="[^"]*"', re.IGNORECASE)
+_VOLATILE_TOKENS = re.compile(r'\b(?:[0-9a-f]{16,}|\d{8,})\b', re.IGNORECASE)
+
+
+def normalize_markup(markup):
+    """Removes whitespace differences and volatile values from HTML or text."""
+    markup = _VOLATILE_ATTRIBUTES.sub("", markup)
+    markup = _VOLATILE_TOKENS.sub("#", markup)
+    return re.sub(r"\s+", " ", markup).strip()
+
+
+def fingerprint(parts):
+    """SHA-256 fingerprint of normalized markup or text parts, None if there is nothing to fingerprint."""
+    parts = [normalize_markup(part) for part in parts if part]
+    if not parts:
+        return None
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+async def region_fingerprint(page, selectors, frames=True):
+    """
+    Fingerprint of the regions of a page (and its iframes) that match the selectors.
+
+    :return: Hex digest, or None if no region was found
+    """
+    targets = page.frames if frames and hasattr(page, "frames") else [page]
+    results = await asyncio.gather(
+        *(target.evaluate(_REGION_MARKUP, list(selectors)) for target in targets),
+        return_exceptions=True,
+    )
+    parts = []
+    for result in results:
+        if not isinstance(result, Exception):
+            parts.extend(result)
+    return fingerprint(parts)
+
+
+async def banner_fingerprint(page):
+    """
+    Fingerprint of the cookie banner and, where the CMP renders it upfront, the preference center.
+    Unknown banners are located with the selector catalogue.
+    """
+    strategy = await detect_cmp(page)
+    if strategy is not None:
+        selectors = strategy.selectors("banner") + strategy.selectors("preference_center")
+    else:
+        banner = find_cookie_banner(await collect_banner_candidates(page))
+        if banner is None:
+            return None
+        selectors = [banner["selector"]]
+    return await region_fingerprint(page, selectors)
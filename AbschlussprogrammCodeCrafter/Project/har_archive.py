@@ -0,0 +1,195 @@
+import asyncio
+import glob
+import json
+import os
+import shutil
+import time
+import uuid
+from contextvars import ContextVar
+
+# Recordings are stored next to the app, one directory per scan job with the HAR archive, its metadata
+# and the response bodies (attached as separate files, so the archive itself stays small)
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+# Archive of the scan the current task belongs to. Tasks inherit it, so every browser context
+# opened for the scan records into (or replays from) the same archive.
+current_archive = ContextVar("current_archive", default=None)
+
+
+class ScanArchive:
+    """
+    Network traffic of one scan, recorded as a HAR archive with Playwright.
+
+    In "record" mode every browser context of the scan writes its own HAR file, finish() merges
+    them into `<job id>/<job id>.har`. Response bodies are stored as files next to it, not embedded
+    into the HAR, so merging only reads the request logs. In "replay" mode every context is served from that archive through
+    Playwright's HAR routing, requests that are not in the archive are aborted, so a replay never
+    touches the network. Results of checks that do not use the browser (e.g. the imprint) are
+    stored in the metadata file `<job id>/<job id>.json`.
+    """
+    def __init__(self, job_id, mode="record", directory=RECORDINGS_DIR):
+        """
+        :param job_id: Id of the scan job that recorded (or records) the archive
+        :param mode: "record" or "replay"
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.job_id = job_id
+        self.mode = mode
+        self.directory = directory
+        self.values = {}  # Results of non-browser prerequisites, e.g. {"imprint": {...}}
+        self._parts = []
+        if mode == "replay":
+            if not self.exists():
+                raise FileNotFoundError(f"No recording found for job {job_id}.")
+            with open(self.meta_path, encoding="utf-8") as file:
+                self.values = json.load(file).get("values", {})
+
+    @property
+    def folder(self):
+        return os.path.join(self.directory, self.job_id)
+
+    @property
+    def path(self):
+        return os.path.join(self.folder, f"{self.job_id}.har")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.folder, f"{self.job_id}.json")
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def exists(self):
+        return os.path.exists(self.path) and os.path.exists(self.meta_path)
+
+    def context_options(self):
+        """Options for browser.new_context(), a separate HAR file per context while recording."""
+        # Requests of service workers can neither be recorded nor routed
+        options = {"service_workers": "block"}
+        if self.mode == "record":
+            os.makedirs(self.folder, exist_ok=True)
+            part = os.path.join(self.folder, f"{self.job_id}.part-{uuid.uuid4().hex}.har")
+            self._parts.append(part)
+            # The bodies are attached as files in the directory of the job, the merged archive refers to them
+            options.update(record_har_path=part, record_har_content="attach", record_har_mode="full")
+        return options
+
+    async def setup_context(self, context):
+        """Routes every request of a context to the archive (replay mode only)."""
+        if self.mode == "replay":
+            await context.route_from_har(self.path, not_found="abort")
+
+    def remember(self, name, value):
+        """Stores a JSON serializable result that is needed again for a replay."""
+        self.values[name] = value
+
+    def finish(self, url, templates=None):
+        """
+        Merges the HAR files of all contexts into the archive of the scan and writes the metadata.
+        Has to be called after all contexts of the scan were closed (Playwright writes a HAR file on close).
+        """
+        if self.mode != "record":
+            return
+        log = None
+        for part in self._parts:
+            try:
+                with open(part, encoding="utf-8") as file:
+                    part_log = json.load(file)["log"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"HAR file {part} could not be read: {e}")
+                continue
+            if log is None:
+                log = part_log
+            else:
+                log["pages"] = log.get("pages", []) + part_log.get("pages", [])
+                log["entries"] += part_log.get("entries", [])
+            os.remove(part)
+        if log is None:
+            print(f"Nothing was recorded for job {self.job_id}.")
+            shutil.rmtree(self.folder, ignore_errors=True)
+            return
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump({"log": log}, file)
+        with open(self.meta_path, "w", encoding="utf-8") as file:
+            json.dump({"url": url, "recorded": time.time(), "templates": templates, "values": self.values}, file)
+        print(f"Recorded {len(log['entries'])} requests of job {self.job_id} to {self.path}.")
+
+
+def prune_recordings(keep=200, max_age=30 * 24 * 60 * 60, directory=RECORDINGS_DIR):
+    """
+    Deletes all but the `keep` most recent recordings and every recording older than `max_age` seconds.
+    Directories of recordings that were never finished (e.g. the app stopped during the scan) are
+    deleted after a day.
+    """
+    now = time.time()
+    finished = []
+    for folder in glob.glob(os.path.join(directory, "*", "")):
+        job_id = os.path.basename(os.path.dirname(folder))
+        meta_path = os.path.join(folder, f"{job_id}.json")
+        if os.path.exists(meta_path):
+            finished.append((os.path.getmtime(meta_path), folder))
+        elif now - os.path.getmtime(folder) > 24 * 60 * 60:
+            shutil.rmtree(folder, ignore_errors=True)
+    finished.sort(reverse=True)
+    for position, (modified, folder) in enumerate(finished):
+        if position >= keep or now - modified > max_age:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+async def new_context(browser, **context_options):
+    """
+    Creates a browser context that records into (or replays from) the archive of the current scan.
+    Without an archive it is a plain browser.new_context().
+    """
+    archive = current_archive.get()
+    if archive is None:
+        return await browser.new_context(**context_options)
+    context = await browser.new_context(**{**context_options, **archive.context_options()})
+    await archive.setup_context(context)
+    return context
+
+
+async def close_context(context):
+    """
+    Closes a context created with new_context(), which also writes its part of the HAR archive.
+    Errors are ignored: the context is already gone if its browser crashed.
+    """
+    if context is None:
+        return
+    try:
+        await context.close()
+    except Exception:
+        pass
+
+
+async def main():
+    """Replays a recorded scan without network and prints the results and the duration (benchmark)."""
+    import sys
+    from browser_pool import browser_pool
+    from check_registry import registry
+    from check_scheduler import CheckScheduler
+    import compliance_checks  # Registers the checks
+
+    archive = ScanArchive(sys.argv[1], "replay")
+    with open(archive.meta_path, encoding="utf-8") as file:
+        meta = json.load(file)
+    url, templates = meta["url"], meta.get("templates") or {}
+    # Checks with their own HTTP requests are not part of the archive
+    only = [name for name, check in registry.checks.items() if check.resource != "http"]
+
+    token = current_archive.set(archive)
+    start = time.monotonic()
+    try:
+        criteria_results, feedback_results = await CheckScheduler(registry).run(url, templates, only=only)
+    finally:
+        current_archive.reset(token)
+        await browser_pool.close()
+    print(f"Replayed {len(criteria_results)} criteria of {url} in {time.monotonic() - start:.1f} seconds.")
+    for criterion, result in criteria_results.items():
+        print(f"{'PASS' if result else 'FAIL'}  {criterion}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+import glob
+import json
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+# lxml parses in C and is several times faster than BeautifulSoup's pure Python 'html.parser'.
+# Without it everything falls back to BeautifulSoup with the same results.
+try:
+    from lxml import etree
+    import lxml.html
+    BACKEND = "lxml"
+except ImportError:
+    BACKEND = "bs4"
+
+# Elements whose content is no page text (BeautifulSoup's get_text() skips them as well)
+_NO_TEXT_ELEMENTS = {"script", "style", "template"}
+
+_FOOTER_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' footer ')"
+
+
+class Link:
+    """An anchor of a page: href, text and onclick attribute (None if missing)."""
+    def __init__(self, href=None, text="", onclick=None):
+        self.href = href
+        self.text = text
+        self.onclick = onclick
+
+    def __repr__(self):
+        return f"Link({self.href!r}, {self.text!r})"
+
+
+class _LinkCollector:
+    """lxml parser target collecting the anchors while parsing, without building a tree."""
+    def __init__(self):
+        self.links = []
+        self._open = []  # Anchors whose end tag was not reached yet
+
+    def start(self, tag, attrib):
+        if tag == "a":
+            link = Link(attrib.get("href"), "", attrib.get("onclick"))
+            self.links.append(link)  # Appended at the start tag, so the links are in document order
+            self._open.append(link)
+
+    def end(self, tag):
+        if tag == "a" and self._open:
+            self._open.pop()
+
+    def data(self, data):
+        for link in self._open:
+            link.text += data
+
+    def close(self):
+        return self.links
+
+
+class _TextCollector:
+    """lxml parser target collecting the text nodes of a page (like get_text()), without building a tree."""
+    def __init__(self):
+        self.parts = []
+        self._skipped = 0  # Depth inside script, style and template elements
+        self._merge = False  # lxml may split one text node into several data events
+
+    def start(self, tag, attrib):
+        self._merge = False
+        if tag in _NO_TEXT_ELEMENTS:
+            self._skipped += 1
+
+    def end(self, tag):
+        self._merge = False
+        if tag in _NO_TEXT_ELEMENTS and self._skipped:
+            self._skipped -= 1
+
+    def comment(self, text):
+        self._merge = False
+
+    def data(self, data):
+        if self._skipped:
+            return
+        if self._merge:
+            self.parts[-1] += data
+        else:
+            self.parts.append(data)
+            self._merge = True
+
+    def close(self):
+        return self.parts
+
+
+def _stream(html, target):
+    """Runs an lxml parser target over the HTML and returns its result."""
+    parser = etree.HTMLParser(target=target)
+    parser.feed(html or " ")
+    return parser.close()
+
+
+def extract_links(html):
+    """Returns all anchors of a page as Link objects (fast path, no document tree with lxml)."""
+    if BACKEND == "lxml":
+        return _stream(html, _LinkCollector())
+    return Document(html).links()
+
+
+def extract_text(html, separator=" "):
+    """Returns the text of a page like BeautifulSoup's get_text(separator) (fast path, no document tree with lxml)."""
+    if BACKEND == "lxml":
+        return separator.join(_stream(html, _TextCollector()))
+    return BeautifulSoup(html, "html.parser").get_text(separator=separator)
+
+
+class Document:
+    """
+    A parsed page, for queries that need the document tree (e.g. only the links of the footer).
+    Uses lxml if it is installed, BeautifulSoup ('html.parser') otherwise.
+    """
+    def __init__(self, html):
+        self.backend = BACKEND
+        if self.backend == "lxml":
+            parser = lxml.html.HTMLParser()
+            parser.feed(html or " ")
+            self.root = parser.close()  # None for an empty page
+        else:
+            self.root = BeautifulSoup(html or "", "html.parser")
+
+    def _link(self, element):
+        if self.backend == "lxml":
+            return Link(element.get("href"), element.text_content(), element.get("onclick"))
+        return Link(element.get("href"), element.text, element.get("onclick"))
+
+    def _anchors(self, element):
+        if element is None:
+            return []
+        if self.backend == "lxml":
+            return [self._link(anchor) for anchor in element.iter("a")]
+        return [self._link(anchor) for anchor in element.find_all("a")]
+
+    def links(self):
+        """All anchors of the page."""
+        return self._anchors(self.root)
+
+    def footer(self):
+        """
+        The footer of the page: the first <footer>, element with class "footer" or id "footer",
+        or else the last element of the body. None if there is none.
+        """
+        if self.root is None:
+            return None
+        if self.backend == "lxml":
+            for query in ("//footer", f"//*[{_FOOTER_CLASS}]", "//*[@id='footer']"):
+                found = self.root.xpath(query)
+                if found:
+                    return found[0]
+            body = self.root.find("body")
+            children = [child for child in body if isinstance(child.tag, str)] if body is not None else []
+            return children[-1] if children else None
+        soup = self.root
+        footer = soup.find('footer') or soup.find(class_='footer') or soup.find(id='footer')
+        if not footer and soup.body:
+            children = soup.body.find_all(recursive=False)
+            footer = children[-1] if children else None
+        return footer
+
+    def footer_links(self):
+        """The anchors of the footer."""
+        return self._anchors(self.footer())
+
+
+def _saved_pages(paths):
+    """HTML of saved pages: .html files, or the HTML responses in recorded HAR archives of scans."""
+    pages = []
+    for path in paths:
+        if path.endswith(".har"):
+            with open(path, encoding="utf-8") as file:
+                entries = json.load(file)["log"]["entries"]
+            for entry in entries:
+                content = entry.get("response", {}).get("content", {})
+                if "html" not in content.get("mimeType", ""):
+                    continue
+                if content.get("_file"):
+                    # Body attached as a file next to the archive
+                    with open(os.path.join(os.path.dirname(path), content["_file"]), encoding="utf-8", errors="replace") as file:
+                        pages.append(file.read())
+                elif content.get("text") and content.get("encoding") != "base64":
+                    pages.append(content["text"])
+        else:
+            with open(path, encoding="utf-8", errors="replace") as file:
+                pages.append(file.read())
+    return pages
+
+
+def main():
+    """
+    Benchmark on saved pages of customer sites: python html_parsing.py [page.html | scan.har ...]
+    Without arguments the HAR archives of the recorded scans are used.
+    """
+    from har_archive import RECORDINGS_DIR
+    paths = sys.argv[1:] or [path for path in glob.glob(os.path.join(RECORDINGS_DIR, "*", "*.har")) if ".part-" not in path]
+    pages = _saved_pages(paths)
+    if not pages:
+        print("No saved pages found, pass .html files or record a scan first.")
+        return
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / 1e6:.1f} MB, fast backend: {BACKEND}")
+
+    def measure(name, func):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        seconds = time.perf_counter() - start
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+        return seconds
+
+    slow = measure("BeautifulSoup links", lambda page: BeautifulSoup(page, "html.parser").find_all("a", href=True))
+    fast = measure("extract_links", extract_links)
+    print(f"  -> {slow / fast:.1f}x")
+    slow = measure("BeautifulSoup text", lambda page: BeautifulSoup(page, "html.parser").get_text(separator=" "))
+    fast = measure("extract_text", extract_text)
+    print(f"  -> {slow / fast:.1f}x")
+    measure("Document footer links", lambda page: Document(page).footer_links())
+    same = all(
+        [link.href for link in extract_links(page) if link.href is not None]
+        == [link["href"] for link in BeautifulSoup(page, "html.parser").find_all("a", href=True)]
+        for page in pages
+    )
+    print(f"Same links as BeautifulSoup on every page: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import asynccontextmanager
+import aiohttp
+from politeness import rate_limiter as shared_rate_limiter, THROTTLE_STATUSES
+
+# Headers of a normal desktop browser, some websites block requests without them
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/'
+}
+
+
+class HttpClient:
+    """
+    HTTP client shared by all checkers that fetch pages without the browser (imprint, footer, link checks).
+
+    All requests go through one aiohttp session with a pooled connector: connections are kept alive
+    and reused, the number of connections per host is limited and DNS lookups are cached, so checking
+    many links of one website does not open a new connection (and TLS handshake) for every link.
+    Headers and timeouts are the same for every checker. Requests wait for the per-host rate limiter,
+    a short Retry-After (429, 503) is waited for and the request sent once more.
+    """
+    def __init__(self, headers=None, timeout=10, connect_timeout=5, limit=100, limit_per_host=8, dns_cache_ttl=300,
+                 rate_limiter=None, max_retry_wait=15):
+        """
+        :param headers: Default headers of every request (default: HEADERS)
+        :param timeout: Total timeout of a request in seconds
+        :param connect_timeout: Timeout for establishing a connection in seconds
+        :param limit: Maximum number of open connections
+        :param limit_per_host: Maximum number of open connections to one host
+        :param dns_cache_ttl: Seconds a resolved host name is cached
+        :param rate_limiter: HostRateLimiter shared with the browser navigations (default: politeness.rate_limiter)
+        :param max_retry_wait: Longest Retry-After in seconds that is waited for within a request
+        """
+        self.headers = dict(HEADERS if headers is None else headers)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.max_retry_wait = max_retry_wait
+        self._session = None
+        self._session_loop = None
+
+    async def session(self):
+        """
+        Returns the shared aiohttp session.
+        aiohttp sessions are bound to their event loop, so a new one is created on a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl, enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, method, url, timeout=None, **kwargs):
+        """
+        Sends a request with the shared session, used like aiohttp's session.request().
+
+        :param timeout: Total timeout in seconds for this request (default: the client's)
+        :param kwargs: Further arguments for session.request(), e.g. allow_redirects or headers
+        """
+        session = await self.session()
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout, sock_connect=self.connect_timeout)
+        for attempt in range(2):
+            await self.rate_limiter.acquire(url)
+            async with session.request(method, url, **kwargs) as response:
+                if response.status in THROTTLE_STATUSES:
+                    delay = self.rate_limiter.retry_after(url, response.headers.get('Retry-After'))
+                    if attempt == 0 and delay is not None and delay <= self.max_retry_wait:
+                        continue  # The rate limiter waits for the pause before the second attempt
+                yield response
+                return
+
+    def get(self, url, timeout=None, **kwargs):
+        """Sends a GET request with the shared session, used like aiohttp's session.get()."""
+        return self.request("GET", url, timeout=timeout, **kwargs)
+
+    async def close(self):
+        """Closes the session and its connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+# Shared client used by all checkers of this process
+http_client = HttpClient()
@@ -1,8 +1,5 @@
-from flask import Flask, render_template, request
-from urllib.parse import urlparse, urljoin
-import requests
-from bs4 import BeautifulSoup
 import re
+from imprint_resolver import imprint_resolver
 
 class ImprintChecker:
     #Initializes the ImprintChecker class and sets typical imprint paths that might be found on a website.
@@ -11,60 +8,12 @@ class ImprintChecker:
 
     #This method attempts to find the URL of the imprint page on the base URL. It prioritizes links with keywords like "impressum", "imprint", and "legal". 
     #If no high-priority link is found, it looks for lower-priority keywords like "terms", "about", and "contact".
-    def find_imprint_url(self, base_url):
+    async def find_imprint_url(self, base_url):
         """
-        Try to find the imprint URL on the base URL.
+        Try to find the imprint URL on the base URL (resolved once and cached by the ImprintResolver).
         """
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Referer': 'https://www.google.com/'
-            }
-            response = requests.get(base_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Extract links on the page
-            links = soup.find_all('a', href=True)
-            high_priority_keywords = ['impressum', 'imprint', 'general-imprint']
-            mid_priority_keywords = ['terms', 'legal-notice', 'legal', 'legal-information']
-            low_priority_keywords = ['about', 'contact', 'general']
-
-            parsed_base_url = urlparse(base_url)
-            base_domain = f"{parsed_base_url.scheme}://{parsed_base_url.netloc}"
-
-            # Search for links with high priority
-            for link in links:
-                href = link['href'].lower()
-                if any(keyword in href for keyword in high_priority_keywords):
-                    if href.startswith('/'):  # Relative path
-                        return urljoin(base_url, href)
-                    elif href.startswith('http') and base_domain in href:  # Check if link belongs to the same domain
-                        return href
-
-                                    # Search for links with mid priority
-            for link in links:
-                href = link['href'].lower()
-                if any(keyword in href for keyword in mid_priority_keywords):
-                    if href.startswith('/'):  # Relative path
-                        return urljoin(base_url, href)
-                    elif href.startswith('http'):  # External Link
-                        return href 
-
-            # Search for links with low priority
-            for link in links:
-                href = link['href'].lower()
-                if any(keyword in href for keyword in low_priority_keywords):
-                    if href.startswith('/'):  # Relative path
-                        return urljoin(base_url, href)
-                    elif href.startswith('http'):  # Allow only internal links
-                        return href
-
-
-        except requests.RequestException as e:
-            print(f"Error retrieving the page: {e}")
-        return None  # No imprint URL found
+        imprint = await imprint_resolver.resolve(base_url)
+        return imprint.url
 
     def normalize_text(self, text):
         """
@@ -74,30 +23,34 @@ class ImprintChecker:
         text = re.sub(r'[^\w\s]', '', text)  # Remove special characters
         return text.lower().strip()
 
-    def check_terms(self, url, terms):
+    async def check_terms(self, url, terms, imprint=None):
         """
         Checks whether certain terms are contained in the imprint text.
+        The imprint that was already resolved for the scan can be passed in.
         """
-        # Step 1: Find the imprint URL
-        imprint_url = self.find_imprint_url(url)
+        # Step 1: Find the imprint URL and load the imprint page
+        if imprint is None:
+            imprint = await imprint_resolver.resolve(url)
+        imprint_url = imprint.url
         print(f"Found imprint URL: {imprint_url}")
         if not imprint_url:
             print(f"No imprint URL found for {url}.")
             return None, {}, False, False  # No imprint URL found
 
-        try:
-            # Step 2: Retrieve HTML of the imprint page
-            response = requests.get(imprint_url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Extract the entire text of the page
-            page_text = soup.get_text(separator=' ').lower()
-        except requests.RequestException as e:
-            print(f"Error retrieving the imprint page {imprint_url}: {e}")
+        # Step 2: Text of the imprint page
+        if imprint.text is None:
             return imprint_url, {}, False, False  # Error when retrieving the imprint page
 
         # Step 3: Check terms
+        term_results = self.match_terms(imprint.text, terms)
+
+        # Return of the results
+        return imprint_url, term_results, False, False
+
+    def match_terms(self, page_text, terms):
+        """
+        Returns {term: True/False} depending on whether the term is contained in the page text.
+        """
         normalized_page_text = self.normalize_text(page_text)
         term_results = {}
         for term in terms:
@@ -106,7 +59,4 @@ class ImprintChecker:
 
             # Debug log for each term
             print(f"Check term '{term}' (normalized: '{normalized_term}') in the imprint: {'Found' if term_results[term] else 'Not found'}")
-
-
-        # Return of the results
-        return imprint_url, term_results, False, False
+        return term_results
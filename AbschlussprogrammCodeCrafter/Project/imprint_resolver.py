@@ -0,0 +1,153 @@
+import asyncio
+import time
+import aiohttp
+from html_parsing import extract_links, extract_text
+from urllib.parse import urlparse, urljoin
+from navigation_policy import navigation_policy
+from http_client import http_client
+
+HIGH_PRIORITY_KEYWORDS = ['impressum', 'imprint', 'general-imprint']
+MID_PRIORITY_KEYWORDS = ['terms', 'legal-notice', 'legal', 'legal-information']
+LOW_PRIORITY_KEYWORDS = ['about', 'contact', 'general']
+
+
+def find_imprint_link(base_url, html):
+    """
+    Searches the links of a page for the imprint. Links with keywords like "impressum", "imprint"
+    are preferred, then "terms", "legal" and at last "about", "contact".
+
+    :param base_url: URL of the page, used to resolve relative links
+    :param html: HTML of the page
+    :return: URL of the imprint page or None
+    """
+    links = [link.href.lower() for link in extract_links(html) if link.href is not None]
+
+    parsed_base_url = urlparse(base_url)
+    base_domain = f"{parsed_base_url.scheme}://{parsed_base_url.netloc}"
+
+    # Search for links with high priority
+    for href in links:
+        if any(keyword in href for keyword in HIGH_PRIORITY_KEYWORDS):
+            if href.startswith('/'):  # Relative path
+                return urljoin(base_url, href)
+            elif href.startswith('http') and base_domain in href:  # Allow only internal absolute links
+                return href
+
+    # Search for links with mid and low priority, external links are allowed here
+    for keywords in (MID_PRIORITY_KEYWORDS, LOW_PRIORITY_KEYWORDS):
+        for href in links:
+            if any(keyword in href for keyword in keywords):
+                if href.startswith('/'):  # Relative path
+                    return urljoin(base_url, href)
+                elif href.startswith('http'):  # External Link
+                    return href
+    return None  # No imprint URL found
+
+
+class Imprint:
+    """
+    Imprint of a website as resolved by the ImprintResolver.
+    `url` is None if no imprint link was found, `text` is None if the imprint page could not be loaded.
+    """
+    def __init__(self, url, text=None, error=None):
+        self.url = url
+        self.text = text
+        self.error = error
+
+
+class ImprintResolver:
+    """
+    Finds the imprint of a website and loads the imprint page, both with async requests.
+
+    The homepage and the imprint page are fetched once, the result is shared by the
+    imprint checks of a scan and cached for `ttl` seconds for the following scans.
+    Concurrent scans of the same website wait for the same request.
+    """
+    def __init__(self, ttl=3600, timeout=10, max_entries=500, client=None):
+        """
+        :param ttl: Seconds a resolved imprint is reused
+        :param timeout: Timeout of a single request in seconds
+        :param max_entries: Maximum number of websites kept in the cache
+        :param client: HttpClient for the requests (default: the shared http_client)
+        """
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.client = client or http_client
+        self._cache = {}  # base URL -> (expiry time, Imprint)
+        self._pending = {}  # base URL -> running task
+
+    async def fetch(self, url):
+        """
+        Loads a page and returns its HTML.
+        Connection errors and timeouts count for the circuit breaker the browser checks use as well.
+        """
+        breaker = navigation_policy.breaker
+        breaker.check(url)
+        try:
+            async with self.client.get(url, timeout=self.timeout) as response:
+                response.raise_for_status()
+                html = await response.text(errors='replace')
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            breaker.record_failure(url)
+            raise
+        breaker.record_success(url)
+        return html
+
+    async def resolve(self, base_url):
+        """
+        Returns the Imprint of a website (from the cache if it was resolved recently).
+
+        :param base_url: URL of the homepage
+        """
+        cached = self._cache.get(base_url)
+        if cached and cached[0] > time.monotonic():
+            print(f"Imprint of {base_url} taken from the cache.")
+            return cached[1]
+
+        task = self._pending.get(base_url)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(base_url))
+            self._pending[base_url] = task
+            task.add_done_callback(lambda _: self._pending.pop(base_url, None))
+        return await asyncio.shield(task)
+
+    async def _resolve(self, base_url):
+        try:
+            homepage = await self.fetch(base_url)
+        except Exception as e:
+            # Not cached, the next scan tries again
+            print(f"Error retrieving the page: {e}")
+            return Imprint(None, error=str(e))
+
+        imprint_url = find_imprint_link(base_url, homepage)
+        print(f"Found imprint URL: {imprint_url}")
+        imprint = Imprint(imprint_url)
+        if imprint_url:
+            try:
+                html = await self.fetch(imprint_url)
+                imprint.text = extract_text(html, separator=' ').lower()
+            except Exception as e:
+                print(f"Error retrieving the imprint page {imprint_url}: {e}")
+                imprint.error = str(e)
+
+        self._store(base_url, imprint)
+        return imprint
+
+    def _store(self, base_url, imprint):
+        """Caches a resolved imprint and drops expired (or the oldest) entries."""
+        now = time.monotonic()
+        if len(self._cache) >= self.max_entries:
+            for key in [key for key, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[key]
+            while len(self._cache) >= self.max_entries:
+                del self._cache[next(iter(self._cache))]
+        self._cache[base_url] = (now + self.ttl, imprint)
+
+    def clear(self):
+        """Empties the cache (e.g. after an imprint was changed)."""
+        self._cache.clear()
+
+
+# Shared resolver used by all imprint checks of this process
+imprint_resolver = ImprintResolver()
@@ -0,0 +1,115 @@
+import hashlib
+import re
+from contextvars import ContextVar
+from functools import lru_cache
+from langdetect import DetectorFactory, detect
+from langdetect.lang_detect_exception import LangDetectException
+
+# langdetect is random unless seeded, two checkers could get different answers for one banner
+DetectorFactory.seed = 0
+
+# Languages determined during the current scan, {text hash: language}, set by the CheckScheduler.
+# Tasks inherit it, so all checkers of a scan read the same answer for the same text.
+scan_languages = ContextVar("scan_languages", default=None)
+
+# Language declared by the markup, for free: the closest lang attribute of the element,
+# the active language of the CMP and finally the lang attribute of the document
+_DECLARED_LANGUAGE = """
+(element) => {
+    const declared = [];
+    if (element && element.closest) {
+        const owner = element.closest('[lang]');
+        if (owner) declared.push(owner.getAttribute('lang'));
+    }
+    try {
+        if (window.UC_UI && window.UC_UI.getActiveLanguage) declared.push(window.UC_UI.getActiveLanguage());
+    } catch (e) {}
+    const script = document.querySelector('script[data-culture], script[data-language]');  // Cookiebot, OneTrust
+    if (script) declared.push(script.getAttribute('data-culture') || script.getAttribute('data-language'));
+    declared.push(document.documentElement.getAttribute('lang'));
+    return declared.find(language => language && language.trim()) || null;
+}
+"""
+
+
+def normalize_language(language):
+    """Reduces a language tag to its primary subtag, e.g. "de-DE" -> "de"."""
+    if not language:
+        return None
+    match = re.match(r'\s*([A-Za-z]{2,3})\b', str(language))
+    return match.group(1).lower() if match else None
+
+
+class LanguageService:
+    """
+    Language of banner texts, shared by all checkers.
+
+    The language declared in the markup (element or document lang attribute, CMP locale) is used
+    when there is one, otherwise the text is detected with a seeded langdetect on a bounded sample.
+    Results are cached per scan and, by text hash, per process.
+    """
+    def __init__(self, sample_size=2000, cache_size=1024):
+        """
+        :param sample_size: Characters of a text used for detection
+        :param cache_size: Number of detected texts cached per process
+        """
+        self.sample_size = sample_size
+        self._detect = lru_cache(maxsize=cache_size)(self._detect_sample)
+
+    def _sample(self, text):
+        return re.sub(r'\s+', ' ', text or "").strip()[:self.sample_size]
+
+    @staticmethod
+    def _hash(sample):
+        return hashlib.sha1(sample.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _detect_sample(text_hash, sample):
+        try:
+            return detect(sample)
+        except LangDetectException:
+            return None  # No features in the text, e.g. only numbers
+
+    def text_language(self, text, default=None):
+        """Detects the language of a text (deterministic), `default` if it can not be detected."""
+        sample = self._sample(text)
+        if not sample:
+            return default
+        return self._detect(self._hash(sample), sample) or default
+
+    async def declared_language(self, target):
+        """
+        Language declared by the markup of a page, frame or element handle.
+
+        :return: Primary language subtag, or None if none is declared
+        """
+        try:
+            return normalize_language(await target.evaluate(_DECLARED_LANGUAGE))
+        except Exception as e:
+            print(f"Declared language could not be read: {e}")
+            return None
+
+    async def detect(self, target=None, text=None, default=None):
+        """
+        Language of a banner: declared by the markup of `target` if possible, detected from `text` otherwise.
+        Within a scan the same text always gets the same answer.
+
+        :param target: Page, frame or element handle of the banner (optional)
+        :param text: Text of the banner
+        :param default: Returned if the language can not be determined
+        """
+        languages = scan_languages.get()
+        key = self._hash(self._sample(text))
+        if languages is not None and key in languages:
+            return languages[key] or default
+        language = await self.declared_language(target) if target is not None else None
+        if language is None:
+            language = self.text_language(text)
+        print(f"Language of the banner: {language or 'unknown'}")
+        if languages is not None:
+            languages[key] = language
+        return language or default
+
+
+# Shared service used by all checkers of this process
+language_service = LanguageService()
@@ -0,0 +1,206 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import aiohttp
+from urllib.parse import urldefrag
+from http_client import http_client
+from create_db import create_link_status_table
+
+# HEAD answers that are not trusted: servers that do not implement HEAD, or answer it differently
+_HEAD_UNRELIABLE = 400
+
+
+class LinkStatus:
+    """
+    Result of the validation of a link: the HTTP status, or the error if there was no response.
+    `etag` and `last_modified` are the validators of a successful response.
+    """
+    def __init__(self, url, status=None, error=None, etag=None, last_modified=None, checked=None):
+        self.url = url
+        self.status = status
+        self.error = error
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked = checked or time.time()
+
+    @property
+    def ok(self):
+        return self.status is not None and self.status < 400
+
+    def __repr__(self):
+        return f"LinkStatus({self.url!r}, status={self.status}, error={self.error!r})"
+
+
+class LinkStatusRegistry:
+    """
+    Status of links, shared by all link checking checkers and stored in the database between scans.
+
+    A link is validated with HEAD first, only if the server does not answer it properly a GET
+    follows, and the body of a response is never read. Within `ttl` seconds the known status is
+    reused, after it the link is revalidated with a conditional request (If-None-Match,
+    If-Modified-Since), a "304 Not Modified" keeps the known status. Concurrent checks of the same
+    link (e.g. the same footer link found by two checkers) wait for the same request.
+    Errors without a response are only kept in memory for `error_ttl` seconds.
+    The database is only accessed in worker threads (asyncio.to_thread), like the ResultCache of the
+    CheckScheduler, so link checks never block the event loop of the running scans.
+    """
+    def __init__(self, db_path='compliance.db', ttl=24 * 60 * 60, max_age=30 * 24 * 60 * 60,
+                 error_ttl=300, timeout=10, client=None, max_entries=5000):
+        """
+        :param db_path: SQLite database of the tool (None to keep the status in memory only)
+        :param ttl: Seconds a known status is reused without a request
+        :param max_age: Seconds a status is kept for conditional revalidation
+        :param error_ttl: Seconds a failed request is remembered
+        :param timeout: Timeout of a single request in seconds
+        :param client: HttpClient for the requests (default: the shared http_client)
+        :param max_entries: Maximum number of links kept in memory
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.client = client or http_client
+        self.max_entries = max_entries
+        self._memory = {}  # (url, follow_redirects) -> LinkStatus
+        self._pending = {}  # (url, follow_redirects) -> running task
+        self._prepared = False  # Table created and expired rows removed (once per process)
+        self._prepare_lock = threading.Lock()
+
+    async def check(self, url, follow_redirects=True):
+        """
+        Returns the LinkStatus of a URL.
+
+        :param follow_redirects: Report the status of the redirect target (True) or of the URL itself (False)
+        """
+        key = (urldefrag(url).url, bool(follow_redirects))
+        known = self._memory.get(key)
+        if self._fresh(known):
+            return known
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(key, known))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        status = await asyncio.shield(task)
+        self._remember(key, status)
+        return status
+
+    def _fresh(self, status):
+        return status is not None and time.time() - status.checked < (self.ttl if status.status is not None else self.error_ttl)
+
+    async def _refresh(self, key, known):
+        """Takes the status from the database if it is not in memory, validates the link if there is none or it expired."""
+        if known is None:
+            known = await asyncio.to_thread(self._load, *key)
+            if self._fresh(known):
+                return known
+        return await self._validate(key[0], key[1], known)
+
+    async def _validate(self, url, follow_redirects, known):
+        headers = {}
+        if known is not None and known.status == 200:
+            # Validators only describe successful responses
+            if known.etag:
+                headers['If-None-Match'] = known.etag
+            if known.last_modified:
+                headers['If-Modified-Since'] = known.last_modified
+
+        status = await self._request("HEAD", url, follow_redirects, headers)
+        if status.status is None or status.status >= _HEAD_UNRELIABLE:
+            if status.error and status.error.startswith("Timeout"):
+                return status  # A GET would time out as well
+            status = await self._request("GET", url, follow_redirects, headers)
+
+        if status.status == 304 and known is not None:
+            # Not modified: the known status is still valid
+            status = LinkStatus(url, known.status, etag=status.etag or known.etag,
+                                last_modified=status.last_modified or known.last_modified)
+        if status.status is not None:
+            await asyncio.to_thread(self._store, status, follow_redirects)
+        return status
+
+    async def _request(self, method, url, follow_redirects, headers):
+        """Sends a request and returns the status as soon as the headers arrived (the body is not read)."""
+        try:
+            async with self.client.request(method, url, timeout=self.timeout,
+                                           allow_redirects=follow_redirects, headers=headers) as response:
+                return LinkStatus(url, response.status, etag=response.headers.get('ETag'),
+                                  last_modified=response.headers.get('Last-Modified'))
+        except asyncio.TimeoutError:
+            return LinkStatus(url, error=f"Timeout after {self.timeout} s")
+        except (aiohttp.ClientError, ValueError) as e:
+            return LinkStatus(url, error=str(e) or type(e).__name__)
+
+    def _remember(self, key, status):
+        if key not in self._memory and len(self._memory) >= self.max_entries:
+            del self._memory[next(iter(self._memory))]
+        self._memory[key] = status
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self._prepared:
+            with self._prepare_lock:
+                if not self._prepared:
+                    try:
+                        create_link_status_table(conn.cursor())
+                        # Expired rows are removed once per process, not with every stored status
+                        conn.execute('DELETE FROM link_status WHERE checked <= ?', (time.time() - self.max_age,))
+                        conn.commit()
+                        self._prepared = True
+                    except sqlite3.Error as e:
+                        print(f"Link status table could not be prepared: {e}")
+        return conn
+
+    def _load(self, url, follow_redirects):
+        """Returns the stored status of a link (also an expired one, for revalidation) or None."""
+        if self.db_path is None:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT status, etag, last_modified, checked FROM link_status '
+                'WHERE url = ? AND follow_redirects = ? AND checked > ?',
+                (url, int(follow_redirects), time.time() - self.max_age)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Link status could not be read: {e}")
+            return None
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return LinkStatus(url, row[0], etag=row[1], last_modified=row[2], checked=row[3])
+
+    def _store(self, status, follow_redirects):
+        if self.db_path is None:
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO link_status (url, follow_redirects, status, etag, last_modified, checked) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (status.url, int(follow_redirects), status.status, status.etag, status.last_modified, status.checked)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Link status could not be written: {e}")
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Forgets all known link states."""
+        self._memory.clear()
+        if self.db_path is not None:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM link_status')
+                conn.commit()
+            finally:
+                conn.close()
+
+
+# Shared registry used by all link checks of this process
+link_status = LinkStatusRegistry()
@@ -0,0 +1,161 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from urllib.parse import urlparse
+from playwright.async_api import Error, TimeoutError
+from politeness import rate_limiter, THROTTLE_STATUSES
+
+# Deadline (event loop time) of the scan the current task belongs to, set by the CheckScheduler.
+# Tasks inherit it, so every navigation of a scan knows how much time is left without passing it around.
+scan_deadline = ContextVar("scan_deadline", default=None)
+
+# Network errors worth another attempt. Others (unknown host, certificate errors...) fail at once.
+RETRYABLE_ERRORS = (
+    "net::ERR_CONNECTION_RESET", "net::ERR_CONNECTION_CLOSED", "net::ERR_CONNECTION_REFUSED",
+    "net::ERR_CONNECTION_TIMED_OUT", "net::ERR_TIMED_OUT", "net::ERR_EMPTY_RESPONSE",
+    "net::ERR_NETWORK_CHANGED", "net::ERR_HTTP2_PROTOCOL_ERROR",
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of a navigation while the circuit breaker of the host is open."""
+
+
+class ScanDeadlineExceeded(Exception):
+    """Raised when a navigation would start after the deadline of the scan."""
+
+
+def remaining_time():
+    """Seconds left until the deadline of the current scan (None without a deadline)."""
+    deadline = scan_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+class HostCircuitBreaker:
+    """
+    Stops all checkers from contacting a host after repeated failures, instead of each one
+    timing out on its own. After `cooldown` seconds one trial request is let through
+    (half-open): a success closes the circuit, a failure opens it again.
+    """
+    def __init__(self, failure_threshold=3, cooldown=120):
+        """
+        :param failure_threshold: Consecutive failures after which the circuit opens
+        :param cooldown: Seconds the circuit stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = {}  # host -> consecutive failures
+        self._opened = {}  # host -> time the circuit was opened
+
+    def _host(self, url):
+        return (urlparse(url).hostname or url).lower()
+
+    def check(self, url):
+        """Raises CircuitOpenError if requests to the host of `url` are currently stopped."""
+        host = self._host(url)
+        opened = self._opened.get(host)
+        if opened is None:
+            return
+        if time.monotonic() - opened < self.cooldown:
+            raise CircuitOpenError(
+                f"{host} failed {self._failures.get(host, 0)} times in a row, requests are paused for {self.cooldown} s."
+            )
+        # Half-open: let this request through, the next failure opens the circuit again
+        del self._opened[host]
+        self._failures[host] = self.failure_threshold - 1
+
+    def record_success(self, url):
+        host = self._host(url)
+        self._failures.pop(host, None)
+        self._opened.pop(host, None)
+
+    def record_failure(self, url):
+        host = self._host(url)
+        self._failures[host] = self._failures.get(host, 0) + 1
+        if self._failures[host] >= self.failure_threshold and host not in self._opened:
+            print(f"Circuit breaker opened for {host} after {self._failures[host]} failures.")
+            self._opened[host] = time.monotonic()
+
+
+class NavigationPolicy:
+    """
+    Shared retry policy for page navigations: exponential backoff with jitter, timeouts that
+    never reach past the deadline of the scan and a per-host circuit breaker.
+    Navigations share the per-host rate limiter with the HTTP requests and respect Retry-After.
+    """
+    def __init__(self, attempts=3, timeout=30000, base_delay=1.0, max_delay=10.0, breaker=None):
+        """
+        :param attempts: Default number of attempts per navigation
+        :param timeout: Default timeout of one attempt in milliseconds
+        :param base_delay: Delay before the second attempt in seconds, doubled for every further attempt
+        :param max_delay: Upper bound of the delay in seconds
+        :param breaker: HostCircuitBreaker shared by all checkers
+        """
+        self.attempts = attempts
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or HostCircuitBreaker()
+
+    def backoff(self, attempt):
+        """Delay in seconds after the failed attempt number `attempt` (0-based), with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _retryable(self, error):
+        return isinstance(error, TimeoutError) or any(code in str(error) for code in RETRYABLE_ERRORS)
+
+    def _host_failure(self, error):
+        """Timeouts and network errors count for the circuit breaker, other errors are the page's fault."""
+        return isinstance(error, TimeoutError) or "net::ERR_" in str(error)
+
+    def _attempt_timeout(self, timeout):
+        """Timeout of the next attempt in milliseconds, shortened to the time left for the scan."""
+        remaining = remaining_time()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise ScanDeadlineExceeded("The deadline of the scan was reached.")
+        return min(timeout, remaining * 1000)
+
+    async def goto(self, page, url, attempts=None, timeout=None, **goto_options):
+        """
+        Navigates a page to `url` like page.goto(), with retries.
+
+        :param attempts: Number of attempts (default: the policy's)
+        :param timeout: Timeout of one attempt in milliseconds (default: the policy's)
+        :param goto_options: Further keyword arguments for page.goto(), e.g. wait_until
+        :return: Response of the main document
+        """
+        attempts = attempts or self.attempts
+        timeout = timeout or self.timeout
+        for attempt in range(attempts):
+            self.breaker.check(url)
+            await rate_limiter.acquire(url)
+            try:
+                response = await page.goto(url, timeout=self._attempt_timeout(timeout), **goto_options)
+                self.breaker.record_success(url)
+                if response is not None and response.status in THROTTLE_STATUSES and attempt + 1 < attempts:
+                    delay = rate_limiter.retry_after(url, response.headers.get("retry-after"))
+                    remaining = remaining_time()
+                    if delay is not None and (remaining is None or delay < remaining):
+                        print(f"Loading {url} was throttled (HTTP {response.status}), retrying in {delay:.0f} s.")
+                        continue  # The rate limiter waits for the pause before the next attempt
+                return response
+            except Error as e:
+                if self._host_failure(e):
+                    self.breaker.record_failure(url)
+                if attempt + 1 >= attempts or not self._retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    raise
+                print(f"Loading {url} failed (attempt {attempt + 1} of {attempts}), retrying in {delay:.1f} s: {e}")
+                await asyncio.sleep(delay)
+
+
+# Shared policy used by all checkers of this process
+navigation_policy = NavigationPolicy()
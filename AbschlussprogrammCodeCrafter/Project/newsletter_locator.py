@@ -0,0 +1,267 @@
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urldefrag, urlparse
+from browser_pool import browser_pool
+from page_session import PageSession, landing_page
+from banner_readiness import wait_until_settled
+from navigation_policy import navigation_policy
+
+# Customers whose newsletter can not be found dynamically (hard-coded page, a button that
+# leads to the form, or a modal that has to be opened on the homepage).
+#   url:     Newsletter page to use instead of the homepage
+#   follow:  Selector of a link on that page that leads to the actual form
+#   trigger: Selector of a button that opens the newsletter modal, `ready` is the modal itself
+SPECIAL_CASES = {
+    "loreal-paris.de": {"url": "https://cloud.mail.lorealpartnershop.com/lorealprofessionnelparis-anmeldung-newsletter"},
+    "tesa.com": {"url": "https://www.tesa.com/de-de/buero-und-zuhause/do-it-yourself-magazin/newsletter"},
+    "krombacher.de": {"url": "https://www.krombacher.de/die-brauerei/newsletter-anmeldung"},
+    "hansgrohe.de": {"url": "https://www.hansgrohe.de/#interest-form"},
+    "climeworks.com": {"url": "https://info.climeworks.com/newsletter-subscription-form"},
+    "gardena.com/de": {"url": "https://www.gardena.com/de/c/gardena-newsletter"},
+    "vileda.de": {"url": "https://www.vileda.de/newsletter"},  # The homepage blocks the webcrawler
+    "aldi-sued.de": {"url": "https://www.aldi-sued.de/de/newsletter.html"},
+    "royalcanin.com/de": {
+        "url": "https://www.royalcanin.com/de/about-us/newsletter",
+        "follow": 'a:has-text("Zum Newsletter anmelden")',
+    },
+    "schwarzkopf.de": {
+        "trigger": 'button.calltoaction__link.cta:has-text("ANMELDEN")',
+        "ready": 'div.calltoaction__wrapper.cta',
+    },
+    "verivox.de": {},  # Newsletter form is part of the footer of the homepage
+}
+
+# Keywords in the URL of a link and their weight for the ranking of candidates
+URL_KEYWORDS = {
+    "newsletter-registrierung": 6, "newsletter-anmeldung": 6, "newsletter": 5, "subscribe": 4,
+    "enews": 3, "signup": 3, "sign-up": 3, "anmeldung": 2, "email": 1,
+}
+
+# Phrases in the anchor text of a link and their weight
+TEXT_KEYWORDS = {
+    "newsletter": 4, "abonnieren": 3, "subscribe": 3, "sign up": 2, "anmelden": 1, "e-mail": 1,
+}
+
+# Links to legal pages are never newsletter candidates
+IGNORE_KEYWORDS = ["impressum", "datenschutz", "agb", "privacy", "legal"]
+
+# Elements of a sign-up form, the readiness check waits for the first one that appears
+FORM_SELECTORS = ['input[type="email"]', 'input[name*="mail" i]', 'input[id*="mail" i]', 'form']
+
+# Collects all links of a page in one round trip instead of one call per <a> element
+_COLLECT_LINKS = """
+() => Array.from(document.querySelectorAll('a[href]')).map(a => ({
+    href: a.getAttribute('href'),
+    text: (a.innerText || a.getAttribute('aria-label') || a.title || '').trim().slice(0, 200)
+}))
+"""
+
+# Signals that a probed page really contains a newsletter sign-up form
+_NEWSLETTER_SIGNALS = """
+() => {
+    const email = document.querySelector('input[type="email"], input[name*="mail" i], input[id*="mail" i]');
+    const checkbox = document.querySelector('input[type="checkbox"]');
+    const text = (document.body ? document.body.innerText : '').toLowerCase();
+    return {email: !!email, checkbox: !!checkbox, newsletter: text.includes('newsletter')};
+}
+"""
+
+
+class NewsletterTarget:
+    """
+    Result of the newsletter discovery of a scan: the page (and, if needed, the modal trigger)
+    on which the newsletter checks run.
+    """
+    def __init__(self, url, source, trigger=None, ready=None):
+        self.url = url
+        self.source = source  # "special case", "url", "link", "probe" or "homepage" (nothing found)
+        self.trigger = trigger
+        self.ready = ready
+
+    @property
+    def found(self):
+        return self.source != "homepage"
+
+    async def prepare(self, page):
+        """Opens the newsletter modal (if the form is only shown in a modal)."""
+        if not self.trigger:
+            return
+        button = await page.query_selector(self.trigger)
+        if not button:
+            print(f"Newsletter trigger '{self.trigger}' not found.")
+            return
+        print(f"Clicking '{self.trigger}' to open the newsletter modal.")
+        await button.click()
+        if self.ready:
+            await page.wait_for_selector(self.ready, state='visible', timeout=20000)
+        # Wait until the content of the modal stopped changing
+        await wait_until_settled(page, [self.ready] if self.ready else FORM_SELECTORS)
+
+    def session(self, policy=None):
+        """
+        Returns a PageSession that loads the newsletter page (and opens the modal) once.
+
+        :param policy: Optional ResourcePolicy of the session
+        """
+        return PageSession(self.url, prepare=self.prepare, policy=policy)
+
+
+class NewsletterLocator:
+    """
+    Finds the newsletter page of a website once per scan.
+
+    The links of the homepage are ranked by URL and anchor text, the best candidates are
+    probed concurrently and the first one with a sign-up form wins.
+    """
+    def __init__(self, max_probes=3, probe_timeout=30000, policy=None):
+        """
+        :param max_probes: Number of top ranked candidates that are probed concurrently
+        :param probe_timeout: Navigation timeout of a probe in milliseconds
+        :param policy: Optional ResourcePolicy for the probed pages
+        """
+        self.max_probes = max_probes
+        self.probe_timeout = probe_timeout
+        self.policy = policy
+
+    @asynccontextmanager
+    async def _page(self):
+        """Yields a new page in a pooled context with the resource policy of the locator."""
+        async with browser_pool.context() as context:
+            if self.policy is not None:
+                await self.policy.apply(context)
+            yield await context.new_page()
+
+    def special_case(self, url):
+        """Returns the special case entry of the website (None if there is none)."""
+        for domain, entry in SPECIAL_CASES.items():
+            if domain in url:
+                return entry
+        return None
+
+    def rank_candidates(self, base_url, links):
+        """
+        Ranks the links of the homepage by how likely they lead to the newsletter page.
+
+        :param links: List of {"href": ..., "text": ...} dictionaries
+        :return: List of absolute URLs, best candidate first
+        """
+        scores = {}
+        base_host = urlparse(base_url).hostname
+        for link in links:
+            href = link.get("href")
+            if not href or href.startswith(("javascript:", "mailto:", "tel:")):
+                continue
+            full_url = urldefrag(urljoin(base_url, href))[0]
+            lowered_url = full_url.lower()
+            if any(ignored in lowered_url for ignored in IGNORE_KEYWORDS):
+                continue
+            text = (link.get("text") or "").lower()
+            score = sum(weight for keyword, weight in URL_KEYWORDS.items() if keyword in lowered_url)
+            score += sum(weight for keyword, weight in TEXT_KEYWORDS.items() if keyword in text)
+            if score == 0:
+                continue
+            if urlparse(full_url).hostname == base_host:
+                score += 1  # Prefer the own domain over external newsletter providers
+            scores[full_url] = max(score, scores.get(full_url, 0))
+        return sorted(scores, key=scores.get, reverse=True)
+
+    async def probe(self, url):
+        """Loads a candidate and returns True if it contains a newsletter sign-up form."""
+        async with self._page() as page:
+            # Probes are speculative, one attempt is enough
+            await navigation_policy.goto(page, url, attempts=1, timeout=self.probe_timeout)
+            await wait_until_settled(page, FORM_SELECTORS)
+            signals = await page.evaluate(_NEWSLETTER_SIGNALS)
+            print(f"Probed newsletter candidate {url}: {signals}")
+            return signals["email"] and (signals["newsletter"] or signals["checkbox"])
+
+    async def _first_confirmed(self, candidates):
+        """
+        Probes the candidates concurrently and returns the best ranked confirmed one.
+        The results are taken in rank order, not in the order the probes finish, so a website always
+        resolves to the same newsletter page. Lower ranked probes are stopped once a candidate is confirmed.
+        """
+        tasks = [asyncio.ensure_future(self.probe(candidate)) for candidate in candidates]
+        try:
+            for candidate, task in zip(candidates, tasks):
+                try:
+                    if await task:
+                        return candidate
+                except Exception as e:
+                    print(f"Error while probing {candidate}: {e}")
+            return None
+        finally:
+            # Stop the probes that are still running
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _follow(self, url, selector):
+        """Opens a page and returns the URL a link on it leads to."""
+        async with self._page() as page:
+            await navigation_policy.goto(page, url)
+            await wait_until_settled(page)
+            link = await page.query_selector(selector)
+            if not link:
+                return url
+            await link.click()
+            await page.wait_for_load_state('load')
+            return page.url
+
+    async def locate(self, url, session=None):
+        """
+        Resolves the newsletter page of a website.
+
+        :param url: URL of the homepage
+        :param session: Optional PageSession with the already loaded homepage
+        :return: NewsletterTarget
+        """
+        entry = self.special_case(url)
+        if entry is not None:
+            print(f"Special case detected for the newsletter of {url}.")
+            target_url = entry.get("url", url)
+            if entry.get("follow"):
+                try:
+                    target_url = await self._follow(target_url, entry["follow"])
+                except Exception as e:
+                    print(f"Error following the newsletter link: {e}")
+            return NewsletterTarget(target_url, "special case", entry.get("trigger"), entry.get("ready"))
+
+        # If the URL itself suggests it is a newsletter page, use it directly
+        if any(keyword in url.lower() for keyword in ["newsletter", "subscribe", "signup", "newsletter-registrierung"]):
+            return NewsletterTarget(url, "url")
+
+        async with landing_page(url, session) as page:
+            links = await page.evaluate(_COLLECT_LINKS)
+            base_url = page.url
+
+        candidates = self.rank_candidates(base_url, links)
+        print(f"Newsletter candidates: {candidates[:self.max_probes]}")
+        if not candidates:
+            return NewsletterTarget(url, "homepage")
+
+        confirmed = await self._first_confirmed(candidates[:self.max_probes])
+        if confirmed:
+            return NewsletterTarget(confirmed, "probe")
+        # Nothing confirmed, use the best ranked link like a visitor would
+        return NewsletterTarget(candidates[0], "link")
+
+
+@asynccontextmanager
+async def newsletter_page(url, session=None, mutating=False):
+    """
+    Yields a page showing the newsletter page of `url`.
+
+    :param url: URL of the homepage (used when no session is given)
+    :param session: Optional PageSession of the newsletter page, resolved once per scan
+    :param mutating: True for checks that click or change elements, they get a forked page
+    """
+    if session is None:
+        # Standalone use (e.g. the main() functions of the checkers)
+        target = await NewsletterLocator().locate(url)
+        async with target.session() as own_session:
+            yield await own_session.shared_page()
+    else:
+        async with landing_page(session.url, session, mutating) as page:
+            yield page
@@ -0,0 +1,169 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from urllib.parse import urldefrag
+from browser_pool import browser_pool
+from navigation_policy import navigation_policy
+from banner_readiness import wait_until_settled
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/85.0.4183.102 Safari/537.36"
+
+# Hop-by-hop and encoding headers that must not be replayed with an already decoded body
+_SKIPPED_REPLAY_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class PageLoadError(Exception):
+    """Raised when the landing page of a scan could not be loaded."""
+
+
+class PageSession:
+    """
+    Loads the landing page of a scan once and shares it between the cookie-banner checkers.
+
+    Read-only checks (visibility, links, scrollbar...) run directly against the loaded page.
+    Checks that click or remove elements get their own page via fork(): a fresh context that
+    starts from the captured storage state and is served the captured HTML document from memory,
+    so mutations of one check never leak into another.
+    """
+    def __init__(self, url, user_agent=DEFAULT_USER_AGENT, load_attempts=None, timeout=None, prepare=None, policy=None):
+        """
+        :param url: URL of the page to load
+        :param load_attempts: Attempts to load the page (default: those of the navigation policy)
+        :param timeout: Timeout of one attempt in milliseconds (default: that of the navigation policy)
+        :param prepare: Optional async prepare(page), called after every load (e.g. to open a modal)
+        :param policy: Optional ResourcePolicy, applied to the landing page and to every fork
+        """
+        self.url = url
+        self.prepare = prepare
+        self.policy = policy
+        self.user_agent = user_agent
+        self.load_attempts = load_attempts
+        self.timeout = timeout
+        self.page = None
+        self.final_url = None  # URL after redirects
+        self.error = None  # PageLoadError if the landing page could not be loaded
+        self._storage_state = None
+        self._document = None  # (status, headers, body) of the main document
+        self._stack = None
+        self._open_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        # The landing page is loaded lazily by the first check that needs it,
+        # so checks without a browser are not held up by the page load
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        """
+        Loads the landing page (with retries) and captures storage state and main document.
+        A failed load is stored in `self.error` and raised by every check that uses the session,
+        so checks that do not depend on the landing page are not affected.
+        """
+        async with self._open_lock:
+            if self.page is not None or self.error is not None:
+                return
+            self._stack = AsyncExitStack()
+            try:
+                context = await self._stack.enter_async_context(browser_pool.context(user_agent=self.user_agent))
+                if self.policy is not None:
+                    await self.policy.apply(context)
+                page = await context.new_page()
+
+                try:
+                    print(f"Loading landing page {self.url}...")
+                    # Retries with backoff, stops early at the scan deadline or when the host keeps failing
+                    response = await navigation_policy.goto(page, self.url, self.load_attempts, self.timeout)
+                except Exception as e:
+                    self.error = PageLoadError(f"Error loading the page: {e}")
+                    return
+                # networkidle never settles on pages with long-polling trackers, wait for the banner instead
+                await wait_until_settled(page)
+                print("Landing page loaded successfully.")
+
+                if self.prepare is not None:
+                    try:
+                        await self.prepare(page)
+                    except Exception as e:
+                        print(f"Error while preparing {self.url}: {e}")
+
+                self.page = page
+                self.final_url = page.url
+                self._storage_state = await context.storage_state()
+                if response is not None:
+                    try:
+                        headers = {
+                            name: value for name, value in response.headers.items()
+                            if name.lower() not in _SKIPPED_REPLAY_HEADERS
+                        }
+                        self._document = (response.status, headers, await response.body())
+                    except Exception as e:
+                        print(f"Main document could not be captured, forks will load it from the network: {e}")
+            except BaseException:
+                # E.g. the context could not be set up or the scan was cancelled: the lease goes back to the pool
+                await self._stack.aclose()
+                self._stack = None
+                self.page = None
+                raise
+
+    async def close(self):
+        """Closes the shared page and returns its context to the browser pool."""
+        if self._stack is not None:
+            await self._stack.aclose()
+            self._stack = None
+        self.page = None
+
+    async def shared_page(self):
+        """Returns the loaded landing page for read-only checks."""
+        await self.open()
+        if self.error:
+            raise self.error
+        return self.page
+
+    @asynccontextmanager
+    async def fork(self):
+        """
+        Yields a fresh page showing the landing page, for checks that click or mutate the DOM.
+        The fork starts from the captured storage state and gets the main document from memory.
+        """
+        await self.open()
+        if self.error:
+            raise self.error
+        async with browser_pool.context(user_agent=self.user_agent, storage_state=self._storage_state) as context:
+            if self.policy is not None:
+                await self.policy.apply(context)
+            page = await context.new_page()
+            if self._document is not None:
+                status, headers, body = self._document
+                document_url = urldefrag(self.final_url)[0]  # Requests never contain the fragment
+
+                async def serve_document(route):
+                    await route.fulfill(status=status, headers=headers, body=body)
+
+                await page.route(lambda request_url: request_url == document_url, serve_document, times=1)
+            await navigation_policy.goto(page, self.final_url, timeout=self.timeout)
+            await wait_until_settled(page)
+            if self.prepare is not None:
+                await self.prepare(page)
+            yield page
+
+
+@asynccontextmanager
+async def landing_page(url, session=None, mutating=False, user_agent=DEFAULT_USER_AGENT):
+    """
+    Yields a page showing the landing page of `url`.
+
+    :param url: URL of the landing page (used when no session is given)
+    :param session: Optional PageSession of the running scan
+    :param mutating: True for checks that click or remove elements, they get a forked page
+    :param user_agent: User agent for standalone use without a session
+    """
+    if session is None:
+        # Standalone use (e.g. the main() functions of the checkers)
+        async with PageSession(url, user_agent=user_agent) as own_session:
+            yield await own_session.shared_page()
+    elif mutating:
+        async with session.fork() as page:
+            yield page
+    else:
+        yield await session.shared_page()
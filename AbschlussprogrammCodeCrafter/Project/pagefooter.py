@@ -1,41 +1,56 @@
 
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-
-#Initializes the FooterLinkChecker by setting main_url, visited_urls, and footer_links.
+from html_parsing import Document
+from urllib.parse import urljoin, urlparse, urldefrag
+from http_client import http_client
+from result_cache import normalize_url
+from link_status import link_status as shared_link_status
+from politeness import robots_policy
+
+# Links to files that are never crawled for footers
+SKIPPED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.mp4', '.mp3', '.doc', '.docx', '.xls', '.xlsx')
+
+#Initializes the FooterLinkChecker by setting main_url, visited_urls, footer_links and the (shared) HTTP client.
+#The crawl is breadth-first: at most max_pages pages of the website, up to max_depth clicks away from the main page,
+#fetched by `workers` concurrent workers. With respect_robots the crawl skips pages disallowed by robots.txt.
 class FooterLinkChecker:
-    def __init__(self):
+    def __init__(self, client=None, max_depth=2, max_pages=50, workers=6, link_status=None, respect_robots=True, robots=None):
+        self.client = client or http_client
+        self.robots = (robots or robots_policy) if respect_robots else None
+        self.link_status = link_status or shared_link_status  # Status of links, shared across checkers and scans
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = workers
         self.main_url = None
+        self.origins = set()  # (scheme, host) of the website, the crawl never leaves it
         self.visited_urls = set()
         self.footer_links = set()
+        self.on_page = None  # Optional callback on_page(url, document) for every crawled page
 
-#Fetches the HTML content of a URL asynchronously. Returns the HTML text or None on error.
-    async def fetch_page(self, url, session):
+#Fetches the HTML content of a URL asynchronously (through the client, so the per-host rate limit applies).
+#Returns the final URL (after redirects) and the HTML text, or None on error.
+    async def fetch_page(self, url, session=None):
         try:
-            async with session.get(url, timeout=10) as response:
+            async with self.client.get(url, timeout=10) as response:
                 if response.status >= 400:
                     print(f"Error fetching {url}: {response.status}")
-                    return None
-                return await response.text()
+                    return url, None
+                if response.content_type and 'html' not in response.content_type:
+                    return url, None  # Images, PDFs... have no footer
+                return str(response.url), await response.text(errors='replace')
         except Exception as e:
             print(f"Error fetching {url}: {e}")
-            return None
-
-#Extracts links from the page footer and adds valid ones to footer_links
-    def extract_footer_links(self, html):
-        soup = BeautifulSoup(html, 'html.parser')
+            return url, None
 
-        # Search the footer flexibly
-        footer = soup.find('footer') or soup.find(class_='footer') or soup.find(id='footer')
-        if not footer and soup.body:
-            footer = soup.body.find_all(recursive=False)[-1]
+#Extracts links from the page footer and adds valid ones to footer_links (relative links are resolved against base_url)
+    def extract_footer_links(self, html, base_url=None):
+        document = html if isinstance(html, Document) else Document(html)
+        base_url = base_url or self.main_url
 
-        if footer:
-            links = footer.find_all('a', href=True)
-            for link in links:
-                href = urljoin(self.main_url, link['href'])
+        # Search the footer flexibly (footer element, class or id "footer", last element of the body)
+        for link in document.footer_links():
+            if link.href is not None:
+                href = urldefrag(urljoin(base_url, link.href)).url
 
                 # Filter irrelevant links
                 if href.startswith(('tel:', 'javascript:', '#')) or len(href.strip()) == 0:
@@ -48,25 +63,76 @@ class FooterLinkChecker:
 
                 self.footer_links.add(href)
 
-#Collects all subpages from the main page up to the specified depth.
-    async def get_all_subpages(self, session, depth=2):
-        if depth == 0:
-            return set()
-
-        html = await self.fetch_page(self.main_url, session)
-        subpages = set()
-        if html:
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = urljoin(self.main_url, link['href'])
-                if href not in self.visited_urls and self.main_url in href:
-                    subpages.add(href)
-                    self.visited_urls.add(href)
-
-            for subpage in list(subpages):
-                subpages.update(await self.get_all_subpages(session, depth - 1))
-        return subpages
+#Returns True for a URL of the crawled website that may contain a footer.
+    def is_crawlable(self, url):
+        parsed = urlparse(url)
+        if (parsed.scheme, (parsed.hostname or '').lower()) not in self.origins:
+            return False
+        return not parsed.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+#Returns the links of a page that lead to other pages of the website.
+    def extract_page_links(self, document, base_url):
+        links = []
+        for link in document.links():
+            if link.href is None:
+                continue
+            href = urldefrag(urljoin(base_url, link.href)).url
+            if self.is_crawlable(href):
+                links.append(href)
+        return links
+
+#Crawls the website breadth-first from the main page. Every page is fetched once (URLs are compared
+#normalized: without fragment, tracking parameters and trailing slash), its footer links are extracted
+#as soon as it arrives and its links are queued for the next depth until max_pages pages were queued.
+    async def crawl(self, session):
+        parsed = urlparse(self.main_url)
+        self.origins = {(parsed.scheme, (parsed.hostname or '').lower())}
+        queue = asyncio.Queue()
+        seen = {normalize_url(self.main_url)}
+        queue.put_nowait((self.main_url, 0))
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    final_url, html = await self.fetch_page(url, session)
+                    self.visited_urls.add(url)
+                    if not html:
+                        continue
+                    if depth == 0:
+                        # The main page may redirect (e.g. to www. or https), its target belongs to the website
+                        final = urlparse(final_url)
+                        self.origins.add((final.scheme, (final.hostname or '').lower()))
+                    document = Document(html)  # Parsed once for the footer and the links to follow
+                    self.extract_footer_links(document, final_url)
+                    if self.on_page is not None:
+                        self.on_page(final_url, document)
+                    if depth >= self.max_depth:
+                        continue
+                    for link in self.extract_page_links(document, final_url):
+                        key = normalize_url(link)
+                        if key in seen or len(seen) >= self.max_pages:
+                            continue
+                        if self.robots is not None and not await self.robots.allowed(link):
+                            seen.add(key)  # Disallowed, never asked again
+                            continue
+                        if key not in seen and len(seen) < self.max_pages:
+                            seen.add(key)
+                            queue.put_nowait((link, depth + 1))
+                except Exception as e:
+                    # One broken page must not end the worker, the other pages are still crawled
+                    print(f"Error crawling {url}: {e}")
+                finally:
+                    queue.task_done()
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(self.workers)]
+        try:
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"Crawled {len(self.visited_urls)} pages of {self.main_url}, found {len(self.footer_links)} footer links.")
 
 #Checks all footer links for errors and returns a list of invalid links.
     async def check_links(self, session):
@@ -81,27 +147,19 @@ class FooterLinkChecker:
                 invalid_links.append((link, status))
         return invalid_links
 
-#Checks if a link is reachable and returns the link with its status.
-    async def check_link(self, link, session):
-        try:
-            async with session.get(link, timeout=10) as response:
-                if response.status >= 400:
-                    return link, response.status
-        except Exception as e:
-            return link, str(e)
+#Checks if a link is reachable (HEAD first, known links from the link status registry) and returns the link
+#with its status, or with None if it works.
+    async def check_link(self, link, session=None):
+        status = await self.link_status.check(link)
+        if not status.ok:
+            return link, status.status or status.error
         return link, None
 
-#Runs the full process: collects subpages, extracts footer links, and checks their validity.
+#Runs the full process: crawls the website (extracting the footer links of every page), and checks their validity.
     async def check_footer_links_on_all_pages(self, url):
         self.main_url = url
-        async with aiohttp.ClientSession() as session:
-            subpages = await self.get_all_subpages(session)
-            for subpage in subpages:
-                if subpage not in self.visited_urls:
-                    html = await self.fetch_page(subpage, session)
-                    if html:
-                        self.extract_footer_links(html)
-                    self.visited_urls.add(subpage)
-
-            invalid_links = await self.check_links(session)
-            return [link for link, _ in invalid_links]
+        session = await self.client.session()
+        await self.crawl(session)
+
+        invalid_links = await self.check_links(session)
+        return [link for link, _ in invalid_links]
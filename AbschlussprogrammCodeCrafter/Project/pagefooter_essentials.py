@@ -1,63 +1,89 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
+from html_parsing import Document, extract_links
+from http_client import http_client
 
-#Initializes the AsyncFooterValidator class and prepares the session attribute, which will handle asynchronous HTTP requests.
+# Rules of the essential footer links: a link belongs to a category if its text contains one of the
+# keywords and its href matches one of the patterns (or it opens something via onclick)
+FOOTER_RULES = {
+    "imprint": {
+        "keywords": ["impressum", "imprint", "legal-notice", "legal notice"],
+        "href_patterns": ["/impressum", "impressum", "imprint", "/policies/legal-notice", "/en/legal-notice"]
+    },
+    "privacy policy": {
+        "keywords": ["datenschutz", "privacy policy", "datenschutzerklärung"],
+        "href_patterns": ["/datenschutz", "privacy", "datenschutzerklärung"]
+    },
+    "cookie": {
+        "keywords": ["cookie", "cookie-einstellungen", "cookies", "Cookie Einstellungen", "cookie settings"],
+        "href_patterns": ["/cookies", "cookie", "optanon.toggleinfo", "#uc-central-modal-show"]
+    }
+}
+
+#Initializes the AsyncFooterValidator class with the (shared) HTTP client, which sends the asynchronous HTTP requests.
 class AsyncFooterValidator:
-    def __init__(self):
-        self.session = None
+    def __init__(self, client=None, rules=None):
+        self.client = client or http_client
+        self.rules = rules or FOOTER_RULES
 
 #Fetches the HTML content of the given URL asynchronously. Returns the HTML text.
     async def fetch(self, url: str):
         """Fetch the HTML content of the given URL."""
-        async with self.session.get(url) as response:
+        async with self.client.get(url) as response:
             return await response.text()
 
-#Checks whether a link on the given page matches the provided keywords, href patterns, or onclick attributes.
-    async def check_link(self, page_url: str, keywords: list, href_patterns: list = None):
-     """
-    Check if a link exists on the page that matches the given keywords, href patterns, or onclick attributes.
-
-    Args:
-        page_url (str): The URL of the page to check.
-        keywords (list): A list of keywords to match against the link text.
-        href_patterns (list, optional): A list of substrings or regex patterns to match the href attribute.
+#Checks whether the text, href and onclick attribute of one link match the rules of a category.
+    @staticmethod
+    def matches(link_text, link_href, link_onclick, keywords, href_patterns=None):
+        # Check if the link text contains any of the keywords
+        if not any(keyword.lower() in link_text for keyword in keywords):
+            return False
+        # If href_patterns are provided, the href has to match one of them (or the link uses onclick)
+        if href_patterns:
+            return any(pattern.lower() in link_href for pattern in href_patterns) or bool(link_onclick)
+        return True
 
-    Returns:
-        bool: True if a matching link is found, False otherwise.
-    """
-     html = await self.fetch(page_url)
-     soup = BeautifulSoup(html, "html.parser")
-     links = soup.find_all("a")
+#Classifies all links of a page against all categories in one pass. Returns {category: found}.
+    def classify(self, html):
+        """
+        Classify the links of a page (HTML text or an already parsed Document).
 
-    # Debug: Log all found links
-     print(f"Debug: Links found on {page_url}")
+        Returns:
+            dict: True for every category with a matching link, False otherwise.
+        """
+        links = html.links() if isinstance(html, Document) else extract_links(html)
+        found = {name: False for name in self.rules}
+        for link in links:
+            link_text = link.text.strip().lower()
+            link_href = (link.href or "").lower()
+            link_onclick = (link.onclick or "").lower()  # Fetch the onclick attribute
+            for name, rule in self.rules.items():
+                if not found[name] and self.matches(link_text, link_href, link_onclick, rule["keywords"], rule.get("href_patterns")):
+                    print(f"Debug: {name.capitalize()} link found: {link_text}")
+                    found[name] = True
+            if all(found.values()):
+                break
+        return found
 
-     for link in links:
-        link_text = link.text.strip().lower()
-        link_href = link.get("href", "").lower()
-        link_onclick = link.get("onclick", "").lower()  # Fetch the onclick attribute
+#Checks whether a link on the given page matches the provided keywords, href patterns, or onclick attributes.
+    async def check_link(self, page_url: str, keywords: list, href_patterns: list = None):
+        """
+        Check if a link exists on the page that matches the given keywords, href patterns, or onclick attributes.
+        To check several categories, use check_footer_links (one download and parse for all of them).
 
-        # Check if the link text contains any of the keywords
-        if any(keyword.lower() in link_text for keyword in keywords):
-            # If href_patterns are provided, check if the href matches any of them
-            if href_patterns:
-                if any(pattern.lower() in link_href for pattern in href_patterns):
-                    print(f"Debug: Match found via href for keyword: {link_text}")
-                    return True
-                elif link_onclick:  # If no href match, check if onclick exists
-                    print(f"Debug: Match found via onclick for keyword: {link_text}")
-                    return True
-            else:
-                print(f"Debug: Match found via text for keyword: {link_text}")
+        Returns:
+            bool: True if a matching link is found, False otherwise.
+        """
+        for link in extract_links(await self.fetch(page_url)):
+            if self.matches(link.text.strip().lower(), (link.href or "").lower(), (link.onclick or "").lower(),
+                            keywords, href_patterns):
                 return True
-     print("Debug: No matching link found.")
-     return False
+        return False
 
 #Checks if footer links (Imprint, Privacy Policy, Cookies) are present on the given page.
     async def check_footer_links(self, base_url: str):
         """
         Check the presence of footer links (Imprint, privacy policy, Cookies) on the given page.
+        The page is downloaded and parsed once, every link is classified against all categories.
 
         Args:
             base_url (str): The base URL to check.
@@ -65,37 +91,40 @@ class AsyncFooterValidator:
         Returns:
             dict: A dictionary with the results for each link.
         """
-        async with aiohttp.ClientSession() as session:
-            self.session = session
-
-            # Define the keywords and href patterns for each type of link
-            footer_checks = {
-                "imprint": {
-                    "keywords": ["impressum", "imprint", "legal-notice", "legal notice"],
-                    "href_patterns": ["/impressum", "impressum", "imprint", "/policies/legal-notice", "/en/legal-notice"]
-                },
-                "privacy policy": {
-                    "keywords": ["datenschutz", "privacy policy", "datenschutzerklärung"],
-                    "href_patterns": ["/datenschutz", "privacy", "datenschutzerklärung"]
-                },
-                "cookie": {
-                    "keywords": ["cookie", "cookie-einstellungen", "cookies", "Cookie Einstellungen", "cookie settings"],
-                    "href_patterns": ["/cookies", "cookie", "optanon.toggleinfo", "#uc-central-modal-show"]
-                }
-            }
-
-            # Create tasks for each check
-            tasks = {
-                name: self.check_link(base_url, data["keywords"], data["href_patterns"])
-                for name, data in footer_checks.items()
-            }
-
-            # Run all tasks and gather results
-            results = await asyncio.gather(*tasks.values())
-            
-            # Debug: Print the results
-            for name, result in zip(tasks.keys(), results):
-                print(f"Debug: {name.capitalize()} link presence: {result}")
-
-            # Return results as a dictionary
-            return {name: result for name, result in zip(tasks.keys(), results)}
+        results = self.classify(await self.fetch(base_url))
+
+        # Debug: Print the results
+        for name, result in results.items():
+            print(f"Debug: {name.capitalize()} link presence: {result}")
+        return results
+
+#Classifies the links of many pages, e.g. all pages found by the footer crawl. Returns {page URL: {category: found}}.
+    async def footer_matrix(self, base_url: str = None, urls: list = None, max_pages: int = 50):
+        """
+        Build the footer matrix of a website: which essential links every page has.
+
+        Args:
+            base_url (str): Crawl the website from this URL (breadth-first, see FooterLinkChecker.crawl).
+            urls (list): Or classify exactly these pages, fetched concurrently.
+            max_pages (int): Maximum number of crawled pages.
+
+        Returns:
+            dict: {page URL: {category: found}}
+        """
+        matrix = {}
+        if urls is not None:
+            pages = await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
+            for url, html in zip(urls, pages):
+                if isinstance(html, Exception):
+                    print(f"Error fetching {url}: {html}")
+                    continue
+                matrix[url] = self.classify(html)
+            return matrix
+
+        from pagefooter import FooterLinkChecker
+        crawler = FooterLinkChecker(client=self.client, max_pages=max_pages)
+        # Every crawled page is classified as soon as it arrives, with the document the crawler already parsed
+        crawler.on_page = lambda url, document: matrix.__setitem__(url, self.classify(document))
+        crawler.main_url = base_url
+        await crawler.crawl(await self.client.session())
+        return matrix
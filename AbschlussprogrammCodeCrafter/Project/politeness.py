@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+# Responses that ask the client to slow down, usually with a Retry-After header
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait according to a Retry-After header (delay in seconds or HTTP date), None if invalid."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _host(url):
+    return (urlparse(url).hostname or url).lower()
+
+
+class HostRateLimiter:
+    """
+    Token bucket per host, shared by all HTTP requests and browser navigations of the process.
+
+    Every host gets `rate` requests per second with bursts of up to `burst` requests, so batch scans
+    never hammer a single website while requests to different hosts do not wait for each other.
+    A Retry-After answer (429, 503) pauses all requests to the host for the requested time.
+    """
+    def __init__(self, rate=5.0, burst=10, max_retry_after=120, max_hosts=1000):
+        """
+        :param rate: Requests per second and host (tokens added per second)
+        :param burst: Maximum number of requests sent to a host at once (bucket size)
+        :param max_retry_after: Upper bound in seconds for a pause requested with Retry-After
+        :param max_hosts: Number of hosts after which idle buckets are dropped
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retry_after = max_retry_after
+        self.max_hosts = max_hosts
+        self._buckets = {}  # host -> [tokens, last update]
+        self._paused = {}  # host -> time until which the host asked us to wait
+        self._lock = threading.Lock()  # Requests can come from several event loops (threads)
+
+    def reserve(self, url):
+        """Takes a token for a request to the host of `url` and returns the seconds to wait before sending it."""
+        host = _host(url)
+        with self._lock:
+            now = time.monotonic()
+            if host not in self._buckets and len(self._buckets) >= self.max_hosts:
+                self._drop_idle(now)
+            tokens, updated = self._buckets.get(host, (self.burst, now))
+            # Tokens may become negative: every request waits for its own token
+            tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+            self._buckets[host] = [tokens, now]
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+            return max(wait, self._paused.get(host, 0) - now)
+
+    async def acquire(self, url):
+        """Waits until a request to the host of `url` may be sent."""
+        wait = self.reserve(url)
+        if wait >= 1:
+            print(f"Rate limit for {_host(url)}: waiting {wait:.1f} s.")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def retry_after(self, url, value):
+        """
+        Pauses all requests to the host of `url` as requested by a Retry-After header.
+
+        :return: Seconds of the pause, None if the header is missing or invalid
+        """
+        delay = parse_retry_after(value)
+        if delay is None:
+            return None
+        delay = min(delay, self.max_retry_after)
+        host = _host(url)
+        with self._lock:
+            self._paused[host] = max(self._paused.get(host, 0), time.monotonic() + delay)
+        print(f"{host} asked to retry after {delay:.0f} s, requests to it are paused.")
+        return delay
+
+    def _drop_idle(self, now):
+        for host, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * self.rate >= self.burst and self._paused.get(host, 0) <= now:
+                del self._buckets[host]
+                self._paused.pop(host, None)
+
+
+class RobotsPolicy:
+    """
+    robots.txt rules of websites, for crawls that should only visit allowed pages.
+    Every robots.txt is fetched once and its parse cached for `ttl` seconds. A missing or
+    unreadable robots.txt allows everything.
+    """
+    def __init__(self, user_agent="*", ttl=3600, enabled=True, client=None):
+        """
+        :param user_agent: User agent whose rules apply
+        :param ttl: Seconds a parsed robots.txt is reused
+        :param enabled: False allows every URL without fetching robots.txt
+        :param client: HttpClient to fetch robots.txt (default: the shared http_client)
+        """
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.enabled = enabled
+        self._client = client
+        self._cache = {}  # origin -> (expiry time, RobotFileParser or None)
+        self._pending = {}  # origin -> running task
+
+    async def _fetch(self, origin):
+        from http_client import http_client  # http_client uses the rate limiter of this module
+        client = self._client or http_client
+        try:
+            async with client.get(f"{origin}/robots.txt", timeout=10) as response:
+                if response.status >= 400:
+                    return None  # No robots.txt: everything is allowed
+                text = await response.text(errors='replace')
+        except Exception as e:
+            print(f"robots.txt of {origin} could not be loaded: {e}")
+            return None
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        return parser
+
+    async def rules(self, url):
+        """Returns the parsed robots.txt of the website of `url` (None if there is none)."""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        cached = self._cache.get(origin)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        task = self._pending.get(origin)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(origin))
+            self._pending[origin] = task
+            task.add_done_callback(lambda _: self._pending.pop(origin, None))
+        parser = await asyncio.shield(task)
+        self._cache[origin] = (time.monotonic() + self.ttl, parser)
+        return parser
+
+    async def allowed(self, url):
+        """True if robots.txt allows crawling `url` (always True if the policy is disabled)."""
+        if not self.enabled:
+            return True
+        parser = await self.rules(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+
+# Shared by all HTTP requests, navigations and crawls of this process
+rate_limiter = HostRateLimiter()
+robots_policy = RobotsPolicy()
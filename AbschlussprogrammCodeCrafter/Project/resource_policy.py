@@ -0,0 +1,138 @@
+from urllib.parse import urlparse
+
+# Hosts of the consent management platforms. Their scripts, styles and assets render the
+# cookie banner, so they are never blocked, whatever the profile says.
+CMP_HOSTS = [
+    "cookielaw.org", "onetrust.com", "cookiebot.com", "cookiebot.eu", "usercentrics.eu",
+    "consentmanager.net", "consensu.org", "cookie-script.com", "trustcommander.net",
+    "commander1.com", "tagcommander.com", "ccm19.de", "didomi.io", "privacy-mgmt.com",
+    "sourcepoint.com", "quantcast.com", "iubenda.com", "cookieinformation.com",
+]
+
+# Analytics, advertising and tracking hosts. None of the criteria depends on them.
+# Tag managers are missing on purpose, several websites load their CMP through them.
+TRACKER_HOSTS = [
+    "google-analytics.com", "analytics.google.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "adservice.google.com", "connect.facebook.net", "facebook.com/tr",
+    "hotjar.com", "hotjar.io", "clarity.ms", "bat.bing.com", "snap.licdn.com", "ads.linkedin.com",
+    "analytics.tiktok.com", "criteo.com", "criteo.net", "adnxs.com", "taboola.com", "outbrain.com",
+    "scorecardresearch.com", "mouseflow.com", "matomo.cloud", "newrelic.com", "nr-data.net",
+    "pinimg.com", "ct.pinterest.com", "adform.net", "rubiconproject.com", "pubmatic.com",
+]
+
+
+def _matches_host(url, entries):
+    """True if the URL belongs to one of the hosts (including subdomains) or path prefixes."""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    for entry in entries:
+        domain, _, path = entry.partition("/")
+        if host == domain or host.endswith("." + domain):
+            request_path = parsed.path.strip("/")
+            if not path or request_path == path or request_path.startswith(path + "/"):
+                return True
+    return False
+
+
+class ResourceProfile:
+    """
+    Resources a check does not need.
+      blocked_types:  Playwright resource types that are dropped (image, media, font, ...)
+      block_trackers: Drop requests to analytics and advertising hosts
+    """
+    def __init__(self, name, blocked_types=(), block_trackers=False):
+        self.name = name
+        self.blocked_types = set(blocked_types)
+        self.block_trackers = block_trackers
+
+    def blocks(self, url, resource_type):
+        """Returns the reason a request is blocked ("tracker" or its resource type), or None."""
+        if _matches_host(url, CMP_HOSTS):
+            return None
+        if self.block_trackers and _matches_host(url, TRACKER_HOSTS):
+            return "tracker"
+        if resource_type in self.blocked_types:
+            return resource_type
+        return None
+
+
+PROFILES = {
+    # Everything is loaded, like a normal visit
+    "full": ResourceProfile("full"),
+    # Checks that only read the DOM and the texts: no images, videos, web fonts and trackers
+    "text": ResourceProfile("text", blocked_types=("image", "media", "font"), block_trackers=True),
+    # Checks that measure positions and sizes: CSS and web fonts are kept, they change the layout
+    "layout": ResourceProfile("layout", blocked_types=("image", "media"), block_trackers=True),
+}
+
+
+class ResourceStats:
+    """
+    Requests of a scan, counted over all pages that use a ResourcePolicy.
+    Blocked requests are never sent, so their size is unknown. `loaded_bytes` adds up the
+    Content-Length of the responses that were loaded to compare against.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.blocked_by_reason = {}  # "image", "font", "tracker", ... -> number of requests
+        self.loaded_bytes = 0
+
+    def record(self, reason):
+        self.requests += 1
+        if reason is not None:
+            self.blocked += 1
+            self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+
+    def record_response(self, response):
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def summary(self):
+        """Returns a one-line summary for the log."""
+        if self.requests == 0:
+            return "No requests were intercepted."
+        reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(self.blocked_by_reason.items()))
+        share = self.blocked / self.requests * 100
+        return (f"{self.blocked} of {self.requests} requests blocked ({share:.0f}%"
+                f"{': ' + reasons if reasons else ''}), {self.loaded_bytes / 1024:.0f} KB loaded.")
+
+
+class ResourcePolicy:
+    """
+    Drops the requests a check does not need via request interception (page.route).
+    Applied to a context it covers every page of the context, including iframes.
+    """
+    def __init__(self, profile="text", stats=None):
+        """
+        :param profile: Name of a profile in PROFILES
+        :param stats: Optional ResourceStats of the scan the blocked requests are counted in
+        """
+        self.profile = PROFILES[profile]
+        self.stats = stats
+
+    async def apply(self, target):
+        """
+        Installs the policy on a browser context or a page.
+        Routes of a page take precedence, so a page can still fulfil single requests itself.
+        """
+        if not self.profile.blocked_types and not self.profile.block_trackers:
+            return  # Nothing to block, interception would only slow the page down
+        await target.route("**/*", self._handle)
+        if self.stats is not None:
+            target.on("response", self.stats.record_response)
+
+    async def _handle(self, route):
+        request = route.request
+        reason = self.profile.blocks(request.url, request.resource_type)
+        if self.stats is not None:
+            self.stats.record(reason)
+        try:
+            if reason is None:
+                await route.fallback()  # Further routes (e.g. the replay of a HAR archive) still apply
+            else:
+                await route.abort("blockedbyclient")
+        except Exception:
+            pass  # The page was closed while the request was pending
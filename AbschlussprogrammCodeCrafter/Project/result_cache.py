@@ -0,0 +1,145 @@
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from create_db import create_result_cache_table
+
+# Query parameters that only track the visitor and never change the page
+_TRACKING_PARAMETERS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+
+def normalize_url(url):
+    """
+    Normalizes a URL for the cache key: lower-case scheme and host, no default port,
+    no fragment, no tracking parameters, sorted query and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMETERS)
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def template_hash(check, templates):
+    """Hash of the templates a check depends on (the same for every scan if it uses none)."""
+    relevant = {key: (templates or {}).get(key) for key in check.templates}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Results of single checks, keyed by (normalized URL, hash of the relevant templates, check version).
+
+    A rescan of a website within `ttl` seconds only recomputes the checks whose key changed,
+    e.g. just the cookie banner text comparison after the cookie policy template was edited.
+    After the TTL a result is still carried forward (up to `max_age` seconds) as long as the
+    fingerprint of the input of the check, e.g. the markup of the banner, did not change.
+    Failed checks (errors, timeouts) are never cached.
+    """
+    def __init__(self, db_path='compliance.db', ttl=6 * 60 * 60, max_age=90 * 24 * 60 * 60):
+        """
+        :param db_path: SQLite database of the tool
+        :param ttl: Seconds a cached result is reused (0 disables the cache)
+        :param max_age: Seconds a result is carried forward while the fingerprint of its input is unchanged
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_age = max(max_age, ttl)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        create_result_cache_table(conn.cursor())
+        return conn
+
+    def get(self, url, check, templates, fingerprint=None):
+        """
+        Returns the cached outcome of a check as ({criterion: (result, feedback)}, created) or None.
+
+        :param fingerprint: Fingerprint of the current input of the check. Without one only results
+                            younger than the TTL are returned, with one older results with the same fingerprint as well.
+        """
+        if not self.ttl:
+            return None
+        query = ('SELECT outcome, created FROM result_cache '
+                 'WHERE url = ? AND check_name = ? AND template_hash = ? AND version = ? AND created > ?')
+        params = (normalize_url(url), check.name, template_hash(check, templates), check.version)
+        if fingerprint is None:
+            params += (time.time() - self.ttl,)
+        else:
+            query += ' AND fingerprint = ?'
+            params += (time.time() - self.max_age, fingerprint)
+        conn = self._connect()
+        try:
+            row = conn.execute(query, params).fetchone()
+        except sqlite3.Error as e:
+            print(f"Result cache could not be read: {e}")
+            return None
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        outcome = {criterion: tuple(value) for criterion, value in json.loads(row[0]).items()}
+        return outcome, row[1]
+
+    def put(self, url, check, templates, outcome, fingerprint=None):
+        """
+        Stores the outcome {criterion: (result, feedback)} of a check.
+        Outcomes with an error feedback are not stored, the next scan tries again.
+
+        :param fingerprint: Optional fingerprint of the input the outcome was computed from
+        """
+        if not self.ttl or any(is_error_feedback(feedback) for _, feedback in outcome.values()):
+            return
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO result_cache (url, check_name, template_hash, version, created, outcome, fingerprint) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (normalize_url(url), check.name, template_hash(check, templates), check.version, time.time(),
+                 json.dumps({criterion: [bool(result), feedback] for criterion, (result, feedback) in outcome.items()}),
+                 fingerprint)
+            )
+            # Expired results are never read again
+            conn.execute('DELETE FROM result_cache WHERE created <= ?', (time.time() - self.max_age,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Result cache could not be written: {e}")
+        finally:
+            conn.close()
+
+    def clear(self, url=None):
+        """Removes the cached results of a website (or all of them)."""
+        conn = self._connect()
+        try:
+            if url is None:
+                conn.execute('DELETE FROM result_cache')
+            else:
+                conn.execute('DELETE FROM result_cache WHERE url = ?', (normalize_url(url),))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def is_error_feedback(feedback):
+    """True for the feedback of a check that failed with an error or timed out."""
+    text = str(feedback).lstrip()
+    return text.startswith(("Error", "<strong>Error", "Timed out"))
+
+
+def cached_feedback(feedback, created, unchanged=False):
+    """
+    Marks the feedback of a cached result for the report.
+
+    :param unchanged: The result was carried forward because the fingerprint of the input did not change
+    """
+    date_time = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M")
+    if unchanged:
+        return f"<em>(Unchanged since the scan of {date_time}, result carried forward)</em> {feedback}"
+    return f"<em>(Cached result from {date_time})</em> {feedback}"
@@ -0,0 +1,275 @@
+import asyncio
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+from browser_pool import browser_pool
+from har_archive import ScanArchive, current_archive, prune_recordings
+
+# Second-level labels under which domains are registered (e.g. example.co.uk). A small
+# heuristic instead of the full Public Suffix List, it covers the markets of our customers.
+_SECOND_LEVEL_SUFFIXES = {"co", "com", "net", "org", "gov", "ac", "edu", "or", "ne", "go", "gv"}
+
+
+def registrable_domain(url):
+    """
+    Returns the registrable domain of a URL, e.g. "shop.example.co.uk" -> "example.co.uk".
+    Scans of the same registrable domain share one per-domain concurrency limit.
+    """
+    host = (urlparse(url).hostname or url).lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host  # Already a registrable domain or an IPv4 address
+    if labels[-2] in _SECOND_LEVEL_SUFFIXES and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class ScanJob:
+    """
+    A compliance scan that runs in the background.
+
+    Progress is recorded as a list of events ("status", "criterion", "done", "failed") that
+    the progress page streams via Server-Sent Events. The events are appended on the browser
+    pool loop and read from the Flask request threads, so access is guarded by a Condition.
+    """
+    def __init__(self, url, templates, batch_id=None, archive=None, only=None, force=False):
+        """
+        :param archive: Optional ScanArchive the scan records into or replays from
+        :param only: Optional names of the checks to run (default: all)
+        :param force: Run every check, also those with a cached result
+        """
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.templates = templates
+        self.batch_id = batch_id
+        self.archive = archive
+        self.only = only
+        self.force = force
+        self.status = "queued"  # queued -> running -> done / failed
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.duration = None  # Seconds the scan itself took (without waiting in the queue)
+        self.criteria_results = {}
+        self.feedback_results = {}
+        self.result_id = None  # Row id of the stored report in the compliance table
+        self.conformity = None
+        self.error = None
+        self._events = []
+        self._changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def publish(self, event, data):
+        """Appends an event and wakes up all waiting event streams."""
+        with self._changed:
+            self._events.append((event, data))
+            self._changed.notify_all()
+
+    def wait_for_events(self, position, timeout=15):
+        """
+        Returns the events after `position`. Blocks up to `timeout` seconds if there are none yet.
+
+        Returns:
+        - tuple: (events, finished) where finished is True once the job is done and every event was delivered.
+        """
+        with self._changed:
+            if position >= len(self._events) and not self.done:
+                self._changed.wait(timeout)
+            events = self._events[position:]
+            return events, self.done and position + len(events) >= len(self._events)
+
+
+class ScanBatch:
+    """
+    A group of scan jobs submitted together, e.g. the weekly rescan of all customers.
+    Every job stores its report as soon as it is finished, the batch only keeps track of them.
+    """
+    def __init__(self, jobs):
+        self.id = uuid.uuid4().hex
+        self.jobs = jobs
+        self.created = time.time()
+
+    @property
+    def done(self):
+        return all(job.done for job in self.jobs)
+
+    def throughput(self):
+        """
+        Aggregated progress and throughput of the batch.
+
+        Returns:
+        - dict: Counters, elapsed seconds, scans per minute and the average duration of a scan.
+        """
+        finished = [job for job in self.jobs if job.done]
+        end = max(job.finished for job in finished) if self.done else time.time()
+        elapsed = max(end - self.created, 0.001)
+        durations = [job.duration for job in finished if job.duration is not None]
+        return {
+            "total": len(self.jobs),
+            "queued": sum(1 for job in self.jobs if job.status == "queued"),
+            "running": sum(1 for job in self.jobs if job.status == "running"),
+            "done": sum(1 for job in self.jobs if job.status == "done"),
+            "failed": sum(1 for job in self.jobs if job.status == "failed"),
+            "conform": sum(1 for job in self.jobs if job.conformity == "Yes"),
+            "elapsed": elapsed,
+            "scans_per_minute": len(finished) / elapsed * 60,
+            "average_duration": sum(durations) / len(durations) if durations else None,
+        }
+
+
+class ScanJobManager:
+    """
+    Accepts scans as jobs and executes them on the browser pool loop.
+
+    At most `workers` scans run at the same time and at most `per_domain` of them against the
+    same registrable domain, further jobs wait in the queue. The web request only submits the
+    job and returns, results are streamed to the browser and the report is addressed by the job id.
+    """
+    def __init__(self, run_checks, store_result, workers=3, per_domain=1, keep_finished=200, keep_batches=20,
+                 record=False, keep_recordings=200, recording_max_age=30 * 24 * 60 * 60):
+        """
+        :param run_checks: async run_checks(url, templates, on_result, only, force) -> (criteria_results, feedback_results)
+        :param store_result: store_result(job, duration) -> row id, stores the report of a finished job (runs in a thread)
+        :param workers: Number of scans executed concurrently (global cap)
+        :param per_domain: Number of scans executed concurrently against one registrable domain
+        :param keep_finished: Number of finished jobs kept in memory for the progress page
+        :param keep_batches: Number of finished batches kept in memory for the batch page
+        :param record: Record the network traffic of every scan to a HAR archive, so it can be replayed later
+        :param keep_recordings: Number of recordings kept on disk
+        :param recording_max_age: Seconds a recording is kept on disk
+        """
+        self.run_checks = run_checks
+        self.store_result = store_result
+        self.workers = workers
+        self.per_domain = per_domain
+        self.keep_finished = keep_finished
+        self.keep_batches = keep_batches
+        self.record = record
+        self.keep_recordings = keep_recordings
+        self.recording_max_age = recording_max_age
+        self._jobs = {}
+        self._batches = {}
+        self._lock = threading.Lock()
+        self._slots = None  # asyncio.Semaphore, created on the pool loop
+        self._domain_slots = {}  # registrable domain -> asyncio.Semaphore
+
+    def submit(self, url, templates, batch_id=None, force=False):
+        """
+        Queues a scan and returns its job right away.
+
+        :param force: Ignore cached results of earlier scans
+        """
+        job = ScanJob(url, templates, batch_id, force=force)
+        if self.record:
+            job.archive = ScanArchive(job.id, "record")
+        return self._queue(job)
+
+    def submit_replay(self, recorded_job_id, url, templates, only=None):
+        """
+        Queues a scan that re-evaluates a recorded scan from its HAR archive, without network.
+        Raises FileNotFoundError if the scan was not recorded.
+
+        :param only: Optional names of the checks to run again (default: all)
+        """
+        job = ScanJob(url, templates, archive=ScanArchive(recorded_job_id, "replay"), only=only)
+        return self._queue(job)
+
+    def _queue(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.publish("status", {"status": job.status})
+        browser_pool.submit(self._run(job))
+        print(f"Scan job {job.id} queued for {job.url}.")
+        return job
+
+    def submit_batch(self, urls, templates, force=False):
+        """Queues a scan for every URL and returns the batch right away."""
+        batch = ScanBatch([])
+        for url in urls:
+            batch.jobs.append(self.submit(url, templates, batch.id, force=force))
+        with self._lock:
+            self._batches[batch.id] = batch
+            # Only the most recent finished batches are kept, their reports stay in the database
+            finished = [old for old in self._batches.values() if old.done]
+            for old in finished[:max(0, len(finished) - self.keep_batches)]:
+                del self._batches[old.id]
+                for old_job in old.jobs:
+                    self._jobs.pop(old_job.id, None)
+        print(f"Batch {batch.id} queued with {len(batch.jobs)} URLs.")
+        return batch
+
+    def get(self, job_id):
+        """Returns the job with the given id (None if unknown or already pruned)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_batch(self, batch_id):
+        """Returns the batch with the given id (None if unknown)."""
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def _prune(self):
+        """Forgets the oldest finished jobs, their reports stay in the database."""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.done and job.batch_id is None),
+            key=lambda job: job.finished
+        )
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    async def _run(self, job):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        domain = registrable_domain(job.url)
+        if domain not in self._domain_slots:
+            self._domain_slots[domain] = asyncio.Semaphore(self.per_domain)
+        # The domain slot is taken first, so jobs waiting for a busy domain do not block a global slot
+        async with self._domain_slots[domain], self._slots:
+            job.status = "running"
+            job.started = time.time()
+            job.publish("status", {"status": job.status})
+            start_time = time.monotonic()
+
+            def on_result(criterion, result, feedback):
+                job.criteria_results[criterion] = result
+                job.feedback_results[criterion] = feedback
+                job.publish("criterion", {"criterion": criterion, "result": bool(result), "feedback": feedback})
+
+            # Every browser context of the scan records into (or replays from) the archive of the job
+            token = current_archive.set(job.archive)
+            try:
+                try:
+                    criteria_results, feedback_results = await self.run_checks(
+                        job.url, job.templates, on_result=on_result, only=job.only, force=job.force)
+                finally:
+                    current_archive.reset(token)
+                    if job.archive is not None and not job.archive.replaying:
+                        await asyncio.to_thread(self._finish_recording, job)
+                job.criteria_results, job.feedback_results = criteria_results, feedback_results
+                duration = time.monotonic() - start_time
+                job.duration = duration
+                job.result_id = await asyncio.to_thread(self.store_result, job, duration)
+                job.status = "done"
+                job.finished = time.time()
+                job.publish("done", {"conformity": job.conformity, "result_id": job.result_id})
+                print(f"Scan job {job.id} finished in {duration:.1f} seconds.")
+            except Exception as e:
+                print(f"Scan job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+                job.duration = time.monotonic() - start_time
+                job.finished = time.time()
+                job.publish("failed", {"error": job.error})
+
+    def _finish_recording(self, job):
+        """Merges the recorded HAR files of a finished scan and drops the oldest recordings."""
+        try:
+            job.archive.finish(job.url, job.templates)
+            prune_recordings(self.keep_recordings, self.recording_max_age)
+        except Exception as e:
+            print(f"Recording of job {job.id} could not be stored: {e}")
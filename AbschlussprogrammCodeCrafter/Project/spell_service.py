@@ -0,0 +1,82 @@
+import threading
+from functools import lru_cache
+from spellchecker import SpellChecker
+
+# Words of privacy and consent texts that are missing in the dictionaries of pyspellchecker
+COMPLIANCE_LEXICON = {
+    "de": [
+        "Drittunternehmen",
+        "Einwilligungsbedürftige",
+        "Datenschutzerklärung",
+        "Rechtsgrundlagen",
+        "Einwilligung",
+        "Zweck", "z",  # Abbreviation for 'z.B.'
+        "ID",  # As part of 'Nutzer-ID'
+        "Datenschutzinformationen",
+        "zuzuschneiden",
+        "Onlineangeboten",
+        "Marketingbemühungen",
+        "Auswertungsmöglichkeiten",
+        "Schaltfläche",
+        "Überwachungszwecken",
+        "Rechtsbehelfsmöglichkeiten",
+        "Widerrufsmöglichkeit",
+        "Verarbeitungsvorgänge",
+        "Überwachungsprogrammen",
+        "Klagemöglichkeit",
+        "Endgeräteinformationen",
+    ],
+    "en": [],
+}
+
+
+class SpellService:
+    """
+    Spell checkers shared by all checkers of the process.
+
+    Every language is loaded once, on first use (the frequency dictionaries are large),
+    together with its compliance lexicon. Lookups of single words are memoized in a bounded LRU cache.
+    """
+    def __init__(self, lexicon=None, cache_size=50000):
+        """
+        :param lexicon: Additional words per language, {language: [words]}
+        :param cache_size: Number of (language, word) lookups that are memoized
+        """
+        self.lexicon = COMPLIANCE_LEXICON if lexicon is None else lexicon
+        self._checkers = {}
+        self._lock = threading.Lock()
+        self._known = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def checker(self, language):
+        """
+        Returns the SpellChecker of a language, loading it on first use.
+
+        :return: SpellChecker, or None if pyspellchecker has no dictionary for the language
+        """
+        if language in self._checkers:
+            return self._checkers[language]
+        with self._lock:
+            if language not in self._checkers:
+                try:
+                    checker = SpellChecker(language=language)
+                    checker.word_frequency.load_words(self.lexicon.get(language, []))
+                except ValueError:
+                    checker = None  # Unsupported language
+                self._checkers[language] = checker
+        return self._checkers[language]
+
+    def _lookup(self, language, word):
+        checker = self.checker(language)
+        return checker is not None and word in checker
+
+    def known(self, word, language="de"):
+        """True if the dictionary of the language (or the lexicon) contains the word, case-insensitive."""
+        return self._known(language, word.lower())
+
+    def misspelled(self, words, language="de"):
+        """Returns the words that are not in the dictionary of the language, in their order."""
+        return [word for word in words if not self.known(word, language)]
+
+
+# Shared service used by all checkers of this process
+spell_service = SpellService()
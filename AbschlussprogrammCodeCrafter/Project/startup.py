@@ -0,0 +1,95 @@
+import re
+import subprocess
+import sys
+import threading
+import time
+
+
+def warm_up():
+    """
+    Loads everything the first scan would otherwise wait for: the browsers of the pool,
+    the checker modules, the spell dictionaries, the language profiles and the PDF renderer.
+    Returns {step: seconds}.
+    """
+    from browser_pool import browser_pool
+    from check_registry import registry
+    from spell_service import spell_service
+    from language_service import language_service
+
+    def pdf_renderer():
+        import xhtml2pdf.pisa  # noqa: F401
+
+    steps = [
+        ("browser pool", browser_pool.start),
+        ("checker modules", registry.load_checkers),
+        ("spell dictionaries", lambda: [spell_service.checker(language) for language in ("de", "en")]),
+        ("language profiles", lambda: language_service.text_language("Wir verwenden Cookies auf dieser Website.")),
+        ("pdf renderer", pdf_renderer),
+    ]
+    durations = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up of the {name} failed: {e}")
+        durations[name] = time.perf_counter() - start
+    print("Warm-up finished: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in durations.items()))
+    return durations
+
+
+def start_warm_up():
+    """Runs warm_up() in a background thread, so the server accepts requests right away."""
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times(module="app"):
+    """
+    Imports a module in a fresh interpreter (python -X importtime) and returns the total
+    import time in seconds and [(module, cumulative seconds)] of the modules it imports directly, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    # Children are listed before the module that imports them, indented by two more spaces
+    direct = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)', line)
+        if not match:
+            continue
+        name, seconds, depth = match.group(3), int(match.group(1)) / 1e6, len(match.group(2)) // 2
+        if depth == 0:
+            if name == module:
+                return seconds, sorted(direct, key=lambda item: item[1], reverse=True)
+            direct = []
+        elif depth == 1:
+            direct.append((name, seconds))
+    return None, []
+
+
+def main():
+    """
+    Startup benchmark: import time of the app per module, then the duration of the warm-up steps.
+    Importing the app has no side effects (the database is initialized by the first request).
+    """
+    total, modules = import_times("app")
+    if total is None:
+        print("The app could not be imported.")
+        return None
+    print(f"Importing the app took {total:.2f} s:")
+    for name, seconds in modules:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    import compliance_checks  # noqa: F401  Declares the checkers
+    from check_registry import registry
+    print("Checker modules (imported on first use):")
+    for module, seconds in sorted(registry.load_checkers().items(), key=lambda item: item[1], reverse=True):
+        print(f"  {seconds * 1000:8.1f} ms  {module}")
+    return warm_up()  # The browser pool is stopped at exit
+
+
+if __name__ == "__main__":
+    main()
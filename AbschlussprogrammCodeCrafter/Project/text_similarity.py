@@ -0,0 +1,154 @@
+import re
+import time
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Length of the character shingles used to pre-filter candidates
+SHINGLE_SIZE = 3
+
+
+def tokenize(text):
+    """Splits a text into words (the unit of the diff details)."""
+    return text.split()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of the character n-grams of a lower-cased, whitespace-normalized text."""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class TemplateText:
+    """
+    A template prepared once for any number of comparisons.
+
+    similarity() gives the percentage of difflib.SequenceMatcher(None, template, text).ratio() on the
+    characters. It is kept because the reports show this percentage and conformity is "== 100"; a
+    single comparison takes a few milliseconds on our templates (see main()), the cost was the search
+    over every line of a page. Identical texts are detected without computing it.
+    best_match() therefore never runs the character alignment per candidate: the candidates are ranked
+    by a cheap shingle (n-gram) Jaccard score, the best few are aligned on words (token_similarity())
+    and only the winner gets the character percentage. This is an approximation of max() over all
+    candidates: if the candidate with the highest ratio is not among the best by shingle score, it is missed.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.shingles = shingles(text)
+
+    def quick_score(self, text):
+        """Jaccard similarity of the character shingles (0..1), linear in the length of the texts."""
+        other = shingles(text)
+        if not self.shingles and not other:
+            return 1.0
+        return len(self.shingles & other) / len(self.shingles | other)
+
+    def similarity(self, text):
+        """Similarity in percent, identical to SequenceMatcher(None, template, text).ratio() * 100."""
+        if text == self.text:
+            return 100.0
+        return SequenceMatcher(None, self.text, text).ratio() * 100
+
+    def token_similarity(self, text):
+        """Similarity in percent of the word sequences, several times fewer elements to align than characters."""
+        if text == self.text:
+            return 100.0
+        return SequenceMatcher(None, self.tokens, tokenize(text), autojunk=False).ratio() * 100
+
+    def best_match(self, candidates, top=5):
+        """
+        Returns the candidate that is most similar to the template and its similarity in percent.
+        Only the `top` candidates with the highest shingle score are aligned on words, so the result
+        can differ from the exact best match (an exact text match is always found).
+        Use top=None to compare all candidates exactly on characters.
+
+        :return: (best candidate, similarity) or (None, 0) if there are no candidates
+        """
+        candidates = [candidate for candidate in dict.fromkeys(candidates)]  # Unique, in order
+        if not candidates:
+            return None, 0
+        if self.text in candidates:
+            return self.text, 100.0
+        if top is None:
+            similarity, best = max(((self.similarity(candidate), candidate) for candidate in candidates), key=lambda item: item[0])
+            return best, similarity
+        shortlist = sorted(candidates, key=self.quick_score, reverse=True)[:top]
+        best = max(shortlist, key=self.token_similarity)
+        return best, self.similarity(best)
+
+    def differences(self, text):
+        """
+        Word level differences to a text, in the format of difflib.ndiff:
+        "- word" is missing in the text, "+ word" is additional in the text.
+        """
+        tokens = tokenize(text)
+        matcher = SequenceMatcher(None, self.tokens, tokens, autojunk=False)
+        differences = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag in ("replace", "delete"):
+                differences.extend(f"- {word}" for word in self.tokens[i1:i2])
+            if tag in ("replace", "insert"):
+                differences.extend(f"+ {word}" for word in tokens[j1:j2])
+        return differences
+
+
+@lru_cache(maxsize=32)
+def prepare_template(text):
+    """Returns the prepared TemplateText, templates are reused for every scan and prepared only once."""
+    return TemplateText(text)
+
+
+def main():
+    """Micro-benchmark: newsletter best-match search and single comparisons on the default templates."""
+    from default_templates import DEFAULT_TEMPLATES  # Not from app, which loads Flask and all checks
+
+    def edited(text):
+        # A realistic variant: other brand, a changed sentence and a typo
+        words = text.split()
+        words[5:8] = ["Beispiel", "Marke", "GmbH"]
+        return " ".join(words).replace("Daten", "Datne", 1)
+
+    for name in ("newsletter", "cookie_policy", "newsletterdetail"):
+        template = DEFAULT_TEMPLATES[name]
+        # Lines of a newsletter page body: navigation, teasers and the edited consent text
+        page_lines = [f"Produkt {i}: Entdecken Sie unsere Newsletter-Angebote und Datenschutz-Hinweise Nr. {i}" for i in range(150)]
+        page_lines.insert(75, edited(template))
+        page_lines += [edited(template)[:400], template[len(template) // 2:]]
+
+        start = time.perf_counter()
+        best = max(page_lines, key=lambda line: SequenceMatcher(None, template, line).ratio())
+        old_similarity = SequenceMatcher(None, template, best).ratio() * 100
+        old_time = time.perf_counter() - start
+
+        prepare_template.cache_clear()
+        start = time.perf_counter()
+        new_best, new_similarity = prepare_template(template).best_match(page_lines)
+        new_time = time.perf_counter() - start
+
+        print(f"{name} ({len(template)} characters, {len(page_lines)} candidates): "
+              f"difflib {old_time * 1000:.1f} ms, engine {new_time * 1000:.1f} ms "
+              f"({old_time / max(new_time, 1e-9):.0f}x), same result: {best == new_best and old_similarity == new_similarity} "
+              f"({new_similarity:.2f}%)")
+
+        start = time.perf_counter()
+        SequenceMatcher(None, template, template).ratio()
+        old_time = time.perf_counter() - start
+        start = time.perf_counter()
+        prepare_template(template).similarity(template)
+        new_time = time.perf_counter() - start
+        print(f"  identical text: difflib {old_time * 1000:.2f} ms, engine {new_time * 1000:.3f} ms")
+
+        # Single comparison of an edited text, as in the banner text and more details checks
+        start = time.perf_counter()
+        prepare_template(template).similarity(edited(template))
+        char_time = time.perf_counter() - start
+        start = time.perf_counter()
+        prepare_template(template).token_similarity(edited(template))
+        token_time = time.perf_counter() - start
+        print(f"  edited text: characters {char_time * 1000:.2f} ms (reported percentage), words {token_time * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()